@@ -0,0 +1,333 @@
+"""
+Record/replay HTTP cassettes for deterministic performance runs.
+
+A cassette is a gzip-compressed stream of JSON lines: a header line followed
+by one line per request/response exchange. Both reading and writing stream
+line by line, so large backfill recordings never have to fit in memory.
+Secrets (passwords, bearer tokens, Cognito and Snoo tokens) and details that
+identify the family (baby id, timezone, query window) are scrubbed before
+anything reaches disk.
+
+Recording and replay are transport adapters mounted on a requests.Session,
+which is passed to ``SnooClient(session=...)``:
+
+    python benchmarks/cassettes.py record --out snoo.cassette.gz --days 30
+    python benchmarks/cassettes.py info snoo.cassette.gz
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+CASSETTE_FORMAT = 'zzzgrams-cassette'
+CASSETTE_VERSION = 1
+REDACTED = 'REDACTED'
+
+SENSITIVE_HEADERS = {'authorization', 'cookie', 'set-cookie', 'x-amz-security-token'}
+SENSITIVE_KEYS = {
+    'PASSWORD', 'USERNAME', 'AccessToken', 'IdToken', 'RefreshToken', 'token',
+    'email', 'password', 'vendorId', 'timeZone',
+}
+# Baby ids in URL paths; recorded and replayed as a wildcard
+BABY_PATH = re.compile(r'/babies/[^/]+/')
+# The body is decoded by requests, so these no longer describe it on replay
+DROPPED_RESPONSE_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+def scrub(value: Any) -> Any:
+    """
+    Replace sensitive values in a decoded JSON document
+
+    Args:
+        value: Decoded JSON value
+
+    Returns:
+        Copy of the value with sensitive keys redacted
+    """
+    if isinstance(value, dict):
+        return {key: REDACTED if key in SENSITIVE_KEYS else scrub(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+
+def scrub_url(url: str) -> str:
+    """
+    Reduce a request URL to what replay matches on
+
+    Args:
+        url: Request URL
+
+    Returns:
+        The URL with the baby id wildcarded and the query string (the family's
+        timezone and time window) dropped
+    """
+    parts = urlparse(url)
+    return parts._replace(path=BABY_PATH.sub('/babies/*/', parts.path), params='', query='', fragment='').geturl()
+
+
+def _scrub_headers(headers) -> Dict[str, str]:
+    return {key: REDACTED if key.lower() in SENSITIVE_HEADERS else value for key, value in headers.items()}
+
+
+def _encode_body(body: Optional[bytes]) -> Dict[str, Any]:
+    if not body:
+        return {'text': ''}
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(body).decode('ascii')}
+    try:
+        return {'json': scrub(json.loads(text))}
+    except ValueError:
+        return {'text': text}
+
+
+def _decode_body(body: Dict[str, Any]) -> bytes:
+    if 'json' in body:
+        return json.dumps(body['json']).encode('utf-8')
+    if 'base64' in body:
+        return base64.b64decode(body['base64'])
+    return body.get('text', '').encode('utf-8')
+
+
+def _request_key(method: str, url: str) -> Tuple[str, str]:
+    # Baby ids are wildcarded so one recording can be replayed for any baby
+    return method.upper(), urlparse(scrub_url(url)).path
+
+
+class CassetteWriter:
+    """Appends scrubbed exchanges to a gzip JSON-lines cassette"""
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.count = 0
+        self._write({'format': CASSETTE_FORMAT, 'version': CASSETTE_VERSION,
+                     'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')})
+
+    def _write(self, document: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(document, separators=(',', ':')) + '\n')
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        exchange = {
+            'offset': round(time.perf_counter() - self._start - elapsed, 6),
+            'elapsed': round(elapsed, 6),
+            'request': {
+                'method': request.method,
+                'url': scrub_url(request.url),
+                'headers': _scrub_headers(request.headers),
+                'body': _encode_body(body),
+            },
+            'response': {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {key: value for key, value in _scrub_headers(response.headers).items()
+                            if key.lower() not in DROPPED_RESPONSE_HEADERS},
+                'body': _encode_body(response.content),
+            },
+        }
+        with self._lock:
+            self._write(exchange)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def iter_exchanges(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the exchanges of a cassette
+
+    Args:
+        path: Cassette file
+
+    Yields:
+        One decoded exchange per recorded request
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != CASSETTE_FORMAT:
+            raise ValueError(f"{path} is not a Zzzgrams cassette")
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter that writes every exchange to a cassette"""
+
+    def __init__(self, writer: CassetteWriter, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        # Reading content here keeps the recorded timing inclusive of the body
+        response.content
+        self.writer.record(request, response, time.perf_counter() - start)
+        return response
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+
+class CassetteMismatchError(requests.exceptions.ConnectionError):
+    """Raised when a request has no matching exchange left in the cassette"""
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests from a cassette
+
+    Exchanges are matched by method and URL path (with the baby id
+    wildcarded) in recorded order. Requests
+    arriving out of order are served from a small lookahead buffer filled from
+    the stream.
+
+    Args:
+        path: Cassette file
+        speed: Timing factor; 1.0 waits the recorded latency, 10.0 waits a
+            tenth of it and 0 replays without waiting
+        loop: Restart from the beginning once the cassette is exhausted
+        max_lookahead: Cap on buffered out-of-order exchanges
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, max_lookahead: int = 1000):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.max_lookahead = max_lookahead
+        self._stream = iter_exchanges(path)
+        self._pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self.replayed = 0
+
+    def _next_exchange(self) -> Optional[Dict[str, Any]]:
+        exchange = next(self._stream, None)
+        if exchange is None and self.loop and self.replayed:
+            self._stream = iter_exchanges(self.path)
+            exchange = next(self._stream, None)
+        return exchange
+
+    def _take(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending:
+                self._pending_count -= 1
+                return pending.pop(0)
+            while self._pending_count < self.max_lookahead:
+                exchange = self._next_exchange()
+                if exchange is None:
+                    break
+                request = exchange['request']
+                exchange_key = _request_key(request['method'], request['url'])
+                if exchange_key == key:
+                    return exchange
+                self._pending.setdefault(exchange_key, []).append(exchange)
+                self._pending_count += 1
+        raise CassetteMismatchError(f"No recorded exchange for {key[0]} {key[1]} in {self.path}")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        exchange = self._take(_request_key(request.method, request.url))
+        if self.speed:
+            time.sleep(exchange['elapsed'] / self.speed)
+
+        recorded = exchange['response']
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason')
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response._content = _decode_body(recorded['body'])
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=exchange['elapsed'])
+        response.connection = self
+        with self._lock:
+            self.replayed += 1
+        return response
+
+    def close(self):
+        pass
+
+
+def _mount(session: requests.Session, adapter: BaseAdapter) -> requests.Session:
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def recording_session(path: str) -> requests.Session:
+    """Return a Session that records every exchange to a new cassette"""
+    return _mount(requests.Session(), RecordingAdapter(CassetteWriter(path)))
+
+
+def replay_session(path: str, speed: float = 1.0, loop: bool = False) -> requests.Session:
+    """Return a Session that serves every request from a cassette"""
+    return _mount(requests.Session(), ReplayAdapter(path, speed=speed, loop=loop))
+
+
+def _record(args: argparse.Namespace) -> int:
+    from zzzgrams.clients.snoo_client import SnooClient
+
+    session = recording_session(args.out)
+    client = SnooClient(session=session)
+    day = date.fromisoformat(args.end) if args.end else date.today()
+    for _ in range(args.days):
+        client.get_sleep_data(start_time=f'{day.isoformat()}T00:00:00',
+                              end_time=f'{day.isoformat()}T23:59:59', as_object=False)
+        day -= timedelta(days=1)
+    session.close()
+    print(f"Recorded {args.days} day(s) to {args.out}")
+    return 0
+
+
+def _info(args: argparse.Namespace) -> int:
+    count, body_bytes, elapsed = 0, 0, 0.0
+    for exchange in iter_exchanges(args.path):
+        count += 1
+        body_bytes += len(_decode_body(exchange['response']['body']))
+        elapsed += exchange['elapsed']
+    print(f"{count} exchanges, {body_bytes:,} response bytes, {elapsed:.3f}s recorded latency, "
+          f"{os.path.getsize(args.path):,} bytes on disk")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Record and inspect Snoo HTTP cassettes')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='record live SnooClient traffic (uses SNOO_* env vars)')
+    record.add_argument('--out', required=True)
+    record.add_argument('--days', type=int, default=1, help='number of days to fetch, newest first')
+    record.add_argument('--end', help='last day to fetch (YYYY-MM-DD), default today')
+    info = commands.add_parser('info', help='summarize a cassette')
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+    return _record(args) if args.command == 'record' else _info(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
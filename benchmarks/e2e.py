@@ -0,0 +1,273 @@
+"""
+End-to-end latency, throughput and memory benchmark.
+
+Runs the real SnooClient, BedrockClient, SNSClient and SleepAnalyzerService
+against the local stand-ins in ``benchmarks/fakes.py`` and writes the results
+as JSON so they can be compared across commits:
+
+    python benchmarks/e2e.py --output bench_e2e.json
+    python benchmarks/e2e.py --bedrock-error-rate 0.05 --compare bench_e2e.json
+    python benchmarks/e2e.py --cassette snoo.cassette.gz --cassette-speed 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import queue
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.cassettes import replay_session
+from benchmarks.fakes import FakeSnooServer, FaultProfile, stub_bedrock, stub_sns
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.clients.bedrock_client import BedrockClient
+from zzzgrams.clients.sns_client import SNSClient
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+
+
+def build_service(server: FakeSnooServer, bedrock_faults: FaultProfile, sns_faults: FaultProfile,
+                  seed: int = 0, cassette: Optional[str] = None, cassette_speed: float = 1.0) -> SleepAnalyzerService:
+    """
+    Build a service whose real clients are wired to the local stand-ins
+
+    Args:
+        server: Running fake Snoo/Cognito server
+        bedrock_faults: Latency/error injection for Bedrock
+        sns_faults: Latency/error injection for SNS
+        seed: Seed for the AWS fault injectors
+        cassette: Serve Snoo traffic from this cassette instead of the server
+        cassette_speed: Replay timing factor, 0 for no waiting
+
+    Returns:
+        SleepAnalyzerService ready to run
+    """
+    if cassette:
+        session = replay_session(cassette, speed=cassette_speed, loop=True)
+        snoo = SnooClient(email='bench@example.com', password='bench-password', session=session)
+    else:
+        snoo = SnooClient(email='bench@example.com', password='bench-password', baby_id='bench-baby')
+        server.configure_client(snoo)
+    bedrock = BedrockClient()
+    stub_bedrock(bedrock, bedrock_faults, seed)
+    sns = SNSClient()
+    stub_sns(sns, sns_faults, seed)
+    return SleepAnalyzerService(trace=False, snoo_client=snoo, bedrock_client=bedrock, sns_client=sns)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    Reduce latency samples to percentiles
+
+    Args:
+        samples_ms: Latencies in milliseconds
+
+    Returns:
+        Dict with count, mean, min, p50, p90, p99 and max
+    """
+    if not samples_ms:
+        return {'count': 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)], 3)
+
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 3),
+        'min': round(ordered[0], 3),
+        'p50': pct(50),
+        'p90': pct(90),
+        'p99': pct(99),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def succeeded(result: Dict[str, Any]) -> bool:
+    """
+    Whether a run delivered a real message
+
+    The service reports success even when Bedrock returned its error text or
+    SNS failed to publish, so injected faults are checked for here.
+    """
+    return (result['success'] and result.get('sns_published', False)
+            and not result['ai_insights'].startswith('Error calling Bedrock'))
+
+
+def _timed_run(service: SleepAnalyzerService) -> tuple:
+    start = time.perf_counter()
+    result = service.analyze_sleep_data()
+    return (time.perf_counter() - start) * 1000, succeeded(result)
+
+
+def run_cold(server: FakeSnooServer, runs: int, bedrock_faults: FaultProfile, sns_faults: FaultProfile,
+             **service_options: Any) -> Dict[str, Any]:
+    """Time service construction plus one run, with fresh clients each time"""
+    samples, successes = [], 0
+    for i in range(runs):
+        start = time.perf_counter()
+        service = build_service(server, bedrock_faults, sns_faults, seed=i, **service_options)
+        _, ok = _timed_run(service)
+        samples.append((time.perf_counter() - start) * 1000)
+        successes += ok
+    return dict(summarize(samples), success_rate=round(successes / max(runs, 1), 4))
+
+
+def run_warm(server: FakeSnooServer, runs: int, bedrock_faults: FaultProfile, sns_faults: FaultProfile,
+             **service_options: Any) -> Dict[str, Any]:
+    """Time repeated runs on one long-lived service"""
+    service = build_service(server, bedrock_faults, sns_faults, **service_options)
+    _timed_run(service)
+    samples, successes = [], 0
+    for _ in range(runs):
+        elapsed, ok = _timed_run(service)
+        samples.append(elapsed)
+        successes += ok
+    return dict(summarize(samples), success_rate=round(successes / max(runs, 1), 4))
+
+
+def run_throughput(server: FakeSnooServer, concurrency: int, runs: int, bedrock_faults: FaultProfile,
+                   sns_faults: FaultProfile, **service_options: Any) -> Dict[str, Any]:
+    """Run a fleet of analyses across a thread pool and measure runs per second"""
+    # boto3 client creation is not thread-safe, so services are built up front
+    pool: 'queue.Queue[SleepAnalyzerService]' = queue.Queue()
+    for i in range(concurrency):
+        pool.put(build_service(server, bedrock_faults, sns_faults, seed=i, **service_options))
+
+    def task(_):
+        service = pool.get()
+        try:
+            return _timed_run(service)
+        finally:
+            pool.put(service)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(task, range(runs)))
+    seconds = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'runs': runs,
+        'seconds': round(seconds, 3),
+        'runs_per_sec': round(runs / seconds, 2),
+        'success_rate': round(sum(ok for _, ok in outcomes) / max(runs, 1), 4),
+        'latency_ms': summarize([elapsed for elapsed, _ in outcomes]),
+    }
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Describe changes between two result files
+
+    Args:
+        current: Results of this run
+        baseline: Results loaded from a previous run
+
+    Returns:
+        Human readable lines, one per compared figure
+    """
+    lines = []
+
+    def line(label: str, new: Optional[float], old: Optional[float]) -> None:
+        if new is None or old is None:
+            return
+        delta = (new - old) / old * 100 if old else 0.0
+        lines.append(f"{label:32} {old:12.2f} -> {new:12.2f}  ({delta:+.1f}%)")
+
+    for phase in ('cold', 'warm'):
+        for key in ('p50', 'p90', 'p99'):
+            line(f'{phase} {key} ms', current[phase].get(key), baseline.get(phase, {}).get(key))
+    old_levels = {level['concurrency']: level for level in baseline.get('throughput', [])}
+    for level in current['throughput']:
+        old = old_levels.get(level['concurrency'])
+        if old:
+            line(f"throughput x{level['concurrency']} runs/s", level['runs_per_sec'], old['runs_per_sec'])
+    line('peak rss KiB', current['peak_rss_kb'], baseline.get('peak_rss_kb'))
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='End-to-end benchmark against local stand-ins')
+    parser.add_argument('--cold-runs', type=int, default=10)
+    parser.add_argument('--warm-runs', type=int, default=50)
+    parser.add_argument('--concurrency', default='1,2,4,8', help='comma separated worker counts')
+    parser.add_argument('--runs-per-level', type=int, default=40)
+    for name, latency in (('snoo', 20.0), ('bedrock', 200.0), ('sns', 20.0)):
+        parser.add_argument(f'--{name}-latency-ms', type=float, default=latency)
+        parser.add_argument(f'--{name}-jitter-ms', type=float, default=latency / 4)
+        parser.add_argument(f'--{name}-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cassette', help='replay Snoo traffic from a recorded cassette')
+    parser.add_argument('--cassette-speed', type=float, default=1.0, help='replay timing factor, 0 for no waiting')
+    parser.add_argument('--output', default='bench_e2e.json', help='where to write the JSON results')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args(argv)
+
+    def faults(name: str) -> FaultProfile:
+        return FaultProfile(getattr(args, f'{name}_latency_ms'), getattr(args, f'{name}_jitter_ms'),
+                            getattr(args, f'{name}_error_rate'))
+
+    bedrock_faults, sns_faults = faults('bedrock'), faults('sns')
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    service_options = {'cassette': args.cassette, 'cassette_speed': args.cassette_speed}
+
+    # The clients print on every publish; keep the benchmark output readable
+    with FakeSnooServer(faults('snoo'), seed=args.seed) as server, contextlib.redirect_stdout(io.StringIO()):
+        results = {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'config': vars(args),
+            'cold': run_cold(server, args.cold_runs, bedrock_faults, sns_faults, **service_options),
+            'warm': run_warm(server, args.warm_runs, bedrock_faults, sns_faults, **service_options),
+            'throughput': [run_throughput(server, level, args.runs_per_level, bedrock_faults, sns_faults,
+                                          **service_options)
+                           for level in levels],
+            'snoo_requests': dict(server.request_counts),
+        }
+    results['peak_rss_kb'] = peak_rss_kb()
+
+    print(f"cold  p50 {results['cold'].get('p50')} ms  p99 {results['cold'].get('p99')} ms")
+    print(f"warm  p50 {results['warm'].get('p50')} ms  p99 {results['warm'].get('p99')} ms")
+    for level in results['throughput']:
+        print(f"x{level['concurrency']:<3} {level['runs_per_sec']:8.2f} runs/s  success {level['success_rate']:.2%}")
+    print(f"peak rss {results['peak_rss_kb']} KiB")
+
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
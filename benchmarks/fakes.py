@@ -0,0 +1,220 @@
+"""
+Local stand-ins for the Snoo/Cognito HTTP API, Bedrock and SNS.
+
+The stand-ins sit underneath the real client code: ``FakeSnooServer`` is an
+HTTP server the real ``SnooClient`` talks to over a socket, and the AWS
+clients keep their real botocore client with a ``Stubber`` attached. Each
+stand-in takes a ``FaultProfile`` to inject latency and errors.
+"""
+
+import io
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+PayloadFactory = Callable[[str, str, str], Dict[str, Any]]
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error injection settings for one stand-in"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+
+class _FaultInjector:
+    """Thread-safe seeded source of delays and failures"""
+
+    def __init__(self, faults: FaultProfile, seed: int):
+        self.faults = faults
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def apply(self) -> bool:
+        """Sleep for the injected latency and return True if this call fails"""
+        with self._lock:
+            jitter = self._rng.uniform(-self.faults.jitter_ms, self.faults.jitter_ms)
+            fails = self._rng.random() < self.faults.error_rate
+        delay = max(self.faults.latency_ms + jitter, 0.0) / 1000.0
+        if delay:
+            time.sleep(delay)
+        return fails
+
+
+def default_payload(baby_id: str, start_time: str, end_time: str) -> Dict[str, Any]:
+    """A typical sessions/daily response, durations in seconds"""
+    return {
+        'naps': 3,
+        'longestSleep': 14400,
+        'totalSleep': 50400,
+        'daySleep': 14400,
+        'nightSleep': 36000,
+        'nightWakings': 2,
+    }
+
+
+class FakeSnooServer:
+    """Local HTTP server imitating the Cognito and Snoo endpoints"""
+
+    def __init__(self, faults: Optional[FaultProfile] = None, payload_factory: Optional[PayloadFactory] = None,
+                 seed: int = 0):
+        self.injector = _FaultInjector(faults or FaultProfile(), seed)
+        self.payload_factory = payload_factory or default_payload
+        self.request_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeSnooServer':
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('content-length') or 0)
+                self.rfile.read(length)
+                server._route(self, 'POST')
+
+            def do_GET(self):
+                server._route(self, 'GET')
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> 'FakeSnooServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def configure_client(self, client) -> None:
+        """Point a SnooClient's endpoints at this server"""
+        # Cognito is served from the root path, as in production
+        client.aws_auth_url = f'{self.base_url}/'
+        client.snoo_api_url = self.base_url
+        client.snoo_auth_url = f'{self.base_url}/us/me/v10/pubnub/authorize'
+        client.snoo_devices_url = f'{self.base_url}/hds/me/v11/devices'
+
+    def _route(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        url = urlparse(handler.path)
+        if method == 'POST' and url.path == '/':
+            route, body = 'cognito', {'AuthenticationResult': {
+                'AccessToken': 'fake-access', 'IdToken': 'fake-id', 'RefreshToken': 'fake-refresh'}}
+        elif method == 'POST' and url.path.endswith('/pubnub/authorize'):
+            route, body = 'authorize', {'snoo': {'token': 'fake-snoo-token'}}
+        elif method == 'GET' and url.path.endswith('/sessions/daily'):
+            query = parse_qs(url.query)
+            baby_id = url.path.split('/babies/')[1].split('/')[0]
+            route = 'sessions'
+            body = self.payload_factory(baby_id, query.get('startTime', [''])[0], query.get('endTime', [''])[0])
+        else:
+            self._respond(handler, 404, {'message': 'not found'})
+            return
+
+        with self._counts_lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+        if self.injector.apply():
+            self._respond(handler, 503, {'message': 'injected failure'})
+        else:
+            self._respond(handler, 200, body)
+
+    def _respond(self, handler: BaseHTTPRequestHandler, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('content-type', 'application/json')
+        handler.send_header('content-length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+def _attach(stubber: Stubber, injector: _FaultInjector, queue_outcome: Callable[[bool], None]) -> Stubber:
+    """Queue a stubbed outcome just before each call is validated"""
+    def before_call(**kwargs):
+        queue_outcome(injector.apply())
+
+    stubber.client.meta.events.register_first('before-parameter-build.*.*', before_call)
+    stubber.activate()
+    return stubber
+
+
+def stub_bedrock(client, faults: Optional[FaultProfile] = None, seed: int = 0,
+                 output_text: str = 'What a night! Coffee is on its way.') -> Stubber:
+    """
+    Attach a Stubber to a BedrockClient's botocore client
+
+    Args:
+        client: BedrockClient whose ``bedrock`` client will be stubbed
+        faults: Latency/error injection for invoke_model
+        seed: Seed for the fault injector
+        output_text: Text returned by every successful invoke
+
+    Returns:
+        The active Stubber
+    """
+    stubber = Stubber(client.bedrock)
+    payload = json.dumps({
+        'inputTextTokenCount': 300,
+        'results': [{'outputText': output_text, 'tokenCount': 40, 'completionReason': 'FINISH'}],
+    }).encode('utf-8')
+
+    def queue_outcome(fails: bool) -> None:
+        if fails:
+            stubber.add_client_error('invoke_model', 'ThrottlingException', 'Rate exceeded', 429)
+        else:
+            stubber.add_response('invoke_model', {
+                'body': StreamingBody(io.BytesIO(payload), len(payload)),
+                'contentType': 'application/json',
+            })
+
+    return _attach(stubber, _FaultInjector(faults or FaultProfile(), seed), queue_outcome)
+
+
+def stub_sns(client, faults: Optional[FaultProfile] = None, seed: int = 0) -> Stubber:
+    """
+    Attach a Stubber to an SNSClient's botocore client
+
+    Args:
+        client: SNSClient whose ``sns`` client will be stubbed
+        faults: Latency/error injection for publish
+        seed: Seed for the fault injector
+
+    Returns:
+        The active Stubber
+    """
+    stubber = Stubber(client.sns)
+    counter = iter(range(1, 1 << 62))
+
+    def queue_outcome(fails: bool) -> None:
+        if fails:
+            stubber.add_client_error('publish', 'InternalError', 'Injected failure', 500)
+        else:
+            stubber.add_response('publish', {'MessageId': f'fake-{next(counter)}'})
+
+    return _attach(stubber, _FaultInjector(faults or FaultProfile(), seed), queue_outcome)
@@ -0,0 +1,158 @@
+"""
+Import-time budget benchmark.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter for
+each budgeted module, parses the cumulative import cost from stderr and fails
+when any module exceeds its budget. Run from the project root:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 9 --scale 2.0 --json bench_imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Cumulative cold-import budgets in milliseconds. The light entry points must
+# never pull in boto3/botocore/requests/pytz; the heavy ones are bounded so a
+# new eager import shows up as a failure rather than a slow morning.
+BUDGETS_MS: Dict[str, float] = {
+    'zzzgrams': 15.0,
+    'zzzgrams.models.sleep_data': 40.0,
+    'zzzgrams.utils.text_cleaner': 15.0,
+    'zzzgrams.clients.snoo_client': 400.0,
+    'zzzgrams.services.sleep_analyzer_service': 800.0,
+}
+
+# Modules that must not be loaded as a side effect of importing the key
+FORBIDDEN_IMPORTS: Dict[str, List[str]] = {
+    'zzzgrams': ['boto3', 'botocore', 'requests', 'pytz'],
+    'zzzgrams.models.sleep_data': ['boto3', 'botocore', 'requests', 'pytz'],
+    'zzzgrams.utils.text_cleaner': ['boto3', 'botocore', 'requests', 'pytz'],
+    'zzzgrams.clients.snoo_client': ['boto3', 'botocore', 'pytz'],
+}
+
+
+@dataclass
+class ImportTiming:
+    """Self and cumulative import time of one module, in microseconds"""
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class BudgetResult:
+    """Outcome of measuring one module against its budget"""
+    module: str
+    median_ms: float
+    budget_ms: float
+    forbidden_loaded: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return self.median_ms <= self.budget_ms and not self.forbidden_loaded
+
+
+def parse_importtime(output: str) -> Dict[str, ImportTiming]:
+    """
+    Parse ``-X importtime`` stderr into per-module timings
+
+    Args:
+        output: Raw stderr of an interpreter run with ``-X importtime``
+
+    Returns:
+        Dict mapping module name to its ImportTiming
+    """
+    timings: Dict[str, ImportTiming] = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0].strip())
+            cumulative_us = int(fields[1].strip())
+        except ValueError:
+            # Header line: "self [us] | cumulative | imported package"
+            continue
+        timings[fields[2].strip()] = ImportTiming(self_us, cumulative_us)
+    return timings
+
+
+def measure_import(module: str, python: str = sys.executable) -> Dict[str, ImportTiming]:
+    """
+    Import a module in a fresh interpreter and return its parsed timings
+
+    Args:
+        module: Dotted module name to import
+        python: Interpreter to run
+
+    Returns:
+        Dict mapping every imported module to its ImportTiming
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return parse_importtime(proc.stderr)
+
+
+def check_budget(module: str, budget_ms: float, runs: int = 5, scale: float = 1.0) -> BudgetResult:
+    """
+    Measure a module's median cumulative import time against its budget
+
+    Args:
+        module: Dotted module name to import
+        budget_ms: Allowed cumulative import time in milliseconds
+        runs: Number of fresh interpreters to sample
+        scale: Multiplier applied to the budget for slower machines
+
+    Returns:
+        BudgetResult for the module
+    """
+    samples = []
+    loaded: set = set()
+    # The first run warms the bytecode cache and is discarded
+    measure_import(module)
+    for _ in range(runs):
+        timings = measure_import(module)
+        samples.append(timings[module].cumulative_us / 1000.0)
+        loaded.update(timings)
+    forbidden = [name for name in FORBIDDEN_IMPORTS.get(module, []) if name in loaded]
+    return BudgetResult(module, round(statistics.median(samples), 2), budget_ms * scale, forbidden)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check cold import time against per-module budgets')
+    parser.add_argument('--runs', type=int, default=5, help='interpreter runs per module')
+    parser.add_argument('--scale', type=float, default=1.0, help='budget multiplier for slow machines')
+    parser.add_argument('--json', dest='json_path', help='write results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    results = [check_budget(module, budget, args.runs, args.scale) for module, budget in BUDGETS_MS.items()]
+
+    for result in results:
+        status = 'ok' if result.passed else 'FAIL'
+        extra = f"  forbidden: {', '.join(result.forbidden_loaded)}" if result.forbidden_loaded else ''
+        print(f"{status:4}  {result.module:45} {result.median_ms:9.2f} ms / {result.budget_ms:.0f} ms{extra}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump([dict(asdict(r), passed=r.passed) for r in results], f, indent=2)
+
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
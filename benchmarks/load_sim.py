@@ -0,0 +1,138 @@
+"""
+Fleet load simulator.
+
+Replays synthetic history through the real SleepAnalyzerService, served by
+the local stand-ins, with open-loop Poisson arrivals at each requested rate.
+Latency is measured from the scheduled arrival time, so queueing shows up
+once the offered rate exceeds what the worker pool can absorb:
+
+    python benchmarks/load_sim.py --babies 1000 --days 30 --rates 5,10,20,40 --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.e2e import build_service, summarize, peak_rss_kb
+from benchmarks.fakes import FakeSnooServer, FaultProfile
+from benchmarks.synthetic import SyntheticHistory, generate_history, replay_factory
+
+
+def run_rate(server: FakeSnooServer, history: SyntheticHistory, rate: float, duration_s: float, workers: int,
+             bedrock_faults: FaultProfile, sns_faults: FaultProfile, seed: int = 0) -> Dict[str, Any]:
+    """
+    Drive the service at one offered arrival rate
+
+    Args:
+        server: Running fake Snoo server serving the history
+        history: Synthetic history to pick babies from
+        rate: Offered arrivals per second
+        duration_s: How long to keep generating arrivals
+        workers: Size of the worker pool
+        bedrock_faults: Latency/error injection for Bedrock
+        sns_faults: Latency/error injection for SNS
+        seed: Seed for arrival times and baby selection
+
+    Returns:
+        Dict with offered and achieved rates, latency percentiles and lag
+    """
+    rng = np.random.default_rng(seed)
+    n_arrivals = max(int(rate * duration_s), 1)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, n_arrivals))
+    babies = rng.integers(0, len(history.baby_ids), n_arrivals)
+
+    pool: 'queue.Queue' = queue.Queue()
+    for i in range(workers):
+        pool.put(build_service(server, bedrock_faults, sns_faults, seed=seed + i))
+
+    latencies: List[float] = []
+    successes = 0
+    lock = threading.Lock()
+
+    def task(scheduled: float, baby_id: str) -> None:
+        nonlocal successes
+        service = pool.get()
+        try:
+            service.snoo_client.BABY_ID = baby_id
+            ok = service.analyze_sleep_data()['success']
+        finally:
+            pool.put(service)
+        with lock:
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+            successes += ok
+
+    start = time.perf_counter()
+    max_lag = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for offset, baby in zip(arrivals, babies):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            executor.submit(task, scheduled, history.baby_ids[baby])
+    elapsed = time.perf_counter() - start
+
+    return {
+        'offered_rate': rate,
+        'arrivals': n_arrivals,
+        'achieved_rate': round(n_arrivals / elapsed, 2),
+        'success_rate': round(successes / n_arrivals, 4),
+        'latency_ms': summarize(latencies),
+        'max_dispatch_lag_ms': round(max_lag * 1000, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Replay synthetic history through the service at fixed rates')
+    parser.add_argument('--babies', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--levels', action='store_true', help='include levels segments in payloads')
+    parser.add_argument('--rates', default='5,10,20', help='comma separated arrivals per second')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of arrivals per rate')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--snoo-latency-ms', type=float, default=20.0)
+    parser.add_argument('--bedrock-latency-ms', type=float, default=200.0)
+    parser.add_argument('--sns-latency-ms', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_load.json')
+    args = parser.parse_args(argv)
+
+    history = generate_history(args.babies, args.days, args.seed)
+    snoo_faults = FaultProfile(args.snoo_latency_ms, args.snoo_latency_ms / 4)
+    bedrock_faults = FaultProfile(args.bedrock_latency_ms, args.bedrock_latency_ms / 4)
+    sns_faults = FaultProfile(args.sns_latency_ms, args.sns_latency_ms / 4)
+
+    levels = []
+    with FakeSnooServer(snoo_faults, replay_factory(history, args.levels), args.seed) as server, \
+            contextlib.redirect_stdout(io.StringIO()):
+        for rate in (float(r) for r in args.rates.split(',') if r):
+            levels.append(run_rate(server, history, rate, args.duration, args.workers,
+                                   bedrock_faults, sns_faults, args.seed))
+
+    for level in levels:
+        latency = level['latency_ms']
+        print(f"{level['offered_rate']:7.1f}/s offered  {level['achieved_rate']:7.1f}/s achieved  "
+              f"p50 {latency.get('p50')} ms  p99 {latency.get('p99')} ms  success {level['success_rate']:.2%}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'config': vars(args), 'levels': levels, 'peak_rss_kb': peak_rss_kb()}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
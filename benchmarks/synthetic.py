@@ -0,0 +1,228 @@
+"""
+Synthetic Snoo sleep history for load testing.
+
+``generate_history`` draws N babies x M days of ``sessions/daily``-shaped
+aggregates in one vectorized pass, so millions of baby-days take seconds.
+Distributions follow typical infant sleep by age: total sleep drifts from
+about 16h to 14h over the first six months while night sleep consolidates,
+naps and night wakings become fewer and the longest stretch grows.
+
+    python benchmarks/synthetic.py --babies 10000 --days 100
+"""
+
+import argparse
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+SECONDS_PER_HOUR = 3600
+EPOCH = date(1970, 1, 1)
+
+
+@dataclass
+class SyntheticHistory:
+    """Columnar synthetic history, one row per baby-day, durations in seconds"""
+    baby_ids: List[str]
+    baby: np.ndarray
+    day: np.ndarray
+    age_days: np.ndarray
+    naps: np.ndarray
+    longestSleep: np.ndarray
+    totalSleep: np.ndarray
+    daySleep: np.ndarray
+    nightSleep: np.ndarray
+    nightWakings: np.ndarray
+    seed: int
+
+    def __len__(self) -> int:
+        return len(self.baby)
+
+    @property
+    def n_days(self) -> int:
+        return len(self) // max(len(self.baby_ids), 1)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Return row i as a sessions/daily payload (without levels)"""
+        return {
+            'naps': int(self.naps[i]),
+            'longestSleep': int(self.longestSleep[i]),
+            'totalSleep': int(self.totalSleep[i]),
+            'daySleep': int(self.daySleep[i]),
+            'nightSleep': int(self.nightSleep[i]),
+            'nightWakings': int(self.nightWakings[i]),
+        }
+
+    def index_of(self, baby_index: int, day_offset: int) -> int:
+        """Row index of a baby's day, rows are ordered by baby then day"""
+        return baby_index * self.n_days + day_offset
+
+
+def generate_history(n_babies: int, n_days: int, seed: int = 0, start_date: date = date(2025, 1, 1),
+                     max_start_age_days: int = 180) -> SyntheticHistory:
+    """
+    Generate synthetic sleep history for many babies
+
+    Args:
+        n_babies: Number of synthetic babies
+        n_days: Number of consecutive days per baby
+        seed: Random seed, the same seed gives the same history
+        start_date: Calendar date of the first day
+        max_start_age_days: Babies start at a uniform age in [0, this)
+
+    Returns:
+        SyntheticHistory with n_babies * n_days rows ordered by baby then day
+    """
+    rng = np.random.default_rng(seed)
+    rows = n_babies * n_days
+
+    baby = np.repeat(np.arange(n_babies, dtype=np.int32), n_days)
+    day_offset = np.tile(np.arange(n_days, dtype=np.int32), n_babies)
+    start_age = rng.integers(0, max_start_age_days, n_babies, dtype=np.int32)
+    age_days = start_age[baby] + day_offset
+    maturity = np.minimum(age_days / 180.0, 1.0)
+
+    # Per-baby temperament: some babies simply sleep more or wake more
+    sleep_bias = rng.normal(0.0, 0.6, n_babies)[baby]
+    waking_bias = rng.lognormal(0.0, 0.25, n_babies)[baby]
+
+    total_hours = 16.0 - 2.0 * maturity + sleep_bias + rng.normal(0.0, 0.9, rows)
+    total_hours = np.clip(total_hours, 9.0, 19.0)
+    night_fraction = np.clip(0.5 + 0.2 * maturity + rng.normal(0.0, 0.05, rows), 0.35, 0.85)
+
+    night_hours = total_hours * night_fraction
+    day_hours = total_hours - night_hours
+    night_wakings = rng.poisson(np.maximum(3.5 - 2.5 * maturity, 0.3) * waking_bias)
+    naps = np.maximum(rng.poisson(5.0 - 2.0 * maturity), 1)
+    # The longest stretch grows with age and shrinks with every waking
+    longest_fraction = np.clip((0.3 + 0.35 * maturity) / np.sqrt(1 + 0.3 * night_wakings)
+                               + rng.normal(0.0, 0.05, rows), 0.1, 1.0)
+    longest_hours = night_hours * longest_fraction
+
+    to_seconds = SECONDS_PER_HOUR
+    day_number = np.int32((start_date - EPOCH).days) + day_offset
+    return SyntheticHistory(
+        baby_ids=[f'baby-{i:07d}' for i in range(n_babies)],
+        baby=baby,
+        day=day_number,
+        age_days=age_days,
+        naps=naps.astype(np.int16),
+        longestSleep=(longest_hours * to_seconds).astype(np.int32),
+        totalSleep=(total_hours * to_seconds).astype(np.int32),
+        daySleep=(day_hours * to_seconds).astype(np.int32),
+        nightSleep=(night_hours * to_seconds).astype(np.int32),
+        nightWakings=night_wakings.astype(np.int16),
+        seed=seed,
+    )
+
+
+def levels_for(history: SyntheticHistory, i: int, night_start: str = '19:30:00') -> List[Dict[str, Any]]:
+    """
+    Build ``levels`` segments for one night
+
+    Night sleep is split into nightWakings + 1 asleep segments separated by
+    short awake/soothing segments, with the longest stretch placed first.
+
+    Args:
+        history: Synthetic history
+        i: Row index
+        night_start: Local time the night begins
+
+    Returns:
+        List of segments with type, startTime and duration (seconds)
+    """
+    rng = np.random.default_rng((history.seed, i))
+    wakings = int(history.nightWakings[i])
+    night = int(history.nightSleep[i])
+    longest = min(int(history.longestSleep[i]), night)
+    if wakings:
+        rest = rng.dirichlet(np.ones(wakings)) * (night - longest)
+        asleep = [longest] + [int(seconds) for seconds in rest]
+    else:
+        asleep = [night]
+    day = EPOCH + timedelta(days=int(history.day[i]))
+    cursor = datetime.fromisoformat(f'{day.isoformat()}T{night_start}')
+    segments = []
+    for n, duration in enumerate(asleep):
+        segments.append({'type': 'asleep', 'startTime': cursor.isoformat(), 'duration': duration})
+        cursor += timedelta(seconds=duration)
+        if n < wakings:
+            awake = int(rng.integers(120, 1500))
+            segments.append({'type': 'soothing' if awake < 600 else 'awake',
+                             'startTime': cursor.isoformat(), 'duration': awake})
+            cursor += timedelta(seconds=awake)
+    return segments
+
+
+def iter_payloads(history: SyntheticHistory, levels: bool = False) -> Iterator[tuple]:
+    """
+    Yield (baby_id, date, payload) for every row
+
+    Args:
+        history: Synthetic history
+        levels: Whether to include ``levels`` segments in each payload
+
+    Yields:
+        Tuple of baby id, calendar date and sessions/daily payload
+    """
+    for i in range(len(history)):
+        payload = history.row(i)
+        if levels:
+            payload['levels'] = levels_for(history, i)
+        yield history.baby_ids[history.baby[i]], EPOCH + timedelta(days=int(history.day[i])), payload
+
+
+def replay_factory(history: SyntheticHistory, levels: bool = False) -> Callable[[str, str, str], Dict[str, Any]]:
+    """
+    Build a FakeSnooServer payload factory that serves the history
+
+    Each baby's days are served in order; a baby wraps around once its days
+    are exhausted. Unknown baby ids get baby 0's data.
+
+    Args:
+        history: Synthetic history
+        levels: Whether to include ``levels`` segments
+
+    Returns:
+        Callable(baby_id, start_time, end_time) -> payload
+    """
+    index = {baby_id: n for n, baby_id in enumerate(history.baby_ids)}
+    cursors = np.zeros(len(history.baby_ids), dtype=np.int64)
+    lock = threading.Lock()
+
+    def factory(baby_id: str, start_time: str, end_time: str) -> Dict[str, Any]:
+        n = index.get(baby_id, 0)
+        with lock:
+            offset = int(cursors[n]) % history.n_days
+            cursors[n] += 1
+        i = history.index_of(n, offset)
+        payload = history.row(i)
+        if levels:
+            payload['levels'] = levels_for(history, i)
+        return payload
+
+    return factory
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Generate synthetic Snoo sleep history')
+    parser.add_argument('--babies', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    history = generate_history(args.babies, args.days, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{len(history):,} baby-days in {elapsed:.2f}s ({len(history) / elapsed:,.0f}/s)")
+    print(f"mean night sleep {history.nightSleep.mean() / 3600:.2f}h, "
+          f"mean wakings {history.nightWakings.mean():.2f}, mean naps {history.naps.mean():.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
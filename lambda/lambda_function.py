@@ -5,7 +5,13 @@ import os
 # Add the src directory to the Python path for Lambda
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from zzzgrams.services.history_api import HistoryApi
 from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+from zzzgrams.utils import metrics, profiling
+
+
+# Reused across warm invocations so the history mapping and body cache survive
+_history_api = None
 
 
 def lambda_handler(event, context):
@@ -19,41 +25,70 @@ def lambda_handler(event, context):
     Returns:
         dict: Response object with status code and body
     """
+    # Metrics are buffered for the whole invocation and flushed once as EMF
+    with metrics.metrics_scope(dimensions={'Service': 'zzzgrams'}) as m:
+        request_id = getattr(context, 'aws_request_id', None)
+        if m and request_id:
+            m.set_property('requestId', request_id)
+        # Opt-in cProfile/tracemalloc run, see ZZZGRAMS_PROFILE
+        with profiling.maybe_profile(event):
+            response = _handle(event, context)
+        metrics.count('Invocations')
+        if response['statusCode'] >= 500:
+            metrics.count('Errors')
+    return response
+
+
+def _handle(event, context):
     try:
+        # Read-only routes are served from local stores without calling Snoo or Bedrock
+        if HistoryApi.matches(event):
+            return _get_history_api().handle(event)
+
+        # Cron ticks from EventBridge run the families due in this time bucket
+        if event.get('source') == 'aws.events' and os.getenv('ZZZGRAMS_SCHEDULE_FILE'):
+            return _handle_schedule(event)
+
         # Initialize the sleep analyzer service
         analyzer_service = SleepAnalyzerService()
         
         # Analyze sleep data (default 20 hours back)
         result = analyzer_service.analyze_sleep_data()
         
-        if result['success']:
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps(result)
-            }
-        else:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps(result)
-            }
+        return _response(200 if result['success'] else 500, result)
             
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': str(e),
-                'success': False
-            })
-        } 
\ No newline at end of file
+        return _response(500, {
+            'error': str(e),
+            'success': False
+        })
+
+
+def _get_history_api():
+    global _history_api
+    if _history_api is None:
+        _history_api = HistoryApi.from_env()
+    return _history_api
+
+
+def _handle_schedule(event):
+    from datetime import datetime, timezone
+    from zzzgrams.services import scheduler
+
+    tick = event.get('time')
+    now = datetime.fromisoformat(tick.replace('Z', '+00:00')) if tick else datetime.now(timezone.utc)
+    bucket_minutes = int(os.getenv('ZZZGRAMS_BUCKET_MINUTES', scheduler.DEFAULT_BUCKET_MINUTES))
+    outcome = scheduler.run_due(now, bucket_minutes=bucket_minutes)
+    success = all(result.get('success') for result in outcome['results'].values())
+    return _response(200 if success else 500, dict(outcome, success=success))
+
+
+def _response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(body)
+    }
@@ -1,3 +1,5 @@
+import argparse
+import importlib.util
 import json
 import sys
 import os
@@ -5,9 +7,13 @@ import os
 # Add the src directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-# Import the lambda function
+# Import the lambda function ("lambda" is a keyword, so load it by path)
 try:
-    from lambda.lambda_function import lambda_handler
+    _spec = importlib.util.spec_from_file_location(
+        'lambda_function', os.path.join(os.path.dirname(__file__), '..', 'lambda', 'lambda_function.py'))
+    _module = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_module)
+    lambda_handler = _module.lambda_handler
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure you're running this from the project root directory")
@@ -18,7 +24,7 @@ class MockContext:
     def get_remaining_time_in_millis(self):
         return 30000  # 30 seconds
 
-def test_lambda_function():
+def test_lambda_function(profile=None):
     """Test the lambda function locally"""
     
     # Sample event data (you can modify this based on your needs)
@@ -29,6 +35,9 @@ def test_lambda_function():
         "queryStringParameters": None,
         "body": None
     }
+    if profile:
+        # e.g. "cpu", "mem" or "cpu,mem"; see zzzgrams.utils.profiling
+        test_event["profile"] = profile
     
     # Create mock context
     context = MockContext()
@@ -51,4 +60,7 @@ def test_lambda_function():
         print(f"❌ Error testing lambda function: {e}")
 
 if __name__ == "__main__":
-    test_lambda_function() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Lambda handler locally")
+    parser.add_argument("--profile", help="profile the run: cpu, mem or cpu,mem")
+    args = parser.parse_args()
+    test_lambda_function(profile=args.profile) 
\ No newline at end of file
@@ -2,7 +2,35 @@
 Zzzgrams - Sleep quips from a newborn baby
 
 A Python package for analyzing baby sleep data and generating insights.
+
+Public names are exported lazily, so ``import zzzgrams`` stays cheap and
+only the modules that are actually used get loaded.
 """
 
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
 __version__ = "1.0.0"
-__author__ = "Zzzgrams Team" 
\ No newline at end of file
+__author__ = "Zzzgrams Team"
+
+if TYPE_CHECKING:
+    from .clients.snoo_client import SnooClient
+    from .clients.bedrock_client import BedrockClient
+    from .clients.sns_client import SNSClient
+    from .models.sleep_data import SleepData
+    from .services.sleep_analyzer_service import SleepAnalyzerService
+    from .utils.text_cleaner import clean_text_for_json
+
+_EXPORTS = {
+    'SnooClient': '.clients.snoo_client',
+    'BedrockClient': '.clients.bedrock_client',
+    'SNSClient': '.clients.sns_client',
+    'SleepData': '.models.sleep_data',
+    'SleepAnalyzerService': '.services.sleep_analyzer_service',
+    'clean_text_for_json': '.utils.text_cleaner',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,36 @@
+"""
+Helpers for exporting package attributes lazily.
+
+Importing a package should not pay for heavy third-party imports (boto3,
+botocore, requests, pytz) until one of its exported names is actually used.
+"""
+
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    Build module-level ``__getattr__`` and ``__dir__`` functions for a package
+
+    Args:
+        package: The ``__name__`` of the package doing the exporting
+        exports: Mapping of exported name to the relative module defining it
+
+    Returns:
+        Tuple of (__getattr__, __dir__) to assign in the package namespace
+    """
+    def __getattr__(name: str) -> object:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        module = importlib.import_module(module_name, package)
+        value = getattr(module, name)
+        # Cache on the package so later lookups skip __getattr__ entirely
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
@@ -2,8 +2,29 @@
 Client modules for external service interactions.
 """
 
-from .snoo_client import SnooClient
-from .bedrock_client import BedrockClient
-from .sns_client import SNSClient
+from typing import TYPE_CHECKING
 
-__all__ = ['SnooClient', 'BedrockClient', 'SNSClient'] 
\ No newline at end of file
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .snoo_client import SnooClient
+    from .bedrock_client import BedrockClient
+    from .sns_client import SNSClient
+    from .secrets_client import (
+        SecretCache, SecretProvider, FileSecretProvider, SecretsManagerProvider, MissingSecretError
+    )
+
+_EXPORTS = {
+    'SnooClient': '.snoo_client',
+    'BedrockClient': '.bedrock_client',
+    'SNSClient': '.sns_client',
+    'SecretCache': '.secrets_client',
+    'SecretProvider': '.secrets_client',
+    'FileSecretProvider': '.secrets_client',
+    'SecretsManagerProvider': '.secrets_client',
+    'MissingSecretError': '.secrets_client',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
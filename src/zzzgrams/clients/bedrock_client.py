@@ -1,59 +1,173 @@
 import json
 import boto3
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from ..utils import metrics, tracing
+from ..utils.trend_text import describe_trends
+
+# One family's (sleep_data, trends) in a packed request
+FamilyInput = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+
+_PACKED_HEADER = re.compile(r'^[ \t]*=+[ \t]*FAMILY[ \t]+(\d+)[ \t]*=+[ \t]*$', re.MULTILINE | re.IGNORECASE)
 
 
 class BedrockClient:
     """Client for interacting with AWS Bedrock models"""
+
+    # Output budget for one family's message
+    MESSAGE_TOKENS = 200
+    # Titan Text Premier's output limit, which bounds how many families fit in one call
+    MAX_OUTPUT_TOKENS = 3072
+    # Allowance per family for its section header in a packed response
+    PACK_HEADER_TOKENS = 10
     
     def __init__(self, region_name: str = 'us-east-1'):
         self.bedrock = boto3.client('bedrock-runtime', region_name=region_name)
         self.model_id = "amazon.titan-text-premier-v1:0"
+        # Families per packed call; shrinks if the model runs out of output tokens
+        self.pack_size = max(1, self.MAX_OUTPUT_TOKENS // (self.MESSAGE_TOKENS + self.PACK_HEADER_TOKENS))
     
-    def generate_sleep_insights(self, sleep_data: Dict[str, Any]) -> str:
+    def generate_sleep_insights(self, sleep_data: Dict[str, Any], trends: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate AI insights for sleep data using Bedrock
         
         Args:
             sleep_data: Dictionary containing sleep data
+            trends: Optional rolling trend summary for the baby
             
         Returns:
             str: Generated response from Bedrock
         """
-        prompt = self._create_sleep_prompt(sleep_data)
-        
+        prompt = self._create_sleep_prompt(sleep_data, trends)
+        try:
+            return self._invoke(prompt, self.MESSAGE_TOKENS)['outputText']
+        except Exception as e:
+            return f"Error calling Bedrock: {str(e)}"
+
+    def generate_packed_insights(self, families: Sequence[FamilyInput]) -> List[str]:
+        """
+        Generate messages for many families with one call per pack_size families
+
+        The shared instructions are sent once per call and each family gets a
+        numbered data block. Families missing from a packed response, or
+        cut off by the output limit, are re-run on their own with
+        generate_sleep_insights.
+
+        Args:
+            families: (sleep_data, trends) per family
+
+        Returns:
+            List of messages in the same order as families
+        """
+        messages: List[Optional[str]] = [None] * len(families)
+        misses = 0
+        start = 0
+        while start < len(families):
+            group = list(range(start, min(start + self.pack_size, len(families))))
+            start = group[-1] + 1
+            if len(group) == 1:
+                continue
+            prompt = self._create_packed_prompt([families[i] for i in group])
+            max_tokens = min(self.MAX_OUTPUT_TOKENS, len(group) * (self.MESSAGE_TOKENS + self.PACK_HEADER_TOKENS))
+            try:
+                result = self._invoke(prompt, max_tokens)
+            except Exception as e:
+                print(f"Error calling Bedrock for {len(group)} packed families: {str(e)}")
+                misses += len(group)
+                continue
+            parsed = self._parse_packed_response(result['outputText'], len(group))
+            truncated = result.get('completionReason') == 'LENGTH'
+            if truncated and parsed:
+                # The last section was cut off mid-message, so re-run that family too
+                del parsed[max(parsed)]
+            for number, i in enumerate(group, start=1):
+                messages[i] = parsed.get(number)
+            metrics.count('BedrockPackedCalls')
+            metrics.count('BedrockPackedFamilies', len(parsed))
+            misses += len(group) - len(parsed)
+            if truncated:
+                # Ran out of output tokens: only pack as many complete messages as fit
+                self.pack_size = max(1, len(parsed))
+
+        if misses:
+            metrics.count('BedrockPackedMisses', misses)
+        for i, message in enumerate(messages):
+            if message is None:
+                messages[i] = self.generate_sleep_insights(*families[i])
+        return messages
+
+    def _invoke(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        """
+        Call the model once
+
+        Returns:
+            The first result, with outputText and completionReason
+
+        Raises:
+            Exception: Whatever invoke_model raised, after counting it
+        """
         request_body = {
             "inputText": prompt,
             "textGenerationConfig": {
-                "maxTokenCount": 200,
+                "maxTokenCount": max_tokens,
                 "stopSequences": [],
                 "temperature": 0.7,
                 "topP": 0.9
             }
         }
         
-        try:
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
-            
-            response_body = json.loads(response['body'].read())
-            raw_response = response_body['results'][0]['outputText']
-            
-            return raw_response
-            
-        except Exception as e:
-            return f"Error calling Bedrock: {str(e)}"
+        m = metrics.current()
+        with tracing.span('bedrock.invoke') as sp:
+            try:
+                response = self.bedrock.invoke_model(
+                    modelId=self.model_id,
+                    body=json.dumps(request_body)
+                )
+
+                response_body = json.loads(response['body'].read())
+                result = response_body['results'][0]
+                if sp or m:
+                    self._record_invoke(sp, m, prompt, response, response_body)
+
+                return result
+
+            except Exception as e:
+                if sp:
+                    sp.set(model_id=self.model_id, error=str(e))
+                m.count('BedrockErrors')
+                if metrics.is_throttle(e):
+                    m.count('BedrockThrottles')
+                raise
+
+    def _record_invoke(self, sp, m, prompt: str, response: Dict[str, Any], response_body: Dict[str, Any]) -> None:
+        """Attach request/response attributes to the invoke span and metrics"""
+        metadata = response.get('ResponseMetadata', {})
+        result = response_body['results'][0]
+        retries = metadata.get('RetryAttempts', 0)
+        input_tokens = response_body.get('inputTextTokenCount') or 0
+        output_tokens = result.get('tokenCount') or 0
+        sp.set(
+            model_id=self.model_id,
+            prompt_chars=len(prompt),
+            status=metadata.get('HTTPStatusCode'),
+            retries=retries,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+        m.count('BedrockInvocations')
+        m.count('BedrockRetries', retries)
+        m.count('BedrockInputTokens', input_tokens)
+        m.count('BedrockOutputTokens', output_tokens)
     
     
-    def _create_sleep_prompt(self, sleep_data: Dict[str, Any]) -> str:
+    def _create_sleep_prompt(self, sleep_data: Dict[str, Any], trends: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a prompt for sleep data analysis
         
         Args:
             sleep_data: Dictionary containing sleep data
+            trends: Optional rolling trend summary for the baby
             
         Returns:
             str: Formatted prompt for Bedrock
@@ -62,15 +176,75 @@ class BedrockClient:
         Based on the following baby sleep data, provide a fun, friendly message for the parent:
         
         Sleep Data:
-        - Night sleep: {sleep_data.get('nightSleep', 0)} minutes
-        - Night wakings: {sleep_data.get('nightWakings', 0)}
-        
+{self._data_block(sleep_data, trends)}
         Please provide:
-        1. A fun, friendly message for the parent. It consider the data to determine how well and how much the baby slept, especially overnight, and how tired the parent may be because they may have been up all night. Ideally the baby should be sleeping several (6+) hours a night without too many wake ups. 
+{_INSTRUCTIONS}"""
+
+    def _create_packed_prompt(self, families: Sequence[FamilyInput]) -> str:
+        """
+        Create one prompt covering several families
+
+        Args:
+            families: (sleep_data, trends) per family
+
+        Returns:
+            str: Prompt with the instructions once and a numbered block per family
+        """
+        blocks = ''.join(f"        === FAMILY {number} ===\n{self._data_block(sleep_data, trends)}\n"
+                         for number, (sleep_data, trends) in enumerate(families, start=1))
+        return f"""
+        Below is baby sleep data for {len(families)} different families. For each family, provide a fun, friendly message for the parent based only on that family's data:
+
+{blocks}
+        For each family's message:
+{_INSTRUCTIONS}
+        Reply with one section per family, in order. Start each section with its header line exactly as written above (for example "=== FAMILY 1 ===") followed by that family's message. Do not write anything else.
+        """
+
+    @staticmethod
+    def _data_block(sleep_data: Dict[str, Any], trends: Optional[Dict[str, Any]] = None) -> str:
+        trend_lines = describe_trends(trends)
+        trend_block = ''
+        if trend_lines:
+            trend_block = '\n        Recent Trends:\n' + ''.join(f'        - {line}\n' for line in trend_lines)
+        return (f"        - Night sleep: {sleep_data.get('nightSleep', 0)} minutes\n"
+                f"        - Night wakings: {sleep_data.get('nightWakings', 0)}\n"
+                f"        {trend_block}")
+
+    @staticmethod
+    def _parse_packed_response(text: str, count: int) -> Dict[int, str]:
+        """
+        Split a packed response into per-family messages
+
+        Args:
+            text: Model output
+            count: Families in the prompt
+
+        Returns:
+            Dict of family number (from 1) to message. Families with no section,
+            an empty section or a repeated header are left out
+        """
+        headers = list(_PACKED_HEADER.finditer(text))
+        messages: Dict[int, str] = {}
+        seen = set()
+        for header, following in zip(headers, headers[1:] + [None]):
+            number = int(header.group(1))
+            end = following.start() if following is not None else len(text)
+            message = text[header.end():end].strip()
+            if number in seen:
+                # Two answers for one family: trust neither
+                messages.pop(number, None)
+            elif 1 <= number <= count and message:
+                messages[number] = message
+            seen.add(number)
+        return messages
+
+
+_INSTRUCTIONS = """        1. A fun, friendly message for the parent. It consider the data to determine how well and how much the baby slept, especially overnight, and how tired the parent may be because they may have been up all night. Ideally the baby should be sleeping several (6+) hours a night without too many wake ups. 
         2. It should be a short message, just a few lines. It could be a poem, if appropriate. The output should not have any code in it, only human readable text. It should be encouraging and not expressing any concern.
         3. Keep the tone fun and light hearted. It can even be sarcastic ant witty. 
         
         Keep the response concise and parent-friendly.
 
         An example output if the baby did not sleep many hours at night and had a lot of night wakings could be something like "Wow! that looks like a sleepless night. Hope you can drink lots of coffee today and get some rest" 
-        """ 
\ No newline at end of file
+        """
@@ -0,0 +1,258 @@
+"""
+Per-family secrets with an in-process TTL cache.
+
+Each family's secret is a JSON object keyed by baby id, e.g.
+``{"username": ..., "password": ..., "topic_arn": ...}``. Providers fetch
+many secrets in one batch so a fleet shard can be warmed up front. The
+cache serves hits from memory and refreshes entries in the background
+shortly before they expire, so a family's run never waits on the secret
+store in the steady state.
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils import metrics
+
+Secret = Dict[str, Any]
+
+
+class MissingSecretError(LookupError):
+    """A provider is configured but has no usable secret for a family"""
+
+
+class SecretProvider(ABC):
+    """Source of family secrets"""
+
+    @abstractmethod
+    def fetch(self, keys: List[str]) -> Dict[str, Secret]:
+        """
+        Fetch several secrets at once
+
+        Args:
+            keys: Baby ids to fetch
+
+        Returns:
+            Dict of key to secret; missing keys are left out
+        """
+
+
+class FileSecretProvider(SecretProvider):
+    """Local stand-in reading a JSON file of {baby id: secret}"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self, keys: List[str]) -> Dict[str, Secret]:
+        # Re-read every time so edits show up on the next refresh
+        with open(self.path) as f:
+            secrets = json.load(f)
+        return {key: secrets[key] for key in keys if key in secrets}
+
+
+class SecretsManagerProvider(SecretProvider):
+    """AWS Secrets Manager, one secret per family named ``<prefix><baby id>``"""
+
+    # BatchGetSecretValue accepts at most 20 ids per call
+    BATCH_SIZE = 20
+
+    def __init__(self, prefix: str = 'zzzgrams/', region_name: str = 'us-east-1', client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('secretsmanager', region_name=region_name)
+        self.client = client
+        self.prefix = prefix
+
+    def fetch(self, keys: List[str]) -> Dict[str, Secret]:
+        secrets: Dict[str, Secret] = {}
+        for i in range(0, len(keys), self.BATCH_SIZE):
+            names = [f'{self.prefix}{key}' for key in keys[i:i + self.BATCH_SIZE]]
+            response = self.client.batch_get_secret_value(SecretIdList=names)
+            for value in response.get('SecretValues', []):
+                secrets[value['Name'][len(self.prefix):]] = json.loads(value['SecretString'])
+            for error in response.get('Errors', []):
+                print(f"Error fetching secret {error.get('SecretId')}: {error.get('Message')}")
+        return secrets
+
+
+class SecretCache:
+    """TTL cache in front of a SecretProvider with refresh-ahead"""
+
+    def __init__(self, provider: SecretProvider, ttl: float = 300.0, refresh_ahead: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        # Entries this close to expiry are refreshed in the background on access
+        self.refresh_ahead = refresh_ahead
+        self.clock = clock
+        self._entries: Dict[str, Tuple[Secret, float]] = {}
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+
+    def get(self, key: str) -> Optional[Secret]:
+        """
+        Return a family's secret
+
+        Args:
+            key: Baby id
+
+        Returns:
+            The secret, or None if the provider has none for this key
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and now < entry[1]:
+            metrics.count('SecretCacheHits')
+            if entry[1] - now <= self.refresh_ahead:
+                self._refresh_async(key)
+            return entry[0]
+        metrics.count('SecretCacheMisses')
+        return self.prefetch([key]).get(key)
+
+    def require(self, key: Optional[str], field: str) -> Any:
+        """
+        Return one field of a family's secret, with no fallback
+
+        Args:
+            key: Baby id
+            field: Secret field, e.g. 'topic_arn'
+
+        Raises:
+            MissingSecretError: No baby id, no secret, or the field is empty
+        """
+        if not key:
+            raise MissingSecretError(f"A baby id is required to look up '{field}'")
+        value = (self.get(key) or {}).get(field)
+        if not value:
+            raise MissingSecretError(f"Secret for baby {key} has no '{field}'")
+        return value
+
+    def prefetch(self, keys: Iterable[str]) -> Dict[str, Secret]:
+        """
+        Load several secrets in one provider call, e.g. for a scheduler bucket
+
+        Keys that are already fresh are not fetched again.
+
+        Returns:
+            Dict of key to secret for every key the provider knows
+        """
+        keys = list(dict.fromkeys(keys))
+        now = self.clock()
+        with self._lock:
+            fresh = {key: self._entries[key][0] for key in keys
+                     if key in self._entries and now < self._entries[key][1] - self.refresh_ahead}
+        missing = [key for key in keys if key not in fresh]
+        if missing:
+            fresh.update(self._load(missing))
+        return fresh
+
+    def refresh_due(self) -> int:
+        """
+        Refresh every entry within refresh_ahead of expiry in one batch
+
+        Returns:
+            int: Number of entries refreshed
+        """
+        now = self.clock()
+        with self._lock:
+            due = [key for key, (_, expires) in self._entries.items() if expires - now <= self.refresh_ahead]
+        if due:
+            self._load(due)
+        return len(due)
+
+    def start_refresher(self, interval: float = 30.0) -> threading.Thread:
+        """Refresh due entries from a daemon thread every interval seconds"""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh_due()
+                except Exception as e:
+                    print(f"Error refreshing secrets: {str(e)}")
+
+        thread = threading.Thread(target=loop, name='secret-refresher', daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _load(self, keys: List[str]) -> Dict[str, Secret]:
+        started = time.perf_counter()
+        try:
+            secrets = self.provider.fetch(keys)
+        except Exception:
+            metrics.count('SecretFetchErrors')
+            # Keep serving values that have not expired yet
+            now = self.clock()
+            with self._lock:
+                stale = {key: self._entries[key][0] for key in keys
+                         if key in self._entries and now < self._entries[key][1]}
+            if len(stale) < len(keys):
+                raise
+            return stale
+        metrics.observe('SecretFetchLatency', (time.perf_counter() - started) * 1000)
+        expires = self.clock() + self.ttl
+        with self._lock:
+            for key, secret in secrets.items():
+                self._entries[key] = (secret, expires)
+        return secrets
+
+    def _refresh_async(self, key: str) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='secret-refresh')
+
+        def refresh():
+            try:
+                self._load([key])
+            except Exception as e:
+                print(f"Error refreshing secret {key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+
+_shared_cache: Optional[SecretCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> Optional[SecretCache]:
+    """
+    Process-wide cache configured from the environment
+
+    ZZZGRAMS_SECRETS_FILE selects the file stand-in, ZZZGRAMS_SECRETS_PREFIX
+    selects Secrets Manager, and ZZZGRAMS_SECRETS_TTL sets the TTL in seconds.
+
+    Returns:
+        The shared SecretCache, or None when no provider is configured
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            path = os.getenv('ZZZGRAMS_SECRETS_FILE')
+            prefix = os.getenv('ZZZGRAMS_SECRETS_PREFIX')
+            if path:
+                provider: SecretProvider = FileSecretProvider(path)
+            elif prefix:
+                provider = SecretsManagerProvider(prefix, region_name=os.getenv('AWS_REGION', 'us-east-1'))
+            else:
+                return None
+            ttl = float(os.getenv('ZZZGRAMS_SECRETS_TTL', '300'))
+            _shared_cache = SecretCache(provider, ttl=ttl, refresh_ahead=min(60.0, ttl / 5))
+        return _shared_cache
@@ -5,19 +5,47 @@ from datetime import datetime as dt
 import os
 from typing import Optional, Any
 from ..models.sleep_data import SleepData
+from ..storage.payload_archive import PayloadArchive
+from ..utils import metrics, tracing
+from ..utils.resilience import Guard
+from .secrets_client import shared_cache
+
+# Used when neither the caller nor SNOO_TIMEZONE names the family's timezone
+DEFAULT_TIMEZONE = 'America/New_York'
 
 
 class SnooClient:
     """Client for interacting with Snoo baby sleep tracking API"""
     
-    def __init__(self, email=None, password=None, baby_id=None):
-        self.EMAIL = email or os.getenv('SNOO_USERNAME')
-        self.PASSWORD = password or os.getenv('SNOO_PASSWORD')
+    def __init__(self, email=None, password=None, baby_id=None, session=None, timezone=None, guard=None,
+                 secrets=None, archive=None):
         self.BABY_ID = baby_id or os.getenv('BABY_ID')
+        # Per-family credentials come from the secret cache when one is configured.
+        # The shared SNOO_USERNAME/SNOO_PASSWORD account is only used without one,
+        # so a family with a missing secret fails instead of using another account
+        secret_cache = secrets if secrets is not None else shared_cache()
+        if secret_cache is not None and not (email and password):
+            self.EMAIL = email or secret_cache.require(self.BABY_ID, 'username')
+            self.PASSWORD = password or secret_cache.require(self.BABY_ID, 'password')
+        else:
+            self.EMAIL = email or os.getenv('SNOO_USERNAME')
+            self.PASSWORD = password or os.getenv('SNOO_PASSWORD')
+        # IANA name, e.g. 'America/Los_Angeles'; sessions are bucketed into days in this zone
+        self.TIMEZONE = timezone or os.getenv('SNOO_TIMEZONE') or DEFAULT_TIMEZONE
+        # Anything with requests' post/get interface, e.g. a requests.Session
+        # with a recording or replaying transport adapter mounted
+        self.http = session if session is not None else requests
+        # Every request has a timeout so a hung upstream can't hold a worker
+        self.timeout = 5
+        # Host-wide rate limiter and circuit breaker, enabled by ZZZGRAMS_GUARD_DB
+        self.guard = guard if guard is not None else Guard.from_env('snoo', metric_prefix='Snoo')
+        # Raw sessions payloads are kept for audit and re-parsing when an archive is configured
+        self.archive = archive if archive is not None else PayloadArchive.from_env()
 
         self.aws_auth_url = 'https://cognito-idp.us-east-1.amazonaws.com/'
-        self.snoo_auth_url = 'https://api-us-east-1-prod.happiestbaby.com/us/me/v10/pubnub/authorize'
-        self.snoo_devices_url = 'https://api-us-east-1-prod.happiestbaby.com/hds/me/v11/devices'
+        self.snoo_api_url = 'https://api-us-east-1-prod.happiestbaby.com'
+        self.snoo_auth_url = f'{self.snoo_api_url}/us/me/v10/pubnub/authorize'
+        self.snoo_devices_url = f'{self.snoo_api_url}/hds/me/v11/devices'
         self.snoo_data_url = 'https://happiestbaby.pubnubapi.com'
         self.snoo_data_endpoint = 'v2/subscribe/sub-c-97bade2a-483d-11e6-8b3b-02ee2ddab7fe'
         self.aws_auth_hdr = {
@@ -57,7 +85,7 @@ class SnooClient:
             "os": "Android",
             "osVersion": "14",
             "platform": "Android",
-            "timeZone": "America/New_York",
+            "timeZone": self.TIMEZONE,
             "userCountry": "US",
             "vendorId": "eyqurgwYQSqmnExnzyiLO5"
         }
@@ -71,18 +99,53 @@ class SnooClient:
         return hdrs
 
     def _generate_snoo_sleep_url(self, babyId, startTime, endTime):
-        url = f'https://api-us-east-1-prod.happiestbaby.com/ss/me/v10/babies/{babyId}/sessions/daily?startTime={startTime}&endTime={endTime}&timezone=America/New_York&levels=false'
+        timezone = urllib.parse.quote(self.TIMEZONE, safe='/')
+        url = f'{self.snoo_api_url}/ss/me/v10/babies/{babyId}/sessions/daily?startTime={startTime}&endTime={endTime}&timezone={timezone}&levels=false'
         return url
 
+    def _send(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.guard is None:
+            return method(url, **kwargs)
+        return self.guard.call(method, url, **kwargs)
+
+    def _record_response(self, sp, r):
+        sp.set(status=r.status_code, bytes=len(r.content))
+
+    def _count_response(self, m, r):
+        m.count('SnooRequests')
+        if r.status_code >= 400:
+            m.count('SnooHttpErrors')
+
+    def _archive_response(self, end_time, r):
+        try:
+            self.archive.put(self.BABY_ID, end_time[:10], r.content)
+        except Exception as e:
+            # The archive is best effort; tonight's analysis doesn't depend on it
+            metrics.count('ArchiveErrors')
+            print(f"Error archiving Snoo payload: {str(e)}")
+
     def _auth_amazon(self):
-        r = requests.post(self.aws_auth_url, data=json.dumps(self.aws_auth_data), headers=self.aws_auth_hdr)
+        m = metrics.current()
+        with tracing.span('snoo.cognito_auth') as sp, m.timer('SnooCognitoLatency'):
+            r = self._send(self.http.post, self.aws_auth_url, data=json.dumps(self.aws_auth_data), headers=self.aws_auth_hdr)
+            if sp:
+                self._record_response(sp, r)
+            if m:
+                self._count_response(m, r)
         resp = r.json()
         result = resp['AuthenticationResult']
         return result
 
     def _auth_snoo(self, id_token):
         hdrs = self._generate_snoo_auth_headers(id_token)
-        r = requests.post(self.snoo_auth_url, data=json.dumps(self.snoo_auth_data), headers=hdrs)
+        m = metrics.current()
+        with tracing.span('snoo.authorize') as sp, m.timer('SnooAuthorizeLatency'):
+            r = self._send(self.http.post, self.snoo_auth_url, data=json.dumps(self.snoo_auth_data), headers=hdrs)
+            if sp:
+                self._record_response(sp, r)
+            if m:
+                self._count_response(m, r)
         return r
 
     def _authorize(self):
@@ -105,13 +168,27 @@ class SnooClient:
             
         Returns:
             SleepData object or dict depending on as_object parameter
+
+        Raises:
+            requests.HTTPError: When as_object is set and the sessions request failed
         """
         auth = self._authorize()
         id_token = auth['aws']['id']
         hdrs = self._generate_snoo_auth_headers(id_token)
         url = self._generate_snoo_sleep_url(self.BABY_ID, start_time, end_time)
-        r = requests.get(url, headers=hdrs, timeout=5)
+        m = metrics.current()
+        with tracing.span('snoo.sessions') as sp, m.timer('SnooSessionsLatency'):
+            r = self._send(self.http.get, url, headers=hdrs)
+            if sp:
+                self._record_response(sp, r)
+            if m:
+                self._count_response(m, r)
+        if as_object and r.status_code >= 400:
+            # An error body parses into a night of zeros, which would poison trends and history
+            raise requests.HTTPError(f"Snoo sessions request failed with status {r.status_code}", response=r)
         data = r.json()
+        if self.archive is not None and r.status_code < 400:
+            self._archive_response(end_time, r)
         if as_object:
             return SleepData.from_dict(data)
         return data 
\ No newline at end of file
@@ -2,7 +2,10 @@ import json
 import boto3
 import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from ..utils import metrics, tracing
+from ..utils.trend_text import describe_trends
 
 
 class SNSClient:
@@ -12,43 +15,70 @@ class SNSClient:
         self.sns = boto3.client('sns', region_name=region_name)
         self.topic_arn = os.getenv('SNS_TOPIC_ARN', 'arn:aws:sns:us-west-2:123456789012:SleepAnalyzerTopic')
     
-    def publish_sleep_analysis(self, ai_insights: str, sleep_data: Dict[str, Any]) -> bool:
+    def publish_sleep_analysis(self, ai_insights: str, sleep_data: Dict[str, Any],
+                               trends: Optional[Dict[str, Any]] = None, topic_arn: Optional[str] = None) -> bool:
         """
         Publish sleep analysis to SNS topic
         
         Args:
             ai_insights: The AI-generated insights
             sleep_data: The sleep data dictionary
+            trends: Optional rolling trend summary for the baby
+            topic_arn: Family-specific topic, defaults to the client's topic
             
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            message = self._create_sns_message(ai_insights, sleep_data)
-            
-            response = self.sns.publish(
-                TopicArn=self.topic_arn,
-                Message=message,
-                Subject='Snoozgram Report'
-            )
-            
-            print(f"Message published to SNS: {response['MessageId']}")
-            return True
-            
-        except Exception as e:
-            print(f"Error publishing to SNS: {str(e)}")
-            return False
+        with tracing.span('sns.publish') as sp:
+            try:
+                message = self._create_sns_message(ai_insights, sleep_data, trends)
+
+                response = self.sns.publish(
+                    TopicArn=topic_arn or self.topic_arn,
+                    Message=message,
+                    Subject='Snoozgram Report'
+                )
+                m = metrics.current()
+                if sp or m:
+                    metadata = response.get('ResponseMetadata', {})
+                    retries = metadata.get('RetryAttempts', 0)
+                    sp.set(
+                        bytes=len(message.encode('utf-8')),
+                        status=metadata.get('HTTPStatusCode'),
+                        retries=retries,
+                    )
+                    m.count('SNSPublished')
+                    m.count('SNSRetries', retries)
+
+                print(f"Message published to SNS: {response['MessageId']}")
+                return True
+
+            except Exception as e:
+                if sp:
+                    sp.set(error=str(e))
+                metrics.count('SNSFailures')
+                if metrics.is_throttle(e):
+                    metrics.count('SNSThrottles')
+                print(f"Error publishing to SNS: {str(e)}")
+                return False
     
-    def _create_sns_message(self, ai_insights: str, sleep_data: Dict[str, Any]) -> str:
+    def _create_sns_message(self, ai_insights: str, sleep_data: Dict[str, Any],
+                            trends: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a formatted message for SNS
         
         Args:
             ai_insights: The AI-generated insights
+            trends: Optional rolling trend summary, added as a Trends section
             
         Returns:
             str: Formatted message for SNS
         """
+        trend_lines = describe_trends(trends)
+        trend_section = ''
+        if trend_lines:
+            trend_section = 'Trends:\n' + ''.join(f'        • {line}\n' for line in trend_lines) + '\n        '
+
         # Format sleep data for readability
         sleep_summary = f"""
         Sleep Data Summary:
@@ -59,7 +89,7 @@ class SNSClient:
         • Night sleep: {sleep_data.get('nightSleep', 0)} minutes
         • Night wakings: {sleep_data.get('nightWakings', 0)}
 
-        Snooz Insights:
+        {trend_section}Snooz Insights:
         {ai_insights}
                 """.strip()
         
@@ -2,6 +2,19 @@
 Data models for the application.
 """
 
-from .sleep_data import SleepData
+from typing import TYPE_CHECKING
 
-__all__ = ['SleepData'] 
\ No newline at end of file
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .sleep_data import SleepData
+    from .sleep_data_batch import SleepDataBatch
+
+_EXPORTS = {
+    'SleepData': '.sleep_data',
+    'SleepDataBatch': '.sleep_data_batch',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -5,6 +5,8 @@ from typing import Optional
 @dataclass
 class SleepData:
     """Data model for baby sleep information"""
+    __slots__ = ('naps', 'longestSleep', 'totalSleep', 'daySleep', 'nightSleep', 'nightWakings')
+
     naps: int
     longestSleep: float
     totalSleep: float
@@ -0,0 +1,211 @@
+"""
+Columnar batch of SleepData records backed by NumPy arrays.
+
+A SleepDataBatch holds one array per SleepData field, so months of history
+for thousands of babies cost a handful of arrays instead of one Python object
+per night. NumPy is optional for the Lambda itself and only required here.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from .sleep_data import SleepData
+
+FIELDS = ('naps', 'longestSleep', 'totalSleep', 'daySleep', 'nightSleep', 'nightWakings')
+COUNT_FIELDS = ('naps', 'nightWakings')
+MINUTE_FIELDS = ('longestSleep', 'totalSleep', 'daySleep', 'nightSleep')
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("SleepDataBatch requires numpy: pip install numpy")
+
+
+def seconds_to_minutes(seconds: 'np.ndarray') -> 'np.ndarray':
+    """
+    Vectorized equivalent of ``round(seconds / 60, 1)``
+
+    np.round and Python's round disagree on values that sit on a rounding
+    tie, so those few elements are re-rounded with Python's round to keep
+    results identical to SleepData.from_dict.
+
+    Args:
+        seconds: Durations in seconds
+
+    Returns:
+        Durations in minutes rounded to one decimal
+    """
+    minutes = np.asarray(seconds, dtype=np.float64) / 60
+    rounded = np.round(minutes, 1)
+    scaled = minutes * 10
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if ties.size:
+        rounded[ties] = [round(float(value), 1) for value in minutes[ties]]
+    return rounded
+
+
+class SleepDataRow:
+    """Zero-copy view of one row of a SleepDataBatch"""
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch: 'SleepDataBatch', index: int):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def naps(self) -> int:
+        return int(self._batch.naps[self._index])
+
+    @property
+    def longestSleep(self) -> float:
+        return float(self._batch.longestSleep[self._index])
+
+    @property
+    def totalSleep(self) -> float:
+        return float(self._batch.totalSleep[self._index])
+
+    @property
+    def daySleep(self) -> float:
+        return float(self._batch.daySleep[self._index])
+
+    @property
+    def nightSleep(self) -> float:
+        return float(self._batch.nightSleep[self._index])
+
+    @property
+    def nightWakings(self) -> int:
+        return int(self._batch.nightWakings[self._index])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the row as a dict, like ``asdict(sleep_data)``"""
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def to_sleep_data(self) -> SleepData:
+        """Materialize the row as a standalone SleepData"""
+        return SleepData(**self.to_dict())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (SleepData, SleepDataRow)):
+            return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{field}={getattr(self, field)!r}' for field in FIELDS)
+        return f'SleepDataRow({values})'
+
+
+class SleepDataBatch:
+    """Columnar collection of sleep records, one NumPy array per field"""
+
+    __slots__ = FIELDS
+
+    def __init__(self, naps: Sequence[int], longestSleep: Sequence[float], totalSleep: Sequence[float],
+                 daySleep: Sequence[float], nightSleep: Sequence[float], nightWakings: Sequence[int]):
+        """
+        Wrap existing columns; arrays of a numeric dtype are used without copying
+
+        Args:
+            naps, nightWakings: Integer counts
+            longestSleep, totalSleep, daySleep, nightSleep: Minutes
+        """
+        _require_numpy()
+        columns = {
+            'naps': naps, 'longestSleep': longestSleep, 'totalSleep': totalSleep,
+            'daySleep': daySleep, 'nightSleep': nightSleep, 'nightWakings': nightWakings,
+        }
+        length = None
+        for field, values in columns.items():
+            array = np.asarray(values)
+            if array.ndim != 1:
+                raise ValueError(f"{field} must be one-dimensional")
+            if length is not None and len(array) != length:
+                raise ValueError("All SleepDataBatch columns must have the same length")
+            length = len(array)
+            setattr(self, field, array)
+
+    @classmethod
+    def from_dicts(cls, payloads: Iterable[Dict[str, Any]]) -> 'SleepDataBatch':
+        """
+        Build a batch from many raw Snoo payloads in one vectorized pass
+
+        Equivalent to calling SleepData.from_dict on every payload: missing
+        keys default to 0 and durations are converted from seconds to minutes.
+
+        Args:
+            payloads: Raw sessions/daily dictionaries
+
+        Returns:
+            SleepDataBatch with one row per payload
+        """
+        _require_numpy()
+        payloads = payloads if isinstance(payloads, list) else list(payloads)
+        count = len(payloads)
+        columns = {}
+        for field in FIELDS:
+            raw = np.fromiter((payload.get(field, 0) for payload in payloads), dtype=np.float64, count=count)
+            if field in COUNT_FIELDS:
+                columns[field] = raw.astype(np.int32)
+            else:
+                columns[field] = seconds_to_minutes(raw)
+        return cls(**columns)
+
+    @classmethod
+    def from_sleep_data(cls, records: Iterable[SleepData]) -> 'SleepDataBatch':
+        """
+        Build a batch from already converted SleepData records
+
+        Args:
+            records: SleepData instances (or rows of another batch)
+
+        Returns:
+            SleepDataBatch with one row per record
+        """
+        _require_numpy()
+        records = records if isinstance(records, list) else list(records)
+        count = len(records)
+        columns = {}
+        for field in FIELDS:
+            dtype = np.int32 if field in COUNT_FIELDS else np.float64
+            columns[field] = np.fromiter((getattr(r, field) for r in records), dtype=dtype, count=count)
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.naps)
+
+    def __getitem__(self, key: Union[int, slice, 'np.ndarray']) -> Union[SleepDataRow, 'SleepDataBatch']:
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("SleepDataBatch index out of range")
+            return SleepDataRow(self, index)
+        # Slices are views; boolean or integer masks copy, as in NumPy
+        return SleepDataBatch(**{field: getattr(self, field)[key] for field in FIELDS})
+
+    def __iter__(self) -> Iterator[SleepDataRow]:
+        for index in range(len(self)):
+            yield SleepDataRow(self, index)
+
+    def column(self, field: str) -> 'np.ndarray':
+        """Return the array backing a field"""
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a dict"""
+        return [row.to_dict() for row in self]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns"""
+        return sum(getattr(self, field).nbytes for field in FIELDS)
+
+    def __repr__(self) -> str:
+        return f'SleepDataBatch(rows={len(self)})'
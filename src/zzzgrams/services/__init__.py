@@ -2,6 +2,26 @@
 Service modules for business logic.
 """
 
-from .sleep_analyzer_service import SleepAnalyzerService
+from typing import TYPE_CHECKING
 
-__all__ = ['SleepAnalyzerService'] 
\ No newline at end of file
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .scheduler import FamilySchedule, Scheduler
+    from .significance_gate import GatePolicy, SignificanceGate
+    from .sleep_analyzer_service import SleepAnalyzerService
+    from .trend_engine import BabyTrends, TrendStore
+
+_EXPORTS = {
+    'SleepAnalyzerService': '.sleep_analyzer_service',
+    'FamilySchedule': '.scheduler',
+    'Scheduler': '.scheduler',
+    'GatePolicy': '.significance_gate',
+    'SignificanceGate': '.significance_gate',
+    'BabyTrends': '.trend_engine',
+    'TrendStore': '.trend_engine',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
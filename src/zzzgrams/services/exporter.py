@@ -0,0 +1,352 @@
+"""
+Streaming bulk export of stored sleep data, trends and insights.
+
+Three datasets can be exported from ``ZZZGRAMS_STATE_DIR``:
+
+- ``sleep``: one row per baby-night from the history file each analysis
+  run appends to (see ``storage.history_writer``)
+- ``trends``: one row per baby with its current trend summary
+- ``insights``: one row per analysis run from the result store's insights log
+
+Rows are produced in column chunks of a fixed size and written as they are
+read, so memory stays flat however much history there is. CSV and
+newline-delimited JSON use the standard library; Parquet needs ``pyarrow``.
+
+Usage::
+
+    python -m zzzgrams.services.exporter sleep --format parquet --output sleep.parquet
+    python -m zzzgrams.services.exporter insights --from 2025-01-01 | gzip > insights.ndjson.gz
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..models.sleep_data_batch import COUNT_FIELDS, FIELDS
+from ..utils import metrics
+from .trend_engine import METRIC_KEYS, METRICS, WINDOWS, BabyTrends
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+DEFAULT_CHUNK_ROWS = 10000
+
+Chunk = Dict[str, List[Any]]
+Columns = List[Tuple[str, str]]
+
+SLEEP_COLUMNS: Columns = [('baby_id', 'str'), ('day', 'str')] + [
+    (field, 'int' if field in COUNT_FIELDS else 'float') for field in FIELDS
+]
+
+TREND_COLUMNS: Columns = [('baby_id', 'str'), ('nights', 'int'), ('last_day', 'str')] + [
+    (f'{METRIC_KEYS[metric]}_{size}d_{stat}', 'float')
+    for metric in METRICS for size in WINDOWS for stat in ('mean', 'std')
+] + [
+    ('good_night_streak', 'int'),
+    ('few_wakings_streak', 'int'),
+    ('best_night_sleep', 'float'),
+    ('best_longest_sleep', 'float'),
+    ('fewest_wakings', 'int'),
+    # Semicolon-separated, so every format stays flat
+    ('new_bests', 'str'),
+]
+
+INSIGHT_COLUMNS: Columns = [
+    ('baby_id', 'str'),
+    ('timestamp', 'str'),
+    ('ai_insights', 'str'),
+    ('sns_published', 'bool'),
+    ('gate_action', 'str'),
+]
+
+
+class ExportSource:
+    """Where the stores live, plus row filters shared by every dataset"""
+
+    def __init__(self, state_dir: Optional[str] = None, history_path: Optional[str] = None,
+                 babies: Optional[Sequence[str]] = None, start: Optional[date] = None,
+                 end: Optional[date] = None):
+        self.state_dir = state_dir
+        self.history_path = history_path or (os.path.join(state_dir, 'history.zzh') if state_dir else None)
+        self.babies = sorted(set(babies)) if babies else None
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_env(cls, **filters: Any) -> 'ExportSource':
+        """Use ZZZGRAMS_STATE_DIR and ZZZGRAMS_HISTORY_FILE, like the history API"""
+        return cls(os.getenv('ZZZGRAMS_STATE_DIR'), os.getenv('ZZZGRAMS_HISTORY_FILE'), **filters)
+
+    def _state_path(self, name: str) -> str:
+        if not self.state_dir:
+            raise ValueError(f"A state directory is required to export {name}")
+        return os.path.join(self.state_dir, name)
+
+
+def _rechunk(parts: Iterable[Chunk], columns: Columns, chunk_size: int) -> Iterator[Chunk]:
+    """Regroup column slices of any length into chunks of exactly chunk_size rows (the last may be short)"""
+    names = [name for name, _ in columns]
+    buffer: Chunk = {name: [] for name in names}
+    size = 0
+    for part in parts:
+        rows = len(part[names[0]])
+        offset = 0
+        while offset < rows:
+            take = min(chunk_size - size, rows - offset)
+            for name in names:
+                buffer[name].extend(part[name][offset:offset + take])
+            size += take
+            offset += take
+            if size == chunk_size:
+                yield buffer
+                buffer = {name: [] for name in names}
+                size = 0
+    if size:
+        yield buffer
+
+
+def iter_sleep_chunks(source: ExportSource, chunk_size: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """
+    Stream nights from the history file
+
+    Args:
+        source: Stores and filters
+        chunk_size: Rows per chunk
+
+    Yields:
+        Column chunks with SLEEP_COLUMNS
+    """
+    import numpy as np
+
+    from ..storage.history_file import HistoryReader
+
+    if not source.history_path or not os.path.exists(source.history_path):
+        return
+
+    def parts(reader) -> Iterator[Chunk]:
+        for baby_id in source.babies or reader.babies():
+            records = reader.read(baby_id, source.start, source.end).records
+            # Slice before converting so a long history never becomes one big list
+            for offset in range(0, len(records), chunk_size):
+                block = records[offset:offset + chunk_size]
+                part: Chunk = {
+                    'baby_id': [baby_id] * len(block),
+                    'day': (np.datetime64('1970-01-01') + block['day'].astype('timedelta64[D]')).astype(str).tolist(),
+                }
+                for field in FIELDS:
+                    part[field] = block[field].tolist()
+                yield part
+
+    with HistoryReader(source.history_path) as reader:
+        yield from _rechunk(parts(reader), SLEEP_COLUMNS, chunk_size)
+
+
+def iter_trend_chunks(source: ExportSource, chunk_size: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """
+    Stream each baby's current trend summary from the trend store
+
+    Date filters do not apply; a baby's trends are its latest state.
+
+    Yields:
+        Column chunks with TREND_COLUMNS
+    """
+    directory = source._state_path('trends')
+    wanted = set(source.babies) if source.babies else None
+
+    def parts() -> Iterator[Chunk]:
+        try:
+            names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        except FileNotFoundError:
+            return
+        for name in names:
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    trends = BabyTrends.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading trends {name}: {str(e)}", file=sys.stderr)
+                continue
+            if wanted is not None and trends.baby_id not in wanted:
+                continue
+            row = dict(trends.summary(), baby_id=trends.baby_id)
+            row['new_bests'] = ';'.join(row['new_bests'])
+            yield {column: [row.get(column)] for column, _ in TREND_COLUMNS}
+
+    yield from _rechunk(parts(), TREND_COLUMNS, chunk_size)
+
+
+def iter_insight_chunks(source: ExportSource, chunk_size: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """
+    Stream logged analysis results, oldest first
+
+    Yields:
+        Column chunks with INSIGHT_COLUMNS
+    """
+    from ..storage.result_store import ResultStore
+
+    store = ResultStore(source._state_path('results'))
+    wanted = set(source.babies) if source.babies else None
+    start = source.start.isoformat() if source.start else None
+    end = source.end.isoformat() if source.end else None
+
+    def parts() -> Iterator[Chunk]:
+        for entry in store.iter_log():
+            if wanted is not None and entry.get('baby_id') not in wanted:
+                continue
+            # Timestamps are local ISO strings, so their date prefix is the family's day
+            day = (entry.get('timestamp') or '')[:10]
+            if (start and day < start) or (end and day > end):
+                continue
+            yield {column: [entry.get(column)] for column, _ in INSIGHT_COLUMNS}
+
+    yield from _rechunk(parts(), INSIGHT_COLUMNS, chunk_size)
+
+
+DATASETS = {
+    'sleep': (SLEEP_COLUMNS, iter_sleep_chunks),
+    'trends': (TREND_COLUMNS, iter_trend_chunks),
+    'insights': (INSIGHT_COLUMNS, iter_insight_chunks),
+}
+
+
+class CsvWriter:
+    """CSV with a header row; None becomes an empty field"""
+
+    def __init__(self, stream: IO[str], columns: Columns):
+        self._writer = csv.writer(stream)
+        self._names = [name for name, _ in columns]
+        self._writer.writerow(self._names)
+
+    def write(self, chunk: Chunk) -> None:
+        self._writer.writerows(zip(*(chunk[name] for name in self._names)))
+
+    def close(self) -> None:
+        pass
+
+
+class NdjsonWriter:
+    """One JSON object per line"""
+
+    def __init__(self, stream: IO[str], columns: Columns):
+        self._stream = stream
+        self._names = [name for name, _ in columns]
+
+    def write(self, chunk: Chunk) -> None:
+        names = self._names
+        self._stream.writelines(
+            json.dumps(dict(zip(names, row))) + '\n' for row in zip(*(chunk[name] for name in names))
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetWriter:
+    """Parquet file with one row group per chunk"""
+
+    TYPES = {'str': 'string', 'int': 'int64', 'float': 'float64', 'bool': 'bool_'}
+
+    def __init__(self, stream: IO[bytes], columns: Columns):
+        # Imported here so CSV and NDJSON exports never pay for loading pyarrow
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(name, getattr(pyarrow, self.TYPES[kind])()) for name, kind in columns])
+        self._writer = pyarrow.parquet.ParquetWriter(stream, self._schema, compression='zstd')
+
+    def write(self, chunk: Chunk) -> None:
+        self._writer.write_table(self._pyarrow.Table.from_pydict(chunk, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'ndjson': NdjsonWriter, 'parquet': ParquetWriter}
+
+
+def export(dataset: str, fmt: str, output: Any = '-', source: Optional[ExportSource] = None,
+           chunk_size: int = DEFAULT_CHUNK_ROWS) -> int:
+    """
+    Stream one dataset to a file or stdout
+
+    Args:
+        dataset: 'sleep', 'trends' or 'insights'
+        fmt: 'csv', 'ndjson' or 'parquet'
+        output: Path, '-' for stdout, or an open file (binary for parquet)
+        source: Stores and filters, defaults to ExportSource.from_env()
+        chunk_size: Rows held in memory at a time
+
+    Returns:
+        int: Rows written
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r}, expected one of {', '.join(DATASETS)}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    columns, iter_chunks = DATASETS[dataset]
+    source = source or ExportSource.from_env()
+    binary = fmt == 'parquet'
+
+    if output == '-':
+        stream, owned = (sys.stdout.buffer if binary else sys.stdout), False
+    elif isinstance(output, (str, os.PathLike)):
+        stream, owned = open(output, 'wb') if binary else open(output, 'w', newline=''), True
+    else:
+        stream, owned = output, False
+
+    rows = 0
+    complete = False
+    try:
+        writer = WRITERS[fmt](stream, columns)
+        try:
+            with metrics.timer('ExportLatency'):
+                for chunk in iter_chunks(source, chunk_size):
+                    writer.write(chunk)
+                    rows += len(chunk[columns[0][0]])
+        finally:
+            writer.close()
+        complete = True
+    finally:
+        if owned:
+            stream.close()
+            # Never leave an empty or truncated file behind
+            if not complete:
+                os.remove(output)
+        else:
+            stream.flush()
+    metrics.count('ExportRows', rows)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Export stored sleep data, trends or insights')
+    parser.add_argument('dataset', choices=list(DATASETS))
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--output', default='-', help="Output path, '-' for stdout (default)")
+    parser.add_argument('--state-dir', default=os.getenv('ZZZGRAMS_STATE_DIR'))
+    parser.add_argument('--history', default=os.getenv('ZZZGRAMS_HISTORY_FILE'),
+                        help='History file (default: <state dir>/history.zzh)')
+    parser.add_argument('--baby', action='append', help='Only this baby; may be repeated')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help='First day, YYYY-MM-DD')
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help='Last day, YYYY-MM-DD')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    source = ExportSource(args.state_dir, args.history, args.baby, args.start, args.end)
+    try:
+        rows = export(args.dataset, args.format, args.output, source, args.chunk_size)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error exporting {args.dataset}: {str(e)}", file=sys.stderr)
+        return 2
+    print(f"Exported {rows:,} {args.dataset} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
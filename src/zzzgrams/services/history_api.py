@@ -0,0 +1,264 @@
+"""
+Read-only HTTP routes over the local history and result stores.
+
+``GET /history?baby=&from=&to=&limit=&cursor=`` pages through a baby's
+nights from the memory-mapped history file, and ``GET /latest?baby=``
+returns the last analysis result. Neither route calls Snoo or Bedrock.
+
+ETags are derived from the backing file's mtime and size plus the query,
+so a matching If-None-Match gets a 304 without reading any records. Built
+bodies are cached per ETag for warm invocations, and bodies above a size
+threshold are gzipped when the client accepts it.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from ..storage.result_store import ResultStore
+from ..utils import metrics
+
+ROUTES = ('/history', '/latest')
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DEFAULT_GZIP_MIN_BYTES = 1024
+
+
+class BadRequest(ValueError):
+    """Invalid query parameters, answered with a 400"""
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode('utf-8'), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in ('*', etag):
+            return True
+    return False
+
+
+def _parse_day(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a YYYY-MM-DD date")
+
+
+def encode_cursor(baby_id: str, day: int) -> str:
+    return base64.urlsafe_b64encode(f'{baby_id}|{day}'.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, baby_id: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_baby, day = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        day_number = int(day)
+    except ValueError:
+        raise BadRequest("Invalid 'cursor'")
+    if cursor_baby != baby_id:
+        raise BadRequest("'cursor' belongs to a different baby")
+    return day_number
+
+
+class HistoryApi:
+    """Serves the read-only routes for lambda_handler"""
+
+    def __init__(self, history_path: Optional[str] = None, result_store: Optional[ResultStore] = None,
+                 gzip_min_bytes: int = DEFAULT_GZIP_MIN_BYTES, cache_size: int = 64):
+        self.history_path = history_path
+        self.result_store = result_store
+        self.gzip_min_bytes = gzip_min_bytes
+        self.cache_size = cache_size
+        # ETag -> [JSON body, gzipped body or None]
+        self._cache: 'OrderedDict[str, list]' = OrderedDict()
+        self._reader = None
+        self._reader_version: Optional[Tuple[int, int, int]] = None
+
+    @classmethod
+    def from_env(cls) -> 'HistoryApi':
+        """
+        Build from ZZZGRAMS_HISTORY_FILE (default $ZZZGRAMS_STATE_DIR/history.zzh),
+        the ZZZGRAMS_STATE_DIR result store and ZZZGRAMS_GZIP_MIN_BYTES
+        """
+        state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+        history_path = os.getenv('ZZZGRAMS_HISTORY_FILE') or (
+            os.path.join(state_dir, 'history.zzh') if state_dir else None)
+        gzip_min_bytes = int(os.getenv('ZZZGRAMS_GZIP_MIN_BYTES', DEFAULT_GZIP_MIN_BYTES))
+        return cls(history_path, ResultStore.from_env(), gzip_min_bytes)
+
+    @staticmethod
+    def matches(event: Dict[str, Any]) -> bool:
+        """Whether an API Gateway event targets one of the read-only routes"""
+        return _path(event) in ROUTES
+
+    def handle(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a read-only request
+
+        Args:
+            event: API Gateway (REST or HTTP API) event
+
+        Returns:
+            dict: Lambda proxy response
+        """
+        metrics.count('ApiRequests')
+        headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+        if _method(event) != 'GET':
+            return self._error(405, 'Method not allowed', {'Allow': 'GET'})
+        params = event.get('queryStringParameters') or {}
+        baby_id = params.get('baby') or os.getenv('BABY_ID')
+        if not baby_id:
+            return self._error(400, "'baby' is required")
+
+        try:
+            if _path(event) == '/history':
+                found = self._history(baby_id, params)
+            else:
+                found = self._latest(baby_id)
+        except BadRequest as e:
+            return self._error(400, str(e))
+        if found is None:
+            return self._error(404, f'No data for {baby_id}')
+
+        etag, build = found
+        if _matches_etag(headers.get('if-none-match'), etag):
+            metrics.count('ApiNotModified')
+            return {'statusCode': 304, 'headers': self._headers(etag), 'body': ''}
+
+        entry = self._cache.get(etag)
+        if entry is None:
+            body = build()
+            if body is None:
+                return self._error(404, f'No data for {baby_id}')
+            entry = [json.dumps(body), None]
+            self._cache[etag] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(etag)
+            metrics.count('ApiCacheHits')
+        return self._ok(etag, entry, 'gzip' in headers.get('accept-encoding', ''))
+
+    def _open_history(self):
+        """The current HistoryReader and its version, reopened when the file changes"""
+        if not self.history_path:
+            return None, None
+        try:
+            st = os.stat(self.history_path)
+        except FileNotFoundError:
+            return None, None
+        version = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if version != self._reader_version:
+            from ..storage.history_file import HistoryReader
+
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = HistoryReader(self.history_path)
+            self._reader_version = version
+        return self._reader, version
+
+    def _history(self, baby_id: str, params: Dict[str, str]):
+        start = _parse_day(params.get('from'), 'from')
+        end = _parse_day(params.get('to'), 'to')
+        try:
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise BadRequest("'limit' must be an integer")
+        limit = min(max(limit, 1), MAX_LIMIT)
+        cursor = params.get('cursor')
+        after = decode_cursor(cursor, baby_id) if cursor else None
+
+        reader, version = self._open_history()
+        if reader is None:
+            return None
+        etag = _etag('history', version, baby_id, start, end, limit, cursor)
+
+        def build() -> Dict[str, Any]:
+            from ..storage.history_file import HistoryRange
+
+            records = reader.read(baby_id, start, end).records
+            if after is not None:
+                records = records[int(records['day'].searchsorted(after, side='right')):]
+            page = HistoryRange(baby_id, records[:limit])
+            items = [dict(row, day=day.isoformat()) for day, row in zip(page.dates(), page.batch.to_dicts())]
+            next_cursor = None
+            if len(records) > limit:
+                next_cursor = encode_cursor(baby_id, int(page.days[-1]))
+            return {'baby': baby_id, 'items': items, 'next_cursor': next_cursor}
+
+        return etag, build
+
+    def _latest(self, baby_id: str):
+        version = self.result_store.version(baby_id) if self.result_store else None
+        if version is not None:
+            def load() -> Optional[Dict[str, Any]]:
+                # The result can be removed between version() and load()
+                result = self.result_store.load(baby_id)
+                return dict(result, baby=baby_id) if result is not None else None
+
+            return _etag('latest', version, baby_id), load
+
+        # No stored result: fall back to the newest night in the history file
+        reader, version = self._open_history()
+        if reader is None:
+            return None
+        latest = reader.latest(baby_id)
+        if not len(latest):
+            return None
+        day = latest.dates()[0].isoformat()
+        sleep_data = latest.batch.to_dicts()[0]
+        return _etag('latest', version, baby_id), lambda: {'baby': baby_id, 'day': day, 'sleep_data': sleep_data}
+
+    def _headers(self, etag: Optional[str] = None) -> Dict[str, str]:
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            # Clients may cache but must revalidate; revalidation is a cheap 304
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if etag:
+            headers['ETag'] = etag
+        return headers
+
+    def _ok(self, etag: str, entry: list, accepts_gzip: bool) -> Dict[str, Any]:
+        headers = self._headers(etag)
+        body = entry[0]
+        if accepts_gzip and len(body) >= self.gzip_min_bytes:
+            if entry[1] is None:
+                compressed = gzip.compress(body.encode('utf-8'), compresslevel=6)
+                entry[1] = base64.b64encode(compressed).decode('ascii')
+            headers['Content-Encoding'] = 'gzip'
+            return {'statusCode': 200, 'headers': headers, 'isBase64Encoded': True, 'body': entry[1]}
+        return {'statusCode': 200, 'headers': headers, 'body': body}
+
+    def _error(self, status_code: int, message: str, extra_headers: Optional[Dict[str, str]] = None):
+        headers = self._headers()
+        headers.update(extra_headers or {})
+        return {'statusCode': status_code, 'headers': headers,
+                'body': json.dumps({'error': message, 'success': False})}
+
+
+def _path(event: Dict[str, Any]) -> Optional[str]:
+    path = event.get('path') or event.get('rawPath')
+    return path.rstrip('/') or '/' if path else None
+
+
+def _method(event: Dict[str, Any]) -> Optional[str]:
+    method = event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method')
+    return method.upper() if method else None
@@ -0,0 +1,312 @@
+"""
+Per-family delivery scheduling.
+
+Each family has its own timezone and preferred local delivery time. Delivery
+times are converted to UTC and grouped into fixed-width buckets (15 minutes by
+default). A priority queue ordered by deadline hands out due buckets, and each
+bucket is dispatched as one batched run that shares the Bedrock and SNS
+clients. Load then follows the families' wake times across the day instead of
+spiking on a single cron tick.
+"""
+
+import contextvars
+import heapq
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from ..clients.snoo_client import DEFAULT_TIMEZONE
+from ..storage.history_writer import collect_nights, merge_nights
+from ..utils import metrics
+
+DEFAULT_DELIVERY_TIME = '07:00'
+DEFAULT_BUCKET_MINUTES = 15
+
+
+@dataclass
+class FamilySchedule:
+    """When and where one family wants its nightly message"""
+    baby_id: str
+    timezone: str = DEFAULT_TIMEZONE
+    # Local wall-clock time, 'HH:MM'
+    delivery_time: str = DEFAULT_DELIVERY_TIME
+
+    def __post_init__(self):
+        # Fail on bad configuration up front rather than at dispatch time
+        self._tz = pytz.timezone(self.timezone)
+        hour, minute = (int(part) for part in self.delivery_time.split(':'))
+        self._local_time = time(hour, minute)
+
+    def next_delivery(self, at_or_after: datetime) -> datetime:
+        """
+        Next delivery at or after a moment
+
+        Args:
+            at_or_after: Timezone-aware datetime
+
+        Returns:
+            Delivery moment in UTC. Local times skipped by a DST change move
+            forward by the size of the gap.
+        """
+        local_day = at_or_after.astimezone(self._tz).date()
+        for offset in range(3):
+            naive = datetime.combine(local_day + timedelta(days=offset), self._local_time)
+            candidate = self._tz.normalize(self._tz.localize(naive))
+            if candidate >= at_or_after:
+                return candidate.astimezone(pytz.utc)
+        raise AssertionError('unreachable: a delivery exists within three local days')
+
+
+@dataclass
+class Bucket:
+    """Families whose deliveries fall in the same time slot"""
+    start: datetime
+    deadline: datetime
+    families: List[FamilySchedule] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'start': self.start.isoformat(),
+            'deadline': self.deadline.isoformat(),
+            'families': [family.baby_id for family in self.families],
+        }
+
+
+def floor_to_bucket(moment: datetime, bucket_minutes: int) -> datetime:
+    """Round an aware datetime down to the start of its UTC bucket"""
+    moment = moment.astimezone(pytz.utc)
+    minutes = (moment.hour * 60 + moment.minute) // bucket_minutes * bucket_minutes
+    return moment.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+class Scheduler:
+    """Deadline-ordered queue of upcoming family deliveries"""
+
+    def __init__(self, schedules: List[FamilySchedule], bucket_minutes: int = DEFAULT_BUCKET_MINUTES,
+                 now: Optional[datetime] = None):
+        if not 0 < bucket_minutes <= 24 * 60 or (24 * 60) % bucket_minutes:
+            raise ValueError(f"bucket_minutes must divide a day, got {bucket_minutes}")
+        self.bucket_minutes = bucket_minutes
+        self._heap: List[Tuple[datetime, int, FamilySchedule]] = []
+        self._seq = itertools.count()
+        now = now or datetime.now(pytz.utc)
+        for schedule in schedules:
+            self.add(schedule, now)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, schedule: FamilySchedule, now: Optional[datetime] = None) -> None:
+        """Queue a family's next delivery"""
+        deadline = schedule.next_delivery(now or datetime.now(pytz.utc))
+        heapq.heappush(self._heap, (deadline, next(self._seq), schedule))
+
+    def next_run(self) -> Optional[datetime]:
+        """Start of the earliest pending bucket, or None when empty"""
+        if not self._heap:
+            return None
+        return floor_to_bucket(self._heap[0][0], self.bucket_minutes)
+
+    def pop_due(self, now: datetime) -> List[Bucket]:
+        """
+        Take every bucket that has started by now
+
+        Each popped family is re-queued for its next delivery.
+
+        Args:
+            now: Timezone-aware current time
+
+        Returns:
+            Due buckets, earliest deadline first
+        """
+        buckets: Dict[datetime, Bucket] = {}
+        requeue = []
+        while self._heap and floor_to_bucket(self._heap[0][0], self.bucket_minutes) <= now:
+            deadline, _, schedule = heapq.heappop(self._heap)
+            start = floor_to_bucket(deadline, self.bucket_minutes)
+            bucket = buckets.setdefault(start, Bucket(start, deadline))
+            bucket.families.append(schedule)
+            requeue.append((deadline, schedule))
+        for deadline, schedule in requeue:
+            self.add(schedule, deadline + timedelta(minutes=1))
+        return sorted(buckets.values(), key=lambda b: b.deadline)
+
+    def load_profile(self) -> Dict[str, int]:
+        """Families per pending bucket, keyed by UTC 'HH:MM', for capacity planning"""
+        profile: Dict[str, int] = {}
+        for deadline, _, _ in self._heap:
+            key = floor_to_bucket(deadline, self.bucket_minutes).strftime('%H:%M')
+            profile[key] = profile.get(key, 0) + 1
+        return dict(sorted(profile.items()))
+
+
+def load_schedules(path: Optional[str] = None) -> List[FamilySchedule]:
+    """
+    Read family schedules from a JSON list
+
+    Args:
+        path: File to read, defaults to ZZZGRAMS_SCHEDULE_FILE
+
+    Returns:
+        List of FamilySchedule, empty when no file is configured
+    """
+    path = path or os.getenv('ZZZGRAMS_SCHEDULE_FILE')
+    if not path:
+        return []
+    with open(path) as f:
+        return [FamilySchedule(**entry) for entry in json.load(f)]
+
+
+def run_bucket(bucket: Bucket, hours_back: int = 20, max_workers: int = 4,
+               service_factory: Optional[Callable[[FamilySchedule, Any, Any], Any]] = None,
+               packed: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Run the nightly analysis for every family in a bucket
+
+    The Bedrock and SNS clients are built once and shared by the whole bucket.
+
+    Args:
+        bucket: Bucket to run
+        hours_back: Passed to SleepAnalyzerService.analyze_sleep_data
+        max_workers: Families analyzed concurrently
+        service_factory: Builds a service from (schedule, bedrock_client, sns_client)
+        packed: Generate the bucket's messages with packed multi-family
+            prompts, defaults to ZZZGRAMS_PACKED_PROMPTS=1
+
+    Returns:
+        Dict of baby id to analysis result
+    """
+    from ..clients.bedrock_client import BedrockClient
+    from ..clients.secrets_client import shared_cache
+    from ..clients.sns_client import SNSClient
+
+    # Warm the whole bucket's secrets in one batch before the families start
+    # This is only a warm-up: a family whose secret is still missing fails on its own later
+    secrets = shared_cache()
+    if secrets is not None:
+        try:
+            secrets.prefetch([schedule.baby_id for schedule in bucket.families])
+        except Exception as e:
+            print(f"Error prefetching secrets for {len(bucket.families)} families: {str(e)}")
+            metrics.count('SecretPrefetchErrors')
+
+    bedrock_client = BedrockClient()
+    sns_client = SNSClient()
+    factory = service_factory or _default_service
+    if packed is None:
+        packed = os.getenv('ZZZGRAMS_PACKED_PROMPTS') == '1'
+
+    def analyze(schedule: FamilySchedule) -> Dict[str, Any]:
+        try:
+            service = factory(schedule, bedrock_client, sns_client)
+        except Exception as e:
+            return _failure_result(schedule, e)
+        return service.analyze_sleep_data(hours_back=hours_back)
+
+    # Nights recorded by the families are merged into the history file once, after the bucket
+    with collect_nights() as nights, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def run_all(fn: Callable[..., Any], items: List[Any]) -> List[Any]:
+            # Each family runs in a copy of this context so metrics reach the active scope
+            futures = [executor.submit(contextvars.copy_context().run, fn, *item) for item in items]
+            return [future.result() for future in futures]
+
+        if packed:
+            results = _run_packed(bucket, hours_back, factory, bedrock_client, sns_client, run_all)
+        else:
+            outcomes = run_all(analyze, [(schedule,) for schedule in bucket.families])
+            results = {schedule.baby_id: result for schedule, result in zip(bucket.families, outcomes)}
+    try:
+        merge_nights(nights)
+    except Exception as e:
+        print(f"Error saving history for {len(nights)} nights: {str(e)}")
+        metrics.count('HistoryWriteErrors')
+    metrics.count('ScheduledFamilies', len(results))
+    metrics.count('ScheduledFailures', sum(1 for result in results.values() if not result.get('success')))
+    return results
+
+
+def _run_packed(bucket: Bucket, hours_back: int, factory: Callable[[FamilySchedule, Any, Any], Any],
+                bedrock_client, sns_client, run_all: Callable[..., List[Any]]) -> Dict[str, Any]:
+    """
+    Prepare every family, generate the messages in packed Bedrock calls, then finish each family
+
+    Traces are not recorded in this mode because one family's run spans several phases.
+    """
+    def prepare(schedule: FamilySchedule) -> Tuple[Any, Any, Optional[Dict[str, Any]]]:
+        try:
+            service = factory(schedule, bedrock_client, sns_client)
+        except Exception as e:
+            return None, None, _failure_result(schedule, e)
+        try:
+            return service, service.prepare(hours_back), None
+        except Exception as e:
+            return service, None, service.error_result(e)
+
+    def complete(service, pending, ai_insights: Optional[str]) -> Dict[str, Any]:
+        try:
+            return service.complete(pending, ai_insights)
+        except Exception as e:
+            return service.error_result(e)
+
+    prepared = run_all(prepare, [(schedule,) for schedule in bucket.families])
+    waiting = [i for i, (_, pending, _) in enumerate(prepared) if pending is not None and pending.needs_insights]
+    with metrics.timer('InsightsLatency'):
+        messages = bedrock_client.generate_packed_insights(
+            [(prepared[i][1].sleep_data, prepared[i][1].trends) for i in waiting])
+    insights: Dict[int, str] = dict(zip(waiting, messages))
+
+    todo = [i for i, (_, pending, _) in enumerate(prepared) if pending is not None]
+    finished = run_all(complete, [(prepared[i][0], prepared[i][1], insights.get(i)) for i in todo])
+    outcomes = dict(zip(todo, finished))
+    return {schedule.baby_id: outcomes.get(i, prepared[i][2]) for i, schedule in enumerate(bucket.families)}
+
+
+def _failure_result(schedule: FamilySchedule, error: Exception) -> Dict[str, Any]:
+    """The result for a family whose service could not be built, shaped like SleepAnalyzerService.error_result"""
+    return {
+        'error': str(error),
+        'success': False,
+        'timestamp': datetime.now(pytz.timezone(schedule.timezone)).isoformat()
+    }
+
+
+def _default_service(schedule: FamilySchedule, bedrock_client, sns_client):
+    from ..clients.snoo_client import SnooClient
+    from .sleep_analyzer_service import SleepAnalyzerService
+
+    snoo_client = SnooClient(baby_id=schedule.baby_id, timezone=schedule.timezone)
+    return SleepAnalyzerService(snoo_client=snoo_client, bedrock_client=bedrock_client,
+                                sns_client=sns_client, timezone=schedule.timezone)
+
+
+def run_due(now: datetime, schedules: Optional[List[FamilySchedule]] = None,
+            bucket_minutes: int = DEFAULT_BUCKET_MINUTES, **run_options: Any) -> Dict[str, Any]:
+    """
+    Run the bucket that starts at this tick
+
+    Meant to be called by a cron trigger every bucket_minutes. The tick is
+    rounded down to its bucket, so a late trigger still runs the right families.
+
+    Args:
+        now: Time of the tick
+        schedules: Families to consider, defaults to load_schedules()
+        bucket_minutes: Bucket width
+        **run_options: Passed to run_bucket
+
+    Returns:
+        Dict with the buckets run and per-family results
+    """
+    schedules = load_schedules() if schedules is None else schedules
+    tick = floor_to_bucket(now, bucket_minutes)
+    scheduler = Scheduler(schedules, bucket_minutes, now=tick)
+    buckets = scheduler.pop_due(tick)
+    results: Dict[str, Any] = {}
+    for bucket in buckets:
+        results.update(run_bucket(bucket, **run_options))
+    return {'buckets': [bucket.to_dict() for bucket in buckets], 'results': results}
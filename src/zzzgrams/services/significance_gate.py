@@ -0,0 +1,219 @@
+"""
+Change-significance gate for the nightly message.
+
+Compares tonight's sleep with the baby's rolling baseline from the trend
+engine. A notable night (big swing from the 7-night average, a new personal
+best, a streak milestone, or not enough history yet) goes to Bedrock as
+usual. A quiet night reuses the last generated message, a local template or
+a compact digest, so steady families don't cost a model call every night.
+"""
+
+import json
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+# What to send on a quiet night
+QUIET_ACTIONS = ('bedrock', 'cached', 'template', 'digest')
+
+TEMPLATES = (
+    "Another steady night: {night} of night sleep and {wakings}. Right in line with the past week, "
+    "so keep doing whatever you're doing!",
+    "Consistency is king! {night} overnight with {wakings}. Same great rhythm as the last few nights.",
+    "Nothing new to report, and that's a good thing: {night} of night sleep and {wakings}. "
+    "Enjoy the routine!",
+)
+
+
+def format_minutes(minutes: float) -> str:
+    """Render minutes as '6h 40m'"""
+    hours, mins = divmod(int(round(minutes)), 60)
+    return f'{hours}h {mins:02d}m' if hours else f'{mins}m'
+
+
+def _format_wakings(wakings: int) -> str:
+    return '1 waking' if wakings == 1 else f'{wakings} wakings'
+
+
+@dataclass
+class GatePolicy:
+    """Per-family thresholds and quiet-night behaviour"""
+    on_quiet: str = 'template'
+    # Nights of history needed before any night can be considered quiet
+    min_nights: int = 7
+    # Night sleep swing (minutes) from the 7-night mean that counts as notable,
+    # or z_score standard deviations if that is larger
+    night_sleep_minutes: float = 45.0
+    z_score: float = 1.5
+    wakings_delta: float = 2.0
+    streak_milestones: List[int] = field(default_factory=lambda: [3, 7, 14, 30])
+    # Force a fresh Bedrock message after this many quiet nights in a row
+    max_quiet_nights: int = 3
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], base: Optional['GatePolicy'] = None) -> 'GatePolicy':
+        """Build a policy from a dict, unknown keys raise ValueError"""
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown gate policy keys: {sorted(unknown)}")
+        policy = cls(**{**asdict(base or cls()), **data})
+        if policy.on_quiet not in QUIET_ACTIONS:
+            raise ValueError(f"on_quiet must be one of {QUIET_ACTIONS}, got {policy.on_quiet!r}")
+        return policy
+
+
+@dataclass
+class GateDecision:
+    """Outcome of the gate for one night"""
+    significant: bool
+    action: str
+    reasons: List[str]
+    message: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'significant': self.significant, 'action': self.action, 'reasons': list(self.reasons)}
+
+
+class SignificanceGate:
+    """Decides per night whether the message needs a Bedrock call"""
+
+    def __init__(self, directory: str, default: Optional[GatePolicy] = None,
+                 families: Optional[Dict[str, GatePolicy]] = None):
+        self.directory = directory
+        self.default = default or GatePolicy()
+        self.families = families or {}
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['SignificanceGate']:
+        """
+        Build a gate under ZZZGRAMS_STATE_DIR, or None if it is unset
+
+        Policies come from the JSON file named by ZZZGRAMS_GATE_POLICY, shaped as
+        {"default": {...}, "families": {"<baby id>": {...}}}. Family entries
+        override the default.
+        """
+        state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+        if not state_dir:
+            return None
+        config: Dict[str, Any] = {}
+        policy_path = os.getenv('ZZZGRAMS_GATE_POLICY')
+        if policy_path:
+            with open(policy_path) as f:
+                config = json.load(f)
+        return cls.from_config(os.path.join(state_dir, 'gate'), config)
+
+    @classmethod
+    def from_config(cls, directory: str, config: Dict[str, Any]) -> 'SignificanceGate':
+        default = GatePolicy.from_dict(config.get('default', {}))
+        families = {
+            str(baby_id): GatePolicy.from_dict(overrides, default)
+            for baby_id, overrides in config.get('families', {}).items()
+        }
+        return cls(directory, default, families)
+
+    def policy_for(self, baby_id: str) -> GatePolicy:
+        return self.families.get(str(baby_id), self.default)
+
+    def evaluate(self, baby_id: str, sleep_data: Dict[str, Any], baseline: Dict[str, Any],
+                 trends: Dict[str, Any]) -> GateDecision:
+        """
+        Decide whether tonight needs a fresh Bedrock message
+
+        Args:
+            baby_id: Baby the night belongs to
+            sleep_data: Tonight's SleepData as a dict
+            baseline: Trend summary from before tonight
+            trends: Trend summary including tonight
+
+        Returns:
+            GateDecision, with the replacement message filled in when quiet
+        """
+        policy = self.policy_for(baby_id)
+        if policy.on_quiet == 'bedrock':
+            return GateDecision(True, 'bedrock', ['policy'])
+
+        reasons = self._reasons(policy, sleep_data, baseline, trends)
+        state = self._load_state(baby_id)
+        # A rerun of the last evaluated night starts from the count it saw the first time
+        day = trends.get('last_day')
+        if day is not None and state.get('last_day') == day:
+            quiet_nights = state.get('quiet_before', 0)
+        else:
+            quiet_nights = state.get('quiet_nights', 0)
+        state.update(last_day=day, quiet_before=quiet_nights, quiet_nights=quiet_nights)
+        if not reasons and quiet_nights >= policy.max_quiet_nights:
+            reasons.append('refresh')
+        if not reasons and policy.on_quiet == 'cached' and not state.get('last_message'):
+            reasons.append('no_cached_message')
+        if reasons:
+            self._save_state(baby_id, state)
+            return GateDecision(True, 'bedrock', reasons)
+
+        if policy.on_quiet == 'cached':
+            message = state['last_message']
+        elif policy.on_quiet == 'digest':
+            message = self._digest(sleep_data, baseline)
+        else:
+            message = self._template(sleep_data, trends)
+        state['quiet_nights'] = quiet_nights + 1
+        self._save_state(baby_id, state)
+        return GateDecision(False, policy.on_quiet, [], message)
+
+    def remember(self, baby_id: str, message: str) -> None:
+        """Store a freshly generated message and reset the quiet-night count"""
+        state = self._load_state(baby_id)
+        state.update(last_message=message, quiet_nights=0)
+        self._save_state(baby_id, state)
+
+    def _reasons(self, policy: GatePolicy, sleep_data: Dict[str, Any], baseline: Dict[str, Any],
+                 trends: Dict[str, Any]) -> List[str]:
+        if baseline.get('nights', 0) < policy.min_nights:
+            return ['history']
+        reasons = []
+        night = float(sleep_data.get('nightSleep', 0))
+        mean = baseline.get('night_sleep_7d_mean')
+        std = baseline.get('night_sleep_7d_std') or 0.0
+        if mean is not None and abs(night - mean) >= max(policy.night_sleep_minutes, policy.z_score * std):
+            reasons.append('night_sleep')
+        wakings_mean = baseline.get('wakings_7d_mean')
+        if wakings_mean is not None and abs(sleep_data.get('nightWakings', 0) - wakings_mean) >= policy.wakings_delta:
+            reasons.append('wakings')
+        if trends.get('new_bests'):
+            reasons.append('new_best')
+        if (trends.get('good_night_streak') in policy.streak_milestones
+                or trends.get('few_wakings_streak') in policy.streak_milestones):
+            reasons.append('streak')
+        return reasons
+
+    def _template(self, sleep_data: Dict[str, Any], trends: Dict[str, Any]) -> str:
+        # Rotate templates by night count so consecutive quiet nights differ
+        template = TEMPLATES[trends.get('nights', 0) % len(TEMPLATES)]
+        return template.format(night=format_minutes(sleep_data.get('nightSleep', 0)),
+                               wakings=_format_wakings(sleep_data.get('nightWakings', 0)))
+
+    def _digest(self, sleep_data: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+        return (f"Steady night: {format_minutes(sleep_data.get('nightSleep', 0))} night sleep, "
+                f"{_format_wakings(sleep_data.get('nightWakings', 0))} "
+                f"(7-night avg {format_minutes(baseline.get('night_sleep_7d_mean') or 0)}, "
+                f"{baseline.get('wakings_7d_mean')} wakings).")
+
+    def _path(self, baby_id: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', str(baby_id))
+        return os.path.join(self.directory, f'{safe}.json')
+
+    def _load_state(self, baby_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(baby_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, baby_id: str, state: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.gate-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._path(baby_id))
@@ -1,23 +1,75 @@
 import json
+import os
 from datetime import datetime, timedelta
-import pytz
-from dataclasses import asdict
-from typing import Dict, Any
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, Optional
 
-from ..clients.snoo_client import SnooClient
+from ..clients.secrets_client import SecretCache, shared_cache
+from ..clients.snoo_client import DEFAULT_TIMEZONE, SnooClient
 from ..clients.bedrock_client import BedrockClient
 from ..clients.sns_client import SNSClient
+from ..storage.history_writer import record_night
+from ..storage.result_store import ResultStore
+from ..utils import metrics, tracing
 from ..utils.text_cleaner import clean_text_for_json
+from .significance_gate import GateDecision, SignificanceGate
+from .trend_engine import TrendStore
+
+
+@dataclass
+class PendingAnalysis:
+    """A run that has its sleep data and is waiting for its insights message"""
+    baby_id: str
+    now: datetime
+    sleep_data: Dict[str, Any]
+    trends: Optional[Dict[str, Any]] = None
+    decision: Optional[GateDecision] = None
+    # Set by prepare when the gate already picked a message
+    ai_insights: Optional[str] = None
+    # The family's own SNS topic; None publishes to SNS_TOPIC_ARN
+    topic_arn: Optional[str] = None
+
+    @property
+    def needs_insights(self) -> bool:
+        return self.ai_insights is None
 
 
 class SleepAnalyzerService:
     """Service class for sleep analysis business logic"""
     
-    def __init__(self):
-        self.snoo_client = SnooClient()
-        self.bedrock_client = BedrockClient()
-        self.sns_client = SNSClient()
-        self.timezone = pytz.timezone('America/New_York')
+    def __init__(self, trace: Optional[bool] = None, snoo_client: Optional[SnooClient] = None,
+                 bedrock_client: Optional[BedrockClient] = None, sns_client: Optional[SNSClient] = None,
+                 trend_store: Optional[TrendStore] = None, gate: Optional[SignificanceGate] = None,
+                 timezone: Optional[str] = None, result_store: Optional[ResultStore] = None,
+                 secrets: Optional[SecretCache] = None, history_path: Optional[str] = None):
+        # The family's own clock, e.g. 'America/Los_Angeles'. An injected client's zone
+        # comes first, so the fetch window and trend day match its sessions query
+        client_timezone = getattr(snoo_client, 'TIMEZONE', None)
+        if timezone is None and isinstance(client_timezone, str):
+            timezone = client_timezone
+        timezone = timezone or os.getenv('SNOO_TIMEZONE') or DEFAULT_TIMEZONE
+        # Per-family secrets (Snoo login, SNS topic) when a secret provider is configured
+        self.secrets = secrets if secrets is not None else shared_cache()
+        self.snoo_client = snoo_client or SnooClient(timezone=timezone, secrets=self.secrets)
+        self.bedrock_client = bedrock_client or BedrockClient()
+        self.sns_client = sns_client or SNSClient()
+        # Rolling trends are kept when a store is given or ZZZGRAMS_STATE_DIR is set
+        self.trend_store = trend_store if trend_store is not None else TrendStore.from_env()
+        # The gate needs the trend baseline, so it is only used alongside a trend store
+        self.gate = gate if gate is not None else SignificanceGate.from_env()
+        # Last result per baby, served by GET /latest
+        self.result_store = result_store if result_store is not None else ResultStore.from_env()
+        # Nightly history served by GET /history and the exporter
+        if history_path is None:
+            state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+            history_path = os.getenv('ZZZGRAMS_HISTORY_FILE') or (
+                os.path.join(state_dir, 'history.zzh') if state_dir else None)
+        self.history_path = history_path
+        # pytz is only needed once a service is built, not at package import
+        import pytz
+        self.timezone = pytz.timezone(timezone)
+        # None defers to the ZZZGRAMS_TRACE environment variable
+        self.trace = trace
     
     def analyze_sleep_data(self, hours_back: int = 20) -> Dict[str, Any]:
         """
@@ -27,38 +79,132 @@ class SleepAnalyzerService:
             hours_back: Number of hours to look back for sleep data
             
         Returns:
-            Dict containing sleep data, AI insights, and metadata
+            Dict containing sleep data, AI insights, and metadata. With a trend
+            store it also contains 'trends' and, with a significance gate,
+            'gate'. When tracing is enabled it contains a 'trace' entry with
+            per-stage spans.
         """
+        with tracing.start_trace('analyze_sleep_data', enabled=self.trace) as trace:
+            result = self._analyze(hours_back)
+        if trace is not None:
+            result['trace'] = trace.export()
+        return result
+
+    def _analyze(self, hours_back: int) -> Dict[str, Any]:
         try:
-            # Get time range for sleep data
-            now = datetime.now(self.timezone)
-            start_time = (now - timedelta(hours=hours_back)).strftime('%Y-%m-%dT%H:%M:%S')
-            end_time = now.strftime('%Y-%m-%dT%H:%M:%S')
+            return self.complete(self.prepare(hours_back))
+        except Exception as e:
+            return self.error_result(e)
+
+    def prepare(self, hours_back: int = 20) -> PendingAnalysis:
+        """
+        Run the stages before the insights message: fetch, trends and gate
 
-            # Get sleep data from Snoo
+        Args:
+            hours_back: Number of hours to look back for sleep data
+
+        Returns:
+            PendingAnalysis; its ai_insights is already set when the gate
+            chose a message without the model
+        """
+        # Resolve the family's topic before any work, so a secret-store error
+        # cannot throw away a generated message. With a provider there is no
+        # fallback to the shared topic
+        baby_id = self.snoo_client.BABY_ID
+        topic_arn = self.secrets.require(baby_id, 'topic_arn') if self.secrets is not None else None
+
+        # Get time range for sleep data
+        now = datetime.now(self.timezone)
+        start_time = (now - timedelta(hours=hours_back)).strftime('%Y-%m-%dT%H:%M:%S')
+        end_time = now.strftime('%Y-%m-%dT%H:%M:%S')
+
+        # Get sleep data from Snoo
+        with tracing.span('fetch'), metrics.timer('FetchLatency'):
             sleep_data = self.snoo_client.get_sleep_data(start_time=start_time, end_time=end_time)
             sleep_data_dict = asdict(sleep_data)
-            
-            # Generate AI insights using Bedrock
-            ai_insights = self.bedrock_client.generate_sleep_insights(sleep_data_dict)
-            
-            # Clean the AI insights for JSON serialization
+        
+        # Fold last night into the baby's rolling trends
+        pending = PendingAnalysis(baby_id, now, sleep_data_dict, topic_arn=topic_arn)
+        if self.trend_store is not None:
+            with tracing.span('trends'), metrics.timer('TrendsLatency'):
+                baseline, pending.trends = self.trend_store.advance(pending.baby_id, now.date(), sleep_data_dict)
+            if self.gate is not None:
+                with tracing.span('gate') as sp:
+                    pending.decision = self.gate.evaluate(pending.baby_id, sleep_data_dict, baseline, pending.trends)
+                    if sp:
+                        sp.set(significant=pending.decision.significant, action=pending.decision.action)
+
+        if pending.decision is not None and not pending.decision.significant:
+            # Quiet night: skip the model call
+            pending.ai_insights = pending.decision.message
+            metrics.count('BedrockSkipped')
+        return pending
+
+    def complete(self, pending: PendingAnalysis, ai_insights: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Finish a prepared run: insights, clean, publish and save
+
+        Args:
+            pending: Output of prepare
+            ai_insights: Message generated elsewhere, e.g. by a packed Bedrock
+                call; generated here when neither this nor pending has one
+
+        Returns:
+            Dict containing sleep data, AI insights, and metadata
+        """
+        sleep_data_dict = pending.sleep_data
+        trends = pending.trends
+        decision = pending.decision
+        baby_id = pending.baby_id
+        if pending.ai_insights is not None:
+            ai_insights = pending.ai_insights
+        else:
+            if ai_insights is None:
+                # Generate AI insights using Bedrock
+                with tracing.span('insights'), metrics.timer('InsightsLatency'):
+                    ai_insights = self.bedrock_client.generate_sleep_insights(sleep_data_dict, trends)
+            if decision is not None and not ai_insights.startswith('Error calling Bedrock'):
+                self.gate.remember(baby_id, ai_insights)
+        
+        # Clean the AI insights for JSON serialization
+        with tracing.span('clean') as sp, metrics.timer('CleanLatency'):
             cleaned_ai_insights = clean_text_for_json(ai_insights)
-            
-            # Publish to SNS topic
-            sns_success = self.sns_client.publish_sleep_analysis(ai_insights, sleep_data_dict)
-
-            return {
-                'sleep_data': sleep_data_dict,
-                'ai_insights': cleaned_ai_insights,
-                'sns_published': sns_success,
-                'timestamp': now.isoformat(),
-                'success': True
-            }
-            
-        except Exception as e:
-            return {
-                'error': str(e),
-                'success': False,
-                'timestamp': datetime.now(self.timezone).isoformat()
-            } 
\ No newline at end of file
+            if sp:
+                sp.set(bytes_in=len(ai_insights), bytes_out=len(cleaned_ai_insights))
+        
+        # Publish to SNS topic
+        with tracing.span('publish'), metrics.timer('PublishLatency'):
+            sns_success = self.sns_client.publish_sleep_analysis(ai_insights, sleep_data_dict, trends,
+                                                                 topic_arn=pending.topic_arn)
+
+        result = {
+            'sleep_data': sleep_data_dict,
+            'ai_insights': cleaned_ai_insights,
+            'sns_published': sns_success,
+            'timestamp': pending.now.isoformat(),
+            'success': True
+        }
+        if trends is not None:
+            result['trends'] = trends
+        if decision is not None:
+            result['gate'] = decision.to_dict()
+        if self.result_store is not None:
+            try:
+                self.result_store.save(baby_id, result)
+            except Exception as e:
+                # Read-only routes go stale, but tonight's message already went out
+                print(f"Error saving result: {str(e)}")
+        if self.history_path:
+            try:
+                record_night(self.history_path, baby_id, pending.now.date(), sleep_data_dict)
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+        return result
+
+    def error_result(self, error: Exception) -> Dict[str, Any]:
+        """The result returned when a run fails"""
+        return {
+            'error': str(error),
+            'success': False,
+            'timestamp': datetime.now(self.timezone).isoformat()
+        }
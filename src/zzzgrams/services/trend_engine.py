@@ -0,0 +1,271 @@
+"""
+Incremental rolling trend analytics per baby.
+
+Each night is folded into a small per-baby state in O(1): 7- and 30-night
+rolling windows keep running sums, so means and variances never rescan
+history, and streaks and personal bests update in place. The state is a few
+hundred bytes of JSON per baby, so per-run cost is the same for a family
+with one week of history as for one with two years.
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+from collections import deque
+from datetime import date, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+WINDOWS = (7, 30)
+METRICS = ('nightSleep', 'nightWakings', 'longestSleep')
+METRIC_KEYS = {'nightSleep': 'night_sleep', 'nightWakings': 'wakings', 'longestSleep': 'longest_sleep'}
+
+# A "good night" matches the prompt's target of six or more hours overnight
+GOOD_NIGHT_MINUTES = 360.0
+FEW_WAKINGS = 1
+
+# Running sums drift as values are added and evicted; rebuild them this often
+RESUM_EVERY = 1000
+
+
+class RollingWindow:
+    """Fixed-size window with O(1) mean and variance"""
+
+    __slots__ = ('size', 'values', 'total', 'total_sq', '_pushes')
+
+    def __init__(self, size: int, values: Iterable[float] = ()):
+        self.size = size
+        self.values: Deque[float] = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._pushes = 0
+        for value in values:
+            self.push(value)
+
+    def push(self, value: float) -> None:
+        if len(self.values) == self.size:
+            evicted = self.values[0]
+            self.total -= evicted
+            self.total_sq -= evicted * evicted
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        self._pushes += 1
+        if self._pushes % RESUM_EVERY == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        n = len(self.values)
+        if n == 0:
+            return None
+        mean = self.total / n
+        return max(self.total_sq / n - mean * mean, 0.0)
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+
+def _to_date(day: Union[date, str]) -> date:
+    return day if isinstance(day, date) else date.fromisoformat(str(day)[:10])
+
+
+class BabyTrends:
+    """Running trend state for one baby"""
+
+    def __init__(self, baby_id: str):
+        self.baby_id = baby_id
+        self.nights = 0
+        self.last_day: Optional[str] = None
+        self.windows: Dict[str, Dict[int, RollingWindow]] = {
+            metric: {size: RollingWindow(size) for size in WINDOWS} for metric in METRICS
+        }
+        self.good_night_streak = 0
+        self.few_wakings_streak = 0
+        self.best_night_sleep: Optional[float] = None
+        self.best_longest_sleep: Optional[float] = None
+        self.fewest_wakings: Optional[int] = None
+        self.new_bests: List[str] = []
+        # Summary from before the last counted night, so a rerun of that night
+        # can be compared against the same baseline as the first run
+        self.previous: Optional[Dict[str, Any]] = None
+
+    def update(self, day: Union[date, str], sleep_data: Dict[str, Any]) -> bool:
+        """
+        Fold one night into the running state
+
+        Args:
+            day: Calendar day the night ended on
+            sleep_data: SleepData as a dict
+
+        Returns:
+            bool: False if this day was already counted (the update is skipped)
+        """
+        day = _to_date(day)
+        if self.last_day is not None:
+            last = date.fromisoformat(self.last_day)
+            if day <= last:
+                return False
+            if day - last > timedelta(days=1):
+                # A missing night breaks streaks; windows keep their nights
+                self.good_night_streak = 0
+                self.few_wakings_streak = 0
+
+        self.previous = self.summary()
+        night = float(sleep_data.get('nightSleep', 0))
+        wakings = int(sleep_data.get('nightWakings', 0))
+        longest = float(sleep_data.get('longestSleep', 0))
+        for metric, value in (('nightSleep', night), ('nightWakings', wakings), ('longestSleep', longest)):
+            for window in self.windows[metric].values():
+                window.push(value)
+
+        self.good_night_streak = self.good_night_streak + 1 if night >= GOOD_NIGHT_MINUTES else 0
+        self.few_wakings_streak = self.few_wakings_streak + 1 if wakings <= FEW_WAKINGS else 0
+
+        self.new_bests = []
+        if self.nights:
+            if night > self.best_night_sleep:
+                self.new_bests.append('night_sleep')
+            if longest > self.best_longest_sleep:
+                self.new_bests.append('longest_sleep')
+            if wakings < self.fewest_wakings:
+                self.new_bests.append('fewest_wakings')
+        self.best_night_sleep = night if self.best_night_sleep is None else max(self.best_night_sleep, night)
+        self.best_longest_sleep = longest if self.best_longest_sleep is None else max(self.best_longest_sleep, longest)
+        self.fewest_wakings = wakings if self.fewest_wakings is None else min(self.fewest_wakings, wakings)
+
+        self.nights += 1
+        self.last_day = day.isoformat()
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Current trend figures for prompts, messages and API responses
+
+        Returns:
+            Dict of rolling means/standard deviations, streaks and bests
+        """
+        summary: Dict[str, Any] = {'nights': self.nights, 'last_day': self.last_day}
+        for metric in METRICS:
+            for size, window in self.windows[metric].items():
+                key = f'{METRIC_KEYS[metric]}_{size}d'
+                summary[f'{key}_mean'] = None if window.mean is None else round(window.mean, 1)
+                summary[f'{key}_std'] = None if window.std is None else round(window.std, 1)
+        summary.update({
+            'good_night_streak': self.good_night_streak,
+            'few_wakings_streak': self.few_wakings_streak,
+            'best_night_sleep': self.best_night_sleep,
+            'best_longest_sleep': self.best_longest_sleep,
+            'fewest_wakings': self.fewest_wakings,
+            'new_bests': list(self.new_bests),
+        })
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'baby_id': self.baby_id,
+            'nights': self.nights,
+            'last_day': self.last_day,
+            'windows': {metric: list(self.windows[metric][max(WINDOWS)].values) for metric in METRICS},
+            'good_night_streak': self.good_night_streak,
+            'few_wakings_streak': self.few_wakings_streak,
+            'best_night_sleep': self.best_night_sleep,
+            'best_longest_sleep': self.best_longest_sleep,
+            'fewest_wakings': self.fewest_wakings,
+            'new_bests': self.new_bests,
+            'previous': self.previous,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BabyTrends':
+        trends = cls(data['baby_id'])
+        trends.nights = data.get('nights', 0)
+        trends.last_day = data.get('last_day')
+        # Only the longest window is stored; shorter windows are its tail
+        for metric, values in data.get('windows', {}).items():
+            for size in WINDOWS:
+                trends.windows[metric][size] = RollingWindow(size, values[-size:])
+        trends.good_night_streak = data.get('good_night_streak', 0)
+        trends.few_wakings_streak = data.get('few_wakings_streak', 0)
+        trends.best_night_sleep = data.get('best_night_sleep')
+        trends.best_longest_sleep = data.get('best_longest_sleep')
+        trends.fewest_wakings = data.get('fewest_wakings')
+        trends.new_bests = data.get('new_bests', [])
+        trends.previous = data.get('previous')
+        return trends
+
+
+class TrendStore:
+    """Persists BabyTrends as one small JSON file per baby"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['TrendStore']:
+        """Return a store under ZZZGRAMS_STATE_DIR, or None if it is unset"""
+        state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+        return cls(os.path.join(state_dir, 'trends')) if state_dir else None
+
+    def _path(self, baby_id: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', str(baby_id))
+        return os.path.join(self.directory, f'{safe}.json')
+
+    def load(self, baby_id: str) -> BabyTrends:
+        try:
+            with open(self._path(baby_id)) as f:
+                return BabyTrends.from_dict(json.load(f))
+        except FileNotFoundError:
+            return BabyTrends(baby_id)
+
+    def save(self, trends: BabyTrends) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.trend-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(trends.to_dict(), f)
+        os.replace(tmp_path, self._path(trends.baby_id))
+
+    def update(self, baby_id: str, day: Union[date, str], sleep_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Load, update and save a baby's trends
+
+        Args:
+            baby_id: Baby to update
+            day: Calendar day the night ended on
+            sleep_data: SleepData as a dict
+
+        Returns:
+            The updated trend summary
+        """
+        return self.advance(baby_id, day, sleep_data)[1]
+
+    def advance(self, baby_id: str, day: Union[date, str],
+                sleep_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Like update, but also return the summary from before this night
+
+        A rerun for the night that was last counted (a retry or re-invoke)
+        gets the baseline from before that night, not one that includes it.
+
+        Returns:
+            Tuple of (baseline summary, updated summary)
+        """
+        trends = self.load(baby_id)
+        baseline = trends.summary()
+        if trends.update(day, sleep_data):
+            self.save(trends)
+        elif trends.previous is not None and _to_date(day).isoformat() == trends.last_day:
+            baseline = trends.previous
+        return baseline, trends.summary()
+
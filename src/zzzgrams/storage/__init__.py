@@ -0,0 +1,24 @@
+"""
+Local storage formats for sleep history and derived results.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .history_file import HistoryReader, write_history, merge_history
+    from .payload_archive import PayloadArchive
+    from .result_store import ResultStore
+
+_EXPORTS = {
+    'HistoryReader': '.history_file',
+    'write_history': '.history_file',
+    'merge_history': '.history_file',
+    'PayloadArchive': '.payload_archive',
+    'ResultStore': '.result_store',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
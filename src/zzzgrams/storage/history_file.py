@@ -0,0 +1,285 @@
+"""
+Fixed-width binary file format for stored SleepData history.
+
+Layout (little endian)::
+
+    header   48 bytes   magic, version, flags, record size, baby count,
+                        record count, records offset (index follows header)
+    index    48 bytes   per baby: id (32 bytes, utf-8), first record, count;
+                        sorted by baby id
+    records  48 bytes   per baby-day: day, naps, nightWakings, padding and the
+                        four durations in minutes; sorted by baby then day
+
+Readers ``mmap`` the file and expose NumPy views onto it, so opening years of
+history costs a header parse and a date-range read is two binary searches
+with no copying or JSON parsing.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from ..models.sleep_data_batch import FIELDS, SleepDataBatch
+
+MAGIC = b'ZZZH'
+VERSION = 1
+EPOCH = date(1970, 1, 1)
+MAX_BABY_ID_BYTES = 32
+
+HEADER = struct.Struct('<4sHHIQQQ')
+HEADER_SIZE = 48
+
+INDEX_DTYPE = np.dtype([
+    ('baby_id', f'S{MAX_BABY_ID_BYTES}'),
+    ('first', '<u8'),
+    ('count', '<u8'),
+])
+
+RECORD_DTYPE = np.dtype([
+    ('day', '<i4'),
+    ('naps', '<i4'),
+    ('nightWakings', '<i4'),
+    ('_pad', '<i4'),
+    ('longestSleep', '<f8'),
+    ('totalSleep', '<f8'),
+    ('daySleep', '<f8'),
+    ('nightSleep', '<f8'),
+])
+
+DayLike = Union[date, str, int]
+
+
+def to_day_number(day: DayLike) -> int:
+    """
+    Convert a date, ISO date string or day number to days since 1970-01-01
+
+    Args:
+        day: date, 'YYYY-MM-DD' string (a time part is ignored) or int
+
+    Returns:
+        int: Day number
+    """
+    if isinstance(day, (int, np.integer)):
+        return int(day)
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return (day - EPOCH).days
+
+
+def from_day_number(day: int) -> date:
+    """Convert a day number back to a date"""
+    return EPOCH + timedelta(days=int(day))
+
+
+def _encode_baby_id(baby_id: str) -> bytes:
+    encoded = str(baby_id).encode('utf-8')
+    if len(encoded) > MAX_BABY_ID_BYTES:
+        raise ValueError(f"Baby id longer than {MAX_BABY_ID_BYTES} bytes: {baby_id!r}")
+    return encoded
+
+
+def write_history(path: str, baby_ids: Sequence[str], days: Sequence[DayLike], batch: SleepDataBatch) -> int:
+    """
+    Write history rows to a new file, replacing any existing file atomically
+
+    Rows may arrive in any order; they are sorted by baby and day. When a
+    (baby, day) pair repeats, the last occurrence wins.
+
+    Args:
+        path: Destination file
+        baby_ids: Baby id of each row
+        days: Day of each row
+        batch: Sleep values of each row
+
+    Returns:
+        int: Number of records written
+    """
+    count = len(batch)
+    if len(baby_ids) != count or len(days) != count:
+        raise ValueError("baby_ids, days and batch must have the same length")
+
+    # Factorize ids once so sorting works on small integers, not strings
+    unique_ids, codes = np.unique(np.asarray(baby_ids, dtype=object).astype(str), return_inverse=True)
+    encoded_ids = np.array([_encode_baby_id(b) for b in unique_ids], dtype=INDEX_DTYPE['baby_id'])
+    if isinstance(days, np.ndarray) and days.dtype.kind in 'iu':
+        day_numbers = days.astype(np.int32)
+    else:
+        day_numbers = np.fromiter((to_day_number(d) for d in days), dtype=np.int32, count=count)
+
+    # Stable sort by (baby, day); keep the last row of each duplicate pair
+    order = np.lexsort((np.arange(count), day_numbers, codes))
+    codes, day_numbers = codes[order], day_numbers[order]
+    if count:
+        keep = np.ones(count, dtype=bool)
+        keep[:-1] = (codes[1:] != codes[:-1]) | (day_numbers[1:] != day_numbers[:-1])
+        order, codes, day_numbers = order[keep], codes[keep], day_numbers[keep]
+
+    records = np.zeros(len(order), dtype=RECORD_DTYPE)
+    records['day'] = day_numbers
+    for field in FIELDS:
+        records[field] = batch.column(field)[order]
+
+    # UTF-8 byte order matches code point order, so the index stays sorted
+    present, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    index = np.zeros(len(present), dtype=INDEX_DTYPE)
+    index['baby_id'] = encoded_ids[present]
+    index['first'] = first
+    index['count'] = counts
+
+    index_offset = HEADER_SIZE
+    records_offset = index_offset + index.nbytes
+    header = HEADER.pack(MAGIC, VERSION, 0, RECORD_DTYPE.itemsize, len(index), len(records), records_offset)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.history-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            f.write(index.tobytes())
+            f.write(records.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(records)
+
+
+def merge_history(path: str, baby_ids: Sequence[str], days: Sequence[DayLike], batch: SleepDataBatch) -> int:
+    """
+    Add or replace rows in a history file, creating it if needed
+
+    Args:
+        path: History file
+        baby_ids: Baby id of each new row
+        days: Day of each new row
+        batch: Sleep values of each new row
+
+    Returns:
+        int: Number of records in the rewritten file
+    """
+    if not os.path.exists(path):
+        return write_history(path, baby_ids, days, batch)
+
+    with HistoryReader(path) as reader:
+        old = reader.records
+        old_ids = np.repeat(np.array(reader.babies(), dtype=str), reader.index['count'].astype(np.int64))
+        merged_ids = np.concatenate([old_ids, np.asarray(baby_ids, dtype=str)])
+        new_days = np.fromiter((to_day_number(d) for d in days), dtype=np.int32, count=len(days))
+        merged_days = np.concatenate([old['day'], new_days])
+        merged = SleepDataBatch(**{
+            field: np.concatenate([old[field], batch.column(field)]) for field in FIELDS
+        })
+    return write_history(path, merged_ids, merged_days, merged)
+
+
+class HistoryRange:
+    """Zero-copy view of one baby's records over a date range"""
+
+    __slots__ = ('baby_id', 'records')
+
+    def __init__(self, baby_id: str, records: np.ndarray):
+        self.baby_id = baby_id
+        self.records = records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def days(self) -> np.ndarray:
+        return self.records['day']
+
+    @property
+    def batch(self) -> SleepDataBatch:
+        """The range as a SleepDataBatch whose columns view the file"""
+        return SleepDataBatch(**{field: self.records[field] for field in FIELDS})
+
+    def dates(self) -> List[date]:
+        return [from_day_number(day) for day in self.records['day']]
+
+
+class HistoryReader:
+    """Memory-mapped reader for history files"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a history file")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, record_size, baby_count, record_count, records_offset = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a history file")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"Unsupported history file version {version} in {path}")
+
+        self.index = np.frombuffer(self._mmap, dtype=INDEX_DTYPE, count=baby_count, offset=HEADER_SIZE)
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=record_count, offset=records_offset)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def babies(self) -> List[str]:
+        return [baby_id.decode('utf-8') for baby_id in self.index['baby_id']]
+
+    def _locate(self, baby_id: str) -> Optional[int]:
+        key = _encode_baby_id(baby_id)
+        position = int(np.searchsorted(self.index['baby_id'], key))
+        if position < len(self.index) and self.index['baby_id'][position] == key:
+            return position
+        return None
+
+    def read(self, baby_id: str, start: Optional[DayLike] = None, end: Optional[DayLike] = None) -> HistoryRange:
+        """
+        Return a baby's records between two days, inclusive
+
+        Args:
+            baby_id: Baby to read
+            start: First day, or None for the earliest record
+            end: Last day, or None for the latest record
+
+        Returns:
+            HistoryRange viewing the mapped file (empty if the baby is unknown)
+        """
+        position = self._locate(baby_id)
+        if position is None:
+            return HistoryRange(baby_id, self.records[:0])
+        first = int(self.index['first'][position])
+        records = self.records[first:first + int(self.index['count'][position])]
+        days = records['day']
+        lo = 0 if start is None else int(np.searchsorted(days, to_day_number(start), side='left'))
+        hi = len(records) if end is None else int(np.searchsorted(days, to_day_number(end), side='right'))
+        return HistoryRange(baby_id, records[lo:hi])
+
+    def latest(self, baby_id: str, count: int = 1) -> HistoryRange:
+        """Return a baby's most recent records"""
+        full = self.read(baby_id)
+        return HistoryRange(baby_id, full.records[max(len(full) - count, 0):])
+
+    def close(self) -> None:
+        self.index = None
+        self.records = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views handed out by read() are still alive; the mapping is
+                # released when the last of them is garbage collected
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> 'HistoryReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
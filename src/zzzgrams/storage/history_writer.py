@@ -0,0 +1,95 @@
+"""
+Recording analyzed nights into the history file.
+
+Each merge rewrites the file, so single runs merge their night straight away
+while a scheduler bucket collects its nights and merges them with one
+rewrite. A lock file serializes merges across threads and processes. NumPy
+is only imported when a merge actually happens.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# (path, baby id, day, SleepData dict as returned by asdict)
+Night = Tuple[str, str, Union[date, str], Dict[str, Any]]
+
+_collected: ContextVar[Optional[List[Night]]] = ContextVar('zzzgrams_history_nights', default=None)
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Serialize read-merge-write cycles on one file across threads and processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def merge_nights(nights: Sequence[Night]) -> int:
+    """
+    Merge nights into their history files, one rewrite per file
+
+    Returns:
+        int: Nights merged
+    """
+    if not nights:
+        return 0
+    from ..models.sleep_data import SleepData
+    from ..models.sleep_data_batch import SleepDataBatch
+    from .history_file import merge_history
+
+    by_path: Dict[str, List[Night]] = {}
+    for night in nights:
+        by_path.setdefault(night[0], []).append(night)
+    for path, rows in by_path.items():
+        # The dicts are already in minutes, unlike the raw payloads from_dicts expects
+        batch = SleepDataBatch.from_sleep_data(SleepData(**row[3]) for row in rows)
+        with _locked(path):
+            merge_history(path, [row[1] for row in rows], [row[2] for row in rows], batch)
+    return len(nights)
+
+
+def record_night(path: str, baby_id: str, day: Union[date, str], sleep_data: Dict[str, Any]) -> None:
+    """
+    Store one night, merging it now or when the active collect_nights() block ends
+
+    Args:
+        path: History file
+        baby_id: Baby the night belongs to
+        day: Day the night ended on
+        sleep_data: SleepData as a dict
+    """
+    collected = _collected.get()
+    if collected is not None:
+        collected.append((path, baby_id, day, sleep_data))
+    else:
+        merge_nights([(path, baby_id, day, sleep_data)])
+
+
+@contextmanager
+def collect_nights() -> Iterator[List[Night]]:
+    """
+    Hold back record_night calls made in this context, including copies of
+    it handed to worker threads, for one merge_nights() call later
+
+    Yields:
+        The list the nights are collected into
+    """
+    nights: List[Night] = []
+    token = _collected.set(nights)
+    try:
+        yield nights
+    finally:
+        _collected.reset(token)
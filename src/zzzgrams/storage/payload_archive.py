@@ -0,0 +1,310 @@
+"""
+Append-only archive of raw Snoo responses.
+
+Every sessions payload is stored exactly as received, so it can be audited
+or re-parsed later without calling the API. Payloads are small and very
+alike, so compressing each one on its own does little. Instead a shared
+dictionary is trained from the first payloads: zstd's trainer when
+``zstandard`` is installed, otherwise a zlib preset dictionary. Identical
+payloads are stored once, keyed by their SHA-256.
+
+Layout of an archive directory:
+
+- ``blobs.dat``: compressed payloads, appended back to back
+- ``index.sqlite``: per-blob offsets, the (baby, day) index and the dictionaries
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only without zstandard
+    zstandard = None
+
+DayLike = Union[date, str]
+
+# zlib only looks back 32 KiB, so a larger preset dictionary is wasted
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 16 * 1024
+# Payloads kept as training samples before the first dictionary is built
+DEFAULT_TRAIN_AFTER = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (id INTEGER PRIMARY KEY, codec TEXT NOT NULL, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL,
+    raw_length INTEGER NOT NULL, codec TEXT NOT NULL, dict_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    baby_id TEXT NOT NULL, day TEXT NOT NULL, hash TEXT NOT NULL, archived_at REAL NOT NULL,
+    PRIMARY KEY (baby_id, day)
+);
+CREATE TABLE IF NOT EXISTS samples (hash TEXT PRIMARY KEY, data BLOB NOT NULL);
+"""
+
+
+def _day(day: DayLike) -> str:
+    return day.isoformat() if isinstance(day, date) else str(day)[:10]
+
+
+def train_zlib_dictionary(samples: List[bytes], size: int = ZLIB_DICT_SIZE) -> bytes:
+    """
+    Build a zlib preset dictionary from sample payloads
+
+    zlib has no trainer; a concatenation of real samples works well because
+    Snoo payloads share their keys and most of their structure. The most
+    common samples go last, where zlib finds matches most cheaply.
+
+    Args:
+        samples: Raw payloads
+        size: Maximum dictionary size
+
+    Returns:
+        bytes: Dictionary for zlib's zdict
+    """
+    unique = list(dict.fromkeys(samples))
+    data = b''
+    for sample in reversed(unique):
+        if len(data) + len(sample) > size:
+            break
+        data = sample + data
+    return data
+
+
+class PayloadArchive:
+    """Append-only, deduplicated, dictionary-compressed store of raw payloads"""
+
+    def __init__(self, directory: str, codec: Optional[str] = None, train_after: int = DEFAULT_TRAIN_AFTER,
+                 level: Optional[int] = None):
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec == 'zstd' and zstandard is None:
+            raise ImportError("The zstd codec requires zstandard: pip install zstandard")
+        if codec not in ('zstd', 'zlib'):
+            raise ValueError(f"Unknown codec {codec!r}")
+        self.directory = directory
+        self.codec = codec
+        self.train_after = train_after
+        self.level = level if level is not None else 9
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, 'blobs.dat')
+        self.index_path = os.path.join(directory, 'index.sqlite')
+        self._local = threading.local()
+        self._dictionaries: Dict[int, Tuple[str, bytes]] = {}
+        self._connection().executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional['PayloadArchive']:
+        """Return an archive under ZZZGRAMS_STATE_DIR, or None if it is unset"""
+        state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+        return cls(os.path.join(state_dir, 'archive')) if state_dir else None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # The write lock also serializes appends to blobs.dat across processes
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def put(self, baby_id: str, day: DayLike, payload: Union[bytes, str, Dict[str, Any]]) -> str:
+        """
+        Archive one raw payload
+
+        Args:
+            baby_id: Baby the payload belongs to
+            day: Day the payload covers; a later put for the same day replaces the index entry
+            payload: Raw response bytes, or a parsed payload (stored as compact JSON)
+
+        Returns:
+            str: SHA-256 of the payload
+        """
+        raw = _to_bytes(payload)
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._transaction() as db:
+            if db.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone() is None:
+                dict_id = self._current_dictionary(db)
+                compressed = self._compress(raw, dict_id)
+                with open(self.data_path, 'ab') as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(compressed)
+                db.execute('INSERT INTO blobs VALUES (?, ?, ?, ?, ?, ?)',
+                           (digest, offset, len(compressed), len(raw), self._codec_of(dict_id), dict_id))
+                if dict_id is None:
+                    self._add_sample(db, digest, raw)
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                       (str(baby_id), _day(day), digest, time.time()))
+        return digest
+
+    def get_raw(self, baby_id: str, day: DayLike) -> Optional[bytes]:
+        """Return the payload exactly as archived, or None"""
+        row = self._connection().execute(
+            'SELECT b.offset, b.length, b.codec, b.dict_id FROM entries e JOIN blobs b ON b.hash = e.hash '
+            'WHERE e.baby_id = ? AND e.day = ?', (str(baby_id), _day(day))).fetchone()
+        if row is None:
+            return None
+        with open(self.data_path, 'rb') as f:
+            return self._read(f, *row)
+
+    def get(self, baby_id: str, day: DayLike) -> Optional[Dict[str, Any]]:
+        """Return the parsed payload, or None"""
+        raw = self.get_raw(baby_id, day)
+        return None if raw is None else json.loads(raw)
+
+    def iter_payloads(self, baby_id: Optional[str] = None, start: Optional[DayLike] = None,
+                      end: Optional[DayLike] = None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Stream archived payloads in (baby, day) order
+
+        Args:
+            baby_id: Restrict to one baby
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Yields:
+            (baby_id, day, payload) tuples
+        """
+        clauses, params = [], []
+        if baby_id is not None:
+            clauses.append('e.baby_id = ?')
+            params.append(str(baby_id))
+        if start is not None:
+            clauses.append('e.day >= ?')
+            params.append(_day(start))
+        if end is not None:
+            clauses.append('e.day <= ?')
+            params.append(_day(end))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connection().execute(
+            'SELECT e.baby_id, e.day, b.offset, b.length, b.codec, b.dict_id '
+            f'FROM entries e JOIN blobs b ON b.hash = e.hash {where} ORDER BY e.baby_id, e.day', params)
+        with open(self.data_path, 'rb') as f:
+            for row_baby, row_day, offset, length, codec, dict_id in rows:
+                yield row_baby, row_day, json.loads(self._read(f, offset, length, codec, dict_id))
+
+    def reparse(self, baby_id: Optional[str] = None, start: Optional[DayLike] = None,
+                end: Optional[DayLike] = None):
+        """
+        Re-parse archived payloads in bulk without any API calls
+
+        Returns:
+            Tuple of (baby_ids, days, SleepDataBatch)
+        """
+        from ..models.sleep_data_batch import SleepDataBatch
+
+        baby_ids, days, payloads = [], [], []
+        for row_baby, row_day, payload in self.iter_payloads(baby_id, start, end):
+            baby_ids.append(row_baby)
+            days.append(row_day)
+            payloads.append(payload)
+        return baby_ids, days, SleepDataBatch.from_dicts(payloads)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes and counts, e.g. to check the compression ratio"""
+        db = self._connection()
+        blobs, stored, raw = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_length), 0) FROM blobs').fetchone()
+        entries = db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        dictionaries = db.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM dictionaries').fetchone()
+        return {
+            'entries': entries,
+            'unique_payloads': blobs,
+            'raw_bytes': raw,
+            'stored_bytes': stored,
+            'dictionary_bytes': dictionaries[1],
+            'ratio': round(raw / stored, 2) if stored else None,
+        }
+
+    def _codec_of(self, dict_id: Optional[int]) -> str:
+        return self._dictionaries[dict_id][0] if dict_id is not None else self.codec
+
+    def _current_dictionary(self, db: sqlite3.Connection) -> Optional[int]:
+        row = db.execute('SELECT id, codec, data FROM dictionaries WHERE codec = ? ORDER BY id DESC LIMIT 1',
+                         (self.codec,)).fetchone()
+        if row is None:
+            return None
+        self._dictionaries.setdefault(row[0], (row[1], row[2]))
+        return row[0]
+
+    def _add_sample(self, db: sqlite3.Connection, digest: str, raw: bytes) -> None:
+        db.execute('INSERT OR IGNORE INTO samples VALUES (?, ?)', (digest, raw))
+        count = db.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+        if count < self.train_after:
+            return
+        samples = [row[0] for row in db.execute('SELECT data FROM samples ORDER BY rowid')]
+        if self.codec == 'zstd':
+            data = zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+        else:
+            data = train_zlib_dictionary(samples)
+        db.execute('INSERT INTO dictionaries (codec, data) VALUES (?, ?)', (self.codec, data))
+        db.execute('DELETE FROM samples')
+
+    def _dictionary(self, dict_id: int) -> bytes:
+        if dict_id not in self._dictionaries:
+            codec, data = self._connection().execute(
+                'SELECT codec, data FROM dictionaries WHERE id = ?', (dict_id,)).fetchone()
+            self._dictionaries[dict_id] = (codec, data)
+        return self._dictionaries[dict_id][1]
+
+    def _compress(self, raw: bytes, dict_id: Optional[int]) -> bytes:
+        if self.codec == 'zstd':
+            params = {'level': self.level}
+            if dict_id is not None:
+                params['dict_data'] = zstandard.ZstdCompressionDict(self._dictionary(dict_id))
+            return zstandard.ZstdCompressor(**params).compress(raw)
+        if dict_id is None:
+            compressor = zlib.compressobj(self.level)
+        else:
+            compressor = zlib.compressobj(self.level, zdict=self._dictionary(dict_id))
+        return compressor.compress(raw) + compressor.flush()
+
+    def _read(self, f, offset: int, length: int, codec: str, dict_id: Optional[int]) -> bytes:
+        f.seek(offset)
+        compressed = f.read(length)
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ImportError("This archive holds zstd payloads: pip install zstandard")
+            params = {}
+            if dict_id is not None:
+                params['dict_data'] = zstandard.ZstdCompressionDict(self._dictionary(dict_id))
+            return zstandard.ZstdDecompressor(**params).decompress(compressed)
+        if dict_id is None:
+            return zlib.decompress(compressed)
+        decompressor = zlib.decompressobj(zdict=self._dictionary(dict_id))
+        return decompressor.decompress(compressed) + decompressor.flush()
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _to_bytes(payload: Union[bytes, str, Dict[str, Any]]) -> bytes:
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode('utf-8')
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
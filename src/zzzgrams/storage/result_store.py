@@ -0,0 +1,86 @@
+"""
+Latest analysis result per baby, for read-only API routes.
+
+Every saved result is also appended to ``insights.jsonl`` so the text sent to
+families can be exported later without replaying the analysis.
+"""
+
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+LOG_NAME = 'insights.jsonl'
+
+
+class ResultStore:
+    """Keeps each baby's most recent SleepAnalyzerService result as a JSON file"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['ResultStore']:
+        """Return a store under ZZZGRAMS_STATE_DIR, or None if it is unset"""
+        state_dir = os.getenv('ZZZGRAMS_STATE_DIR')
+        return cls(os.path.join(state_dir, 'results')) if state_dir else None
+
+    def path(self, baby_id: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', str(baby_id))
+        return os.path.join(self.directory, f'{safe}.json')
+
+    def save(self, baby_id: str, result: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.result-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, self.path(baby_id))
+        self._append_log(baby_id, result)
+
+    def _append_log(self, baby_id: str, result: Dict[str, Any]) -> None:
+        entry = {
+            'baby_id': baby_id,
+            'timestamp': result.get('timestamp'),
+            'ai_insights': result.get('ai_insights'),
+            'sns_published': result.get('sns_published'),
+            'gate_action': (result.get('gate') or {}).get('action'),
+        }
+        # One write per line in append mode, so concurrent savers never interleave
+        line = json.dumps(entry) + '\n'
+        with open(os.path.join(self.directory, LOG_NAME), 'a') as f:
+            f.write(line)
+
+    def iter_log(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every logged result, oldest first
+
+        Yields:
+            Dicts with baby_id, timestamp, ai_insights, sns_published and gate_action
+        """
+        try:
+            f = open(os.path.join(self.directory, LOG_NAME))
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                # A torn last line from a crashed writer is skipped
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def version(self, baby_id: str) -> Optional[Tuple[int, int]]:
+        """Cheap change marker (mtime, size) without reading the file, or None"""
+        try:
+            st = os.stat(self.path(baby_id))
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self, baby_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(baby_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
@@ -2,6 +2,17 @@
 Utility modules for common functionality.
 """
 
-from .text_cleaner import clean_text_for_json
+from typing import TYPE_CHECKING
 
-__all__ = ['clean_text_for_json'] 
\ No newline at end of file
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .text_cleaner import clean_text_for_json
+
+_EXPORTS = {
+    'clean_text_for_json': '.text_cleaner',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
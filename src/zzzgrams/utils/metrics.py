@@ -0,0 +1,243 @@
+"""
+In-memory metrics buffered per invocation and flushed as CloudWatch
+Embedded Metric Format (EMF) log lines.
+
+Nothing is sent to CloudWatch synchronously: counters and latency histograms
+are accumulated in a MetricsLogger and written as JSON lines on flush, which
+CloudWatch Logs turns into metrics. Locally the same lines go to stdout or to
+the file named by ``ZZZGRAMS_METRICS_FILE``.
+
+Like tracing, the module-level helpers are no-ops unless a scope is active,
+and ``current()`` returns a falsy stand-in so callers can skip work with
+``if m:``.
+"""
+
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+# EMF limits: 100 metrics per document and 100 values per metric
+MAX_METRICS_PER_DOCUMENT = 100
+MAX_VALUES_PER_METRIC = 100
+
+THROTTLE_ERROR_CODES = ('ThrottlingException', 'Throttling', 'TooManyRequestsException', 'RequestLimitExceeded')
+
+_current_logger: ContextVar[Optional['MetricsLogger']] = ContextVar('zzzgrams_metrics', default=None)
+
+
+def metrics_enabled() -> bool:
+    """Return False when metrics are switched off through the environment"""
+    return os.getenv('ZZZGRAMS_METRICS', '1').lower() not in ('0', 'false', 'no')
+
+
+def is_throttle(error: Exception) -> bool:
+    """
+    Check whether an exception is an AWS throttling error
+
+    Args:
+        error: Exception raised by a boto3 client call
+
+    Returns:
+        bool: True if the error code is one of the throttling codes
+    """
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    return response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES
+
+
+class MetricsLogger:
+    """Buffers counters and histograms and flushes them as EMF JSON"""
+
+    def __init__(self, namespace: str = 'Zzzgrams', dimensions: Optional[Dict[str, str]] = None,
+                 stream: Optional[TextIO] = None, path: Optional[str] = None):
+        self.namespace = namespace
+        self.dimensions = dict(dimensions or {})
+        self.stream = stream
+        self.path = path if path is not None else os.getenv('ZZZGRAMS_METRICS_FILE')
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.histograms: Dict[str, Dict[float, int]] = defaultdict(lambda: defaultdict(int))
+        self.units: Dict[str, str] = {}
+        self.properties: Dict[str, Any] = {}
+
+    def __bool__(self) -> bool:
+        return True
+
+    def count(self, name: str, value: float = 1, unit: str = 'Count') -> None:
+        """Add to a counter"""
+        self.counters[name] += value
+        self.units[name] = unit
+
+    def observe(self, name: str, value: float, unit: str = 'Milliseconds') -> None:
+        """Record one sample in a histogram, e.g. a stage latency"""
+        self.histograms[name][round(value, 3)] += 1
+        self.units[name] = unit
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Observe the wall time of the block in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def set_property(self, key: str, value: Any) -> None:
+        """Attach a non-metric field (e.g. a request id) to the log line"""
+        self.properties[key] = value
+
+    def documents(self, timestamp_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Render the buffered metrics as EMF documents
+
+        Args:
+            timestamp_ms: Metric timestamp, defaults to now
+
+        Returns:
+            List of EMF documents respecting the per-document limits
+        """
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+
+        values: List[tuple] = [(name, total) for name, total in self.counters.items()]
+        for name, histogram in self.histograms.items():
+            samples = sorted(histogram.items())
+            # Histograms with many distinct values are split across documents
+            for i in range(0, len(samples), MAX_VALUES_PER_METRIC):
+                chunk = samples[i:i + MAX_VALUES_PER_METRIC]
+                values.append((name, {
+                    'Values': [v for v, _ in chunk],
+                    'Counts': [c for _, c in chunk],
+                }))
+
+        documents = []
+        while values:
+            batch: Dict[str, Any] = {}
+            leftover = []
+            for name, value in values:
+                if name in batch or len(batch) >= MAX_METRICS_PER_DOCUMENT:
+                    leftover.append((name, value))
+                else:
+                    batch[name] = value
+            values = leftover
+            document = {
+                '_aws': {
+                    'Timestamp': timestamp_ms,
+                    'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [sorted(self.dimensions)],
+                        'Metrics': [{'Name': name, 'Unit': self.units[name]} for name in batch],
+                    }],
+                },
+            }
+            document.update(self.properties)
+            document.update(self.dimensions)
+            document.update(batch)
+            documents.append(document)
+        return documents
+
+    def flush(self) -> List[str]:
+        """
+        Write buffered metrics as EMF lines and reset the buffers
+
+        Returns:
+            The JSON lines that were written
+        """
+        lines = [json.dumps(document, separators=(',', ':')) for document in self.documents()]
+        if lines:
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+            else:
+                stream = self.stream or sys.stdout
+                stream.write('\n'.join(lines) + '\n')
+                stream.flush()
+        self.counters.clear()
+        self.histograms.clear()
+        self.units.clear()
+        return lines
+
+
+class _NoopMetrics:
+    """Stand-in returned by current() while no metrics scope is active"""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def count(self, name: str, value: float = 1, unit: str = 'Count') -> None:
+        pass
+
+    def observe(self, name: str, value: float, unit: str = 'Milliseconds') -> None:
+        pass
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        yield
+
+    def set_property(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_METRICS = _NoopMetrics()
+
+
+def current():
+    """Return the active MetricsLogger, or the falsy no-op stand-in"""
+    logger = _current_logger.get()
+    return NOOP_METRICS if logger is None else logger
+
+
+def count(name: str, value: float = 1, unit: str = 'Count') -> None:
+    """Add to a counter in the active scope"""
+    logger = _current_logger.get()
+    if logger is not None:
+        logger.count(name, value, unit)
+
+
+def observe(name: str, value: float, unit: str = 'Milliseconds') -> None:
+    """Record a histogram sample in the active scope"""
+    logger = _current_logger.get()
+    if logger is not None:
+        logger.observe(name, value, unit)
+
+
+def timer(name: str):
+    """Time a block into the active scope's histogram"""
+    return current().timer(name)
+
+
+@contextmanager
+def metrics_scope(namespace: str = 'Zzzgrams', dimensions: Optional[Dict[str, str]] = None,
+                  enabled: Optional[bool] = None, **kwargs: Any) -> Iterator[Optional[MetricsLogger]]:
+    """
+    Buffer metrics for the duration of the block and flush once on exit
+
+    Args:
+        namespace: CloudWatch namespace
+        dimensions: Dimensions applied to every metric
+        enabled: Force metrics on or off; defaults to ``ZZZGRAMS_METRICS``
+        **kwargs: Passed to MetricsLogger (stream, path)
+
+    Yields:
+        The active MetricsLogger, or None when metrics are disabled
+    """
+    if enabled is None:
+        enabled = metrics_enabled()
+    if not enabled:
+        yield None
+        return
+
+    logger = MetricsLogger(namespace, dimensions, **kwargs)
+    token = _current_logger.set(logger)
+    try:
+        yield logger
+    finally:
+        _current_logger.reset(token)
+        logger.flush()
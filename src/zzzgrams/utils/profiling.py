@@ -0,0 +1,176 @@
+"""
+Opt-in cProfile/tracemalloc profiling for handler invocations.
+
+Profiling is requested with ``ZZZGRAMS_PROFILE=cpu``, ``mem`` or ``cpu,mem``
+(or ``"profile": "cpu,mem"`` in the event). Environment-requested profiling is
+sampled: with ``ZZZGRAMS_PROFILE_SAMPLE=K`` roughly one in K invocations is
+profiled. An event flag always profiles, since it is an explicit request.
+
+Reports are printed as a structured log line and written to
+``ZZZGRAMS_PROFILE_DIR`` (default ``/tmp``), together with a ``.prof`` file
+that can be loaded into pstats or snakeviz.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+VALID_MODES = {'cpu', 'mem'}
+
+
+def parse_modes(value: Any) -> Set[str]:
+    """
+    Parse a profile request into a set of modes
+
+    Args:
+        value: ``True``, or a comma separated string such as ``"cpu,mem"``
+
+    Returns:
+        Set of requested modes; empty when profiling is not requested
+    """
+    if value is True:
+        return {'cpu'}
+    if not value or not isinstance(value, str):
+        return set()
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return {'cpu'}
+    if value == 'all':
+        return set(VALID_MODES)
+    return {mode.strip() for mode in value.split(',')} & VALID_MODES
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer knob, falling back to the default on a malformed value"""
+    value = os.getenv(name)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        print(f"Ignoring invalid {name}={value!r}, using {default}")
+        return default
+
+
+def requested_modes(event: Optional[Dict[str, Any]] = None,
+                    rng: Callable[[], float] = random.random) -> Set[str]:
+    """
+    Decide which profilers to run for this invocation
+
+    Args:
+        event: Lambda event, which may carry a ``profile`` flag
+        rng: Random source used for 1-in-K sampling
+
+    Returns:
+        Set of modes to enable for this invocation
+    """
+    if isinstance(event, dict) and event.get('profile'):
+        return parse_modes(event['profile'])
+
+    modes = parse_modes(os.getenv('ZZZGRAMS_PROFILE', ''))
+    if not modes:
+        return set()
+    sample_every = max(_env_int('ZZZGRAMS_PROFILE_SAMPLE', 1), 1)
+    if sample_every > 1 and rng() >= 1.0 / sample_every:
+        return set()
+    return modes
+
+
+def _cpu_top(profiler: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({func})",
+            'ncalls': nc,
+            'tottime_ms': round(tt * 1000, 3),
+            'cumtime_ms': round(ct * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:top_n]
+
+
+def _alloc_top(snapshot: tracemalloc.Snapshot, top_n: int) -> List[Dict[str, Any]]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+    return [
+        {
+            'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:top_n]
+    ]
+
+
+@contextmanager
+def maybe_profile(event: Optional[Dict[str, Any]] = None, name: str = 'lambda_handler',
+                  modes: Optional[Set[str]] = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Profile the block when requested by the event or environment
+
+    Args:
+        event: Lambda event, which may carry a ``profile`` flag
+        name: Label used in the report and output file names
+        modes: Explicit modes, overriding the event and environment
+
+    Yields:
+        The report dict (filled in on exit), or None when not profiling
+    """
+    if modes is None:
+        modes = requested_modes(event)
+    if not modes:
+        yield None
+        return
+
+    top_n = _env_int('ZZZGRAMS_PROFILE_TOP', 20)
+    out_dir = os.getenv('ZZZGRAMS_PROFILE_DIR', '/tmp')
+    report: Dict[str, Any] = {'type': 'profile', 'name': name, 'modes': sorted(modes)}
+
+    profiler = cProfile.Profile() if 'cpu' in modes else None
+    started_tracemalloc = 'mem' in modes and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(max(_env_int('ZZZGRAMS_PROFILE_FRAMES', 1), 1))
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler:
+            profiler.disable()
+        report['wall_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        stamp = f"{name}-{int(time.time() * 1000)}"
+
+        try:
+            if profiler:
+                report['cpu_top'] = _cpu_top(profiler, top_n)
+            if 'mem' in modes:
+                current, peak = tracemalloc.get_traced_memory()
+                report['current_kb'] = round(current / 1024, 1)
+                report['peak_kb'] = round(peak / 1024, 1)
+                report['alloc_top'] = _alloc_top(tracemalloc.take_snapshot(), top_n)
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+        # The profiled block has already run; failing to save must not change its outcome
+        try:
+            if profiler:
+                profile_path = os.path.join(out_dir, f"{stamp}.prof")
+                profiler.dump_stats(profile_path)
+                report['profile_path'] = profile_path
+            report_path = os.path.join(out_dir, f"{stamp}.json")
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            report['report_path'] = report_path
+        except Exception as e:
+            print(f"Error writing profile to {out_dir}: {str(e)}")
+        print(json.dumps(report))
@@ -0,0 +1,257 @@
+"""
+Host-wide rate limiting and circuit breaking for upstream APIs.
+
+State lives in a small SQLite file so every thread and process on the host
+shares one token bucket and one breaker per upstream. When the upstream
+degrades, the breaker opens after a run of failures and callers fail fast
+with CircuitOpenError instead of each waiting out its own timeout. After a
+cool-down, a single caller is let through as a half-open probe and its
+outcome closes or re-opens the circuit.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from . import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS breakers (
+    name TEXT PRIMARY KEY, state TEXT NOT NULL, failures INTEGER NOT NULL,
+    opened_at REAL NOT NULL, probe_until REAL NOT NULL
+);
+"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for {name} is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a token would not be available within the allowed wait"""
+
+
+class SharedState:
+    """SQLite file holding limiter and breaker state for one host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread, and re-opened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive read-modify-write across threads and processes"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+class TokenBucket:
+    """Token bucket shared through SharedState"""
+
+    def __init__(self, state: SharedState, name: str, rate: float, capacity: float,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        self.state = state
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available
+
+        Returns:
+            float: 0.0 if taken, otherwise seconds until enough tokens refill
+        """
+        with self.state.transaction() as db:
+            row = db.execute('SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)).fetchone()
+            now = self.clock()
+            if row is None:
+                available = self.capacity
+            else:
+                available = min(self.capacity, row[0] + max(now - row[1], 0.0) * self.rate)
+            wait = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+            db.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (self.name, available, now))
+        return wait
+
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """
+        Take tokens, sleeping until they are available
+
+        Args:
+            tokens: Tokens to take
+            max_wait: Give up with RateLimitExceeded rather than wait longer
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return waited
+            if max_wait is not None and waited + wait > max_wait:
+                raise RateLimitExceeded(f"Rate limit for {self.name}: no token within {max_wait}s")
+            self.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared through SharedState"""
+
+    def __init__(self, state: SharedState, name: str, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, probe_timeout: float = 10.0,
+                 clock: Callable[[], float] = time.time, metric_prefix: str = ''):
+        self.state = state
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # How long one half-open probe may run before another caller may probe
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.metric_prefix = metric_prefix
+
+    def _read(self, db: sqlite3.Connection):
+        row = db.execute('SELECT state, failures, opened_at, probe_until FROM breakers WHERE name = ?',
+                         (self.name,)).fetchone()
+        return row or (CLOSED, 0, 0.0, 0.0)
+
+    def _write(self, db: sqlite3.Connection, state: str, failures: int, opened_at: float, probe_until: float):
+        db.execute('INSERT OR REPLACE INTO breakers VALUES (?, ?, ?, ?, ?)',
+                   (self.name, state, failures, opened_at, probe_until))
+
+    @property
+    def current_state(self) -> str:
+        with self.state.transaction() as db:
+            return self._read(db)[0]
+
+    def before_call(self) -> str:
+        """
+        Admit or reject a call
+
+        Returns:
+            str: CLOSED for a normal call, HALF_OPEN if this call is the probe
+
+        Raises:
+            CircuitOpenError: While open, or while another caller is probing
+        """
+        with self.state.transaction() as db:
+            state, failures, opened_at, probe_until = self._read(db)
+            now = self.clock()
+            if state == CLOSED:
+                return CLOSED
+            if state == OPEN and now - opened_at < self.reset_timeout:
+                raise CircuitOpenError(self.name, self.reset_timeout - (now - opened_at))
+            if state == HALF_OPEN and now < probe_until:
+                raise CircuitOpenError(self.name, probe_until - now)
+            self._write(db, HALF_OPEN, failures, opened_at, now + self.probe_timeout)
+        metrics.count(f'{self.metric_prefix}CircuitProbes')
+        return HALF_OPEN
+
+    def record_success(self) -> None:
+        with self.state.transaction() as db:
+            state, failures, _, _ = self._read(db)
+            if state != CLOSED or failures:
+                self._write(db, CLOSED, 0, 0.0, 0.0)
+
+    def record_failure(self) -> None:
+        with self.state.transaction() as db:
+            state, failures, opened_at, _ = self._read(db)
+            failures += 1
+            if state == HALF_OPEN or failures >= self.failure_threshold:
+                opened = state != OPEN
+                self._write(db, OPEN, failures, self.clock(), 0.0)
+            else:
+                opened = False
+                self._write(db, state, failures, opened_at, 0.0)
+        if opened:
+            metrics.count(f'{self.metric_prefix}CircuitOpened')
+
+
+class Guard:
+    """Rate limiter plus circuit breaker around calls to one upstream"""
+
+    def __init__(self, state: SharedState, name: str, rate: float = 5.0, burst: float = 10.0,
+                 max_wait: float = 5.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 metric_prefix: str = '', **clock_options: Any):
+        self.name = name
+        self.limiter = TokenBucket(state, name, rate, burst, **clock_options)
+        self.breaker = CircuitBreaker(state, name, failure_threshold, reset_timeout,
+                                      clock=clock_options.get('clock', time.time), metric_prefix=metric_prefix)
+        self.max_wait = max_wait
+        self.metric_prefix = metric_prefix
+
+    @classmethod
+    def from_env(cls, name: str, metric_prefix: str = '') -> Optional['Guard']:
+        """
+        Build a guard backed by ZZZGRAMS_GUARD_DB, or None if it is unset
+
+        ZZZGRAMS_GUARD_RATE sets requests per second (default 5).
+        """
+        path = os.getenv('ZZZGRAMS_GUARD_DB')
+        if not path:
+            return None
+        rate = float(os.getenv('ZZZGRAMS_GUARD_RATE', '5'))
+        return cls(SharedState(path), name, rate=rate, burst=2 * rate, metric_prefix=metric_prefix)
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call fn through the breaker and limiter
+
+        Exceptions and responses with a 5xx or 429 status count as failures.
+        """
+        prefix = self.metric_prefix
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.count(f'{prefix}CircuitRejected')
+            raise
+        waited = self.limiter.acquire(max_wait=self.max_wait)
+        if waited:
+            metrics.observe(f'{prefix}RateLimitWait', waited * 1000)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        status = getattr(result, 'status_code', None)
+        if status is not None and (status >= 500 or status == 429):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
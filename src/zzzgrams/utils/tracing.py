@@ -0,0 +1,193 @@
+"""
+Lightweight span/timer API for profiling the analysis pipeline.
+
+Tracing is off unless a trace is started (``start_trace``), either explicitly
+or via ``ZZZGRAMS_TRACE=1``. While off, ``span()`` returns a shared no-op
+object, so instrumented code pays a context-variable lookup and nothing else.
+Instrumented code should guard attribute computation with ``if sp:`` because
+the no-op span is falsy.
+"""
+
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('zzzgrams_trace', default=None)
+
+
+def tracing_enabled() -> bool:
+    """Return True when tracing is switched on through the environment"""
+    return os.getenv('ZZZGRAMS_TRACE', '').lower() in ('1', 'true', 'yes')
+
+
+class Span:
+    """A timed, attributed unit of work within a trace"""
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'attributes', 'start', 'duration_ms', 'error')
+
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[int]):
+        self.trace = trace
+        self.name = name
+        self.span_id = len(trace.spans) + 1
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = {}
+        self.start = 0.0
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> 'Span':
+        """Attach attributes such as bytes, status, retries or cache hits"""
+        self.attributes.update(attributes)
+        return self
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __enter__(self) -> 'Span':
+        self.trace._stack.append(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = round((time.perf_counter() - self.start) * 1000, 3)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.trace._stack.pop()
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ms': round((self.start - self.trace.start) * 1000, 3),
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+        }
+        if self.error:
+            span['error'] = self.error
+        return span
+
+
+class _NoopSpan:
+    """Stand-in returned by span() while tracing is off"""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> '_NoopSpan':
+        return self
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Collection of spans recorded for one pipeline run"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.spans: List[Span] = []
+        self._stack: List[int] = []
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def span(self, name: str) -> Span:
+        span = Span(self, name, self._stack[-1] if self._stack else None)
+        self.spans.append(span)
+        return span
+
+    def finish(self) -> None:
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self.start) * 1000, 3)
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Export the trace for inclusion in a response payload
+
+        Returns:
+            Dict with trace id, total duration and the recorded spans
+        """
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'duration_ms': self.duration_ms,
+            'spans': [span.to_dict() for span in self.spans],
+        }
+
+    def log_lines(self) -> List[str]:
+        """
+        Render the trace as one structured JSON log line per span
+
+        Returns:
+            List of JSON strings suitable for CloudWatch Logs Insights
+        """
+        return [
+            json.dumps(dict(span.to_dict(), type='span', trace_id=self.trace_id, trace=self.name))
+            for span in self.spans
+        ]
+
+
+def span(name: str):
+    """
+    Open a span in the current trace
+
+    Args:
+        name: Stage name, e.g. ``snoo.sessions`` or ``bedrock.invoke``
+
+    Returns:
+        Span context manager, or the falsy no-op span when tracing is off
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return trace.span(name)
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the active trace, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, enabled: Optional[bool] = None, log: bool = True) -> Iterator[Optional[Trace]]:
+    """
+    Activate a trace for the duration of the block
+
+    Args:
+        name: Name of the traced operation
+        enabled: Force tracing on or off; defaults to ``ZZZGRAMS_TRACE``
+        log: Whether to print one structured log line per span on exit
+
+    Yields:
+        The active Trace, or None when tracing is disabled
+    """
+    if enabled is None:
+        enabled = tracing_enabled()
+    if not enabled:
+        yield None
+        return
+
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        if log:
+            for line in trace.log_lines():
+                print(line)
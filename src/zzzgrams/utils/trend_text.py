@@ -0,0 +1,34 @@
+"""
+Human readable rendering of trend summaries for prompts and messages.
+"""
+
+from typing import Any, Dict, List
+
+
+def describe_trends(trends: Dict[str, Any]) -> List[str]:
+    """
+    Render a trend summary as short human readable lines
+
+    Args:
+        trends: Output of trend_engine.BabyTrends.summary()
+
+    Returns:
+        List of lines, empty when there is no history yet
+    """
+    if not trends or trends.get('nights', 0) < 2:
+        return []
+    lines = []
+    if trends.get('night_sleep_7d_mean') is not None:
+        lines.append(f"7-night average night sleep: {trends['night_sleep_7d_mean']} minutes "
+                     f"(30-night: {trends['night_sleep_30d_mean']} minutes)")
+    if trends.get('wakings_7d_mean') is not None:
+        lines.append(f"7-night average night wakings: {trends['wakings_7d_mean']}")
+    if trends.get('good_night_streak', 0) >= 2:
+        lines.append(f"Streak: {trends['good_night_streak']} nights in a row with 6+ hours of night sleep")
+    if trends.get('few_wakings_streak', 0) >= 2:
+        lines.append(f"Streak: {trends['few_wakings_streak']} nights in a row with at most one waking")
+    labels = {'night_sleep': 'longest night sleep', 'longest_sleep': 'longest single stretch',
+              'fewest_wakings': 'fewest night wakings'}
+    for best in trends.get('new_bests', []):
+        lines.append(f"New personal best: {labels[best]}")
+    return lines
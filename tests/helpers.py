@@ -0,0 +1,22 @@
+"""
+Fixtures shared by several test modules.
+"""
+
+
+class FakeClock:
+    """Settable stand-in for time.monotonic; sleep() advances it"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def night(minutes: float, wakings: int) -> dict:
+    """One night's sleep data in minutes, as the service passes it around"""
+    return {'naps': 3, 'longestSleep': minutes / 2, 'totalSleep': minutes + 180.0,
+            'daySleep': 180.0, 'nightSleep': minutes, 'nightWakings': wakings}
@@ -1,4 +1,5 @@
 import unittest
+import json
 from unittest.mock import Mock, patch
 import sys
 import os
@@ -113,6 +114,77 @@ class TestBedrockClient(unittest.TestCase):
         self.assertIn("0", prompt)  # Default values
         self.assertIn("baby sleep data", prompt.lower())
 
+    def _packed_response(self, text, reason='FINISH'):
+        body = Mock()
+        body.read.return_value = json.dumps({'results': [{'outputText': text, 'completionReason': reason}]})
+        return {'body': body}
+
+    def test_create_packed_prompt(self):
+        """Test that a packed prompt has the instructions once and a block per family"""
+        prompt = self.client._create_packed_prompt([
+            ({'nightSleep': 300, 'nightWakings': 2}, None),
+            ({'nightSleep': 480, 'nightWakings': 0}, None),
+        ])
+        self.assertIn("=== FAMILY 1 ===", prompt)
+        self.assertIn("=== FAMILY 2 ===", prompt)
+        self.assertLess(prompt.index("300 minutes"), prompt.index("=== FAMILY 2 ==="))
+        self.assertIn("480 minutes", prompt)
+        self.assertEqual(prompt.count("fun, friendly message for the parent."), 1)
+
+    def test_parse_packed_response(self):
+        """Test splitting a packed response, dropping empty, unknown and repeated sections"""
+        text = ("Here you go!\n=== FAMILY 1 ===\nWhat a night!\nCoffee time.\n"
+                "== Family 3 ==\nSo rested\n=== FAMILY 2 ===\n\n=== FAMILY 4 ===\nOops\n"
+                "=== FAMILY 5 ===\nOne\n=== FAMILY 5 ===\nTwo")
+        parsed = self.client._parse_packed_response(text, 5)
+        self.assertEqual(parsed, {1: "What a night!\nCoffee time.", 3: "So rested", 4: "Oops"})
+        self.assertEqual(self.client._parse_packed_response(text, 3), {1: "What a night!\nCoffee time.", 3: "So rested"})
+
+    def test_generate_packed_insights_reruns_missing(self):
+        """Test that families missing from a packed response are re-run on their own"""
+        self.client.bedrock = Mock()
+        self.client.bedrock.invoke_model.return_value = self._packed_response(
+            "=== FAMILY 1 ===\nFirst!\n=== FAMILY 3 ===\nThird!")
+        self.client.generate_sleep_insights = Mock(return_value="Second, alone")
+        families = [({'nightSleep': 300 + i, 'nightWakings': i}, None) for i in range(3)]
+
+        messages = self.client.generate_packed_insights(families)
+
+        self.assertEqual(messages, ["First!", "Second, alone", "Third!"])
+        self.assertEqual(self.client.bedrock.invoke_model.call_count, 1)
+        self.client.generate_sleep_insights.assert_called_once_with(*families[1])
+        body = json.loads(self.client.bedrock.invoke_model.call_args[1]['body'])
+        self.assertEqual(body['textGenerationConfig']['maxTokenCount'],
+                         3 * (BedrockClient.MESSAGE_TOKENS + BedrockClient.PACK_HEADER_TOKENS))
+
+    def test_generate_packed_insights_adapts_pack_size(self):
+        """Test that K fits the output limit and shrinks after a truncated response"""
+        self.assertEqual(self.client.pack_size, 3072 // 210)
+        self.client.pack_size = 4
+        self.client.bedrock = Mock()
+        self.client.bedrock.invoke_model.side_effect = [
+            self._packed_response("=== FAMILY 1 ===\nA\n=== FAMILY 2 ===\nB", reason='LENGTH'),
+        ]
+        self.client.generate_sleep_insights = Mock(side_effect=lambda data, trends: f"solo {data['n']}")
+        families = [({'n': i}, None) for i in range(6)]
+
+        messages = self.client.generate_packed_insights(families)
+
+        # The last section (B) may be cut short, so it is re-run; with one message per call the rest go alone
+        self.assertEqual(messages, ["A", "solo 1", "solo 2", "solo 3", "solo 4", "solo 5"])
+        self.assertEqual(self.client.pack_size, 1)
+        self.client.bedrock.invoke_model.assert_called_once()
+
+    def test_generate_packed_insights_error_falls_back(self):
+        """Test that a failed packed call re-runs every family individually"""
+        self.client.bedrock = Mock()
+        self.client.bedrock.invoke_model.side_effect = Exception("Bedrock API error")
+        self.client.generate_sleep_insights = Mock(return_value="solo")
+        with patch('builtins.print'):
+            messages = self.client.generate_packed_insights([({}, None), ({}, None)])
+        self.assertEqual(messages, ["solo", "solo"])
+        self.assertEqual(self.client.generate_packed_insights([]), [])
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.fakes import FakeSnooServer, FaultProfile
+from benchmarks.e2e import build_service, summarize, run_throughput, run_warm, succeeded
+from benchmarks.synthetic import generate_history, iter_payloads, levels_for, replay_factory
+
+
+class TestBenchmarkStandIns(unittest.TestCase):
+    """Test cases for the end-to-end benchmark stand-ins"""
+
+    def setUp(self):
+        self.server = FakeSnooServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_real_clients_against_stand_ins(self):
+        """Test that the real pipeline completes against the local stand-ins"""
+        service = build_service(self.server, FaultProfile(), FaultProfile())
+
+        with patch('builtins.print'):
+            result = service.analyze_sleep_data()
+
+        self.assertTrue(result['success'])
+        self.assertTrue(result['sns_published'])
+        self.assertEqual(result['sleep_data']['nightSleep'], 600.0)
+        self.assertEqual(result['ai_insights'], 'What a night! Coffee is on its way.')
+        self.assertEqual(self.server.request_counts, {'cognito': 1, 'authorize': 1, 'sessions': 1})
+
+    def test_injected_errors(self):
+        """Test that injected Bedrock and SNS errors surface through the clients"""
+        service = build_service(self.server, FaultProfile(error_rate=1.0), FaultProfile(error_rate=1.0))
+
+        with patch('builtins.print'):
+            result = service.analyze_sleep_data()
+
+        self.assertTrue(result['success'])
+        self.assertIn('ThrottlingException', result['ai_insights'])
+        self.assertFalse(result['sns_published'])
+        self.assertFalse(succeeded(result))
+
+    def test_error_rates_reach_success_rate(self):
+        """Test that each injected fault lowers the reported success rate"""
+        with patch('builtins.print'):
+            bedrock = run_warm(self.server, 2, FaultProfile(error_rate=1.0), FaultProfile())
+            sns = run_warm(self.server, 2, FaultProfile(), FaultProfile(error_rate=1.0))
+            self.server.injector.faults = FaultProfile(error_rate=1.0)
+            snoo = run_warm(self.server, 2, FaultProfile(), FaultProfile())
+
+        self.assertEqual([bedrock['success_rate'], sns['success_rate'], snoo['success_rate']], [0.0, 0.0, 0.0])
+
+    def test_injected_snoo_errors(self):
+        """Test that injected Snoo failures fail the run"""
+        self.server.injector.faults = FaultProfile(error_rate=1.0)
+        service = build_service(self.server, FaultProfile(), FaultProfile())
+
+        result = service.analyze_sleep_data()
+
+        self.assertFalse(result['success'])
+
+    def test_throughput_level(self):
+        """Test a small concurrent throughput run"""
+        with patch('builtins.print'):
+            level = run_throughput(self.server, 2, 4, FaultProfile(), FaultProfile())
+
+        self.assertEqual(level['runs'], 4)
+        self.assertEqual(level['success_rate'], 1.0)
+        self.assertEqual(level['latency_ms']['count'], 4)
+
+    def test_summarize(self):
+        """Test latency percentile summaries"""
+        summary = summarize([float(i) for i in range(1, 101)])
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['p50'], 51.0)
+        self.assertEqual(summary['p99'], 100.0)
+        self.assertEqual(summarize([]), {'count': 0})
+
+
+class TestSyntheticHistory(unittest.TestCase):
+    """Test cases for the synthetic sleep-history generator"""
+
+    def setUp(self):
+        self.history = generate_history(50, 20, seed=7)
+
+    def test_shape_and_order(self):
+        """Test one row per baby-day, ordered by baby then day"""
+        self.assertEqual(len(self.history), 1000)
+        self.assertEqual(self.history.n_days, 20)
+        i = self.history.index_of(3, 5)
+        self.assertEqual(self.history.baby[i], 3)
+        self.assertEqual(self.history.day[i] - self.history.day[self.history.index_of(3, 0)], 5)
+
+    def test_deterministic(self):
+        """Test that the same seed gives the same history"""
+        again = generate_history(50, 20, seed=7)
+        self.assertTrue((again.nightSleep == self.history.nightSleep).all())
+        other = generate_history(50, 20, seed=8)
+        self.assertFalse((other.nightSleep == self.history.nightSleep).all())
+
+    def test_plausible_values(self):
+        """Test internal consistency of the generated aggregates"""
+        h = self.history
+        self.assertTrue((h.longestSleep <= h.nightSleep).all())
+        self.assertTrue((abs(h.daySleep + h.nightSleep - h.totalSleep) <= 2).all())
+        self.assertTrue((h.naps >= 1).all())
+        self.assertTrue((h.nightWakings >= 0).all())
+        self.assertTrue(9 * 3600 <= h.totalSleep.min() and h.totalSleep.max() <= 19 * 3600)
+
+    def test_levels_cover_night_sleep(self):
+        """Test that asleep segments add up to the night sleep"""
+        for i in range(20):
+            segments = levels_for(self.history, i)
+            asleep = sum(s['duration'] for s in segments if s['type'] == 'asleep')
+            self.assertAlmostEqual(asleep, int(self.history.nightSleep[i]), delta=len(segments))
+            self.assertEqual(sum(s['type'] != 'asleep' for s in segments), int(self.history.nightWakings[i]))
+
+    def test_payloads_and_replay(self):
+        """Test payload iteration and per-baby sequential replay"""
+        baby_id, day, payload = next(iter_payloads(self.history, levels=True))
+        self.assertEqual(baby_id, 'baby-0000000')
+        self.assertIn('levels', payload)
+        self.assertEqual(set(payload) - {'levels'},
+                         {'naps', 'longestSleep', 'totalSleep', 'daySleep', 'nightSleep', 'nightWakings'})
+
+        factory = replay_factory(self.history)
+        first = factory('baby-0000002', '', '')
+        second = factory('baby-0000002', '', '')
+        self.assertEqual(first, self.history.row(self.history.index_of(2, 0)))
+        self.assertEqual(second, self.history.row(self.history.index_of(2, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import sys
+import os
+import tempfile
+import time
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks.cassettes import (
+    REDACTED, CassetteMismatchError, iter_exchanges, recording_session, replay_session, scrub, scrub_url
+)
+from benchmarks.e2e import build_service
+from benchmarks.fakes import FakeSnooServer, FaultProfile
+from zzzgrams.clients.snoo_client import SnooClient
+
+
+class TestCassettes(unittest.TestCase):
+    """Test cases for HTTP cassette record/replay"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'snoo.cassette.gz')
+
+        with FakeSnooServer(FaultProfile(latency_ms=30)) as server:
+            session = recording_session(self.path)
+            client = SnooClient(email='parent@example.com', password='hunter2', baby_id='b1', session=session)
+            server.configure_client(client)
+            self.recorded = client.get_sleep_data(as_object=False)
+            session.close()
+
+    def test_cassette_is_compressed_and_scrubbed(self):
+        """Test that secrets never reach the cassette"""
+        with gzip.open(self.path, 'rt') as f:
+            raw = f.read()
+        self.assertNotIn('hunter2', raw)
+        self.assertNotIn('parent@example.com', raw)
+        self.assertNotIn('fake-id', raw)
+        self.assertNotIn('Bearer', raw)
+
+        exchanges = list(iter_exchanges(self.path))
+        self.assertEqual([e['request']['method'] for e in exchanges], ['POST', 'POST', 'GET'])
+        self.assertEqual(exchanges[0]['request']['body']['json']['AuthParameters']['PASSWORD'], REDACTED)
+        self.assertEqual(exchanges[2]['request']['headers']['authorization'], REDACTED)
+        self.assertGreaterEqual(exchanges[2]['elapsed'], 0.03)
+
+    def test_cassette_does_not_identify_family(self):
+        """Test that recorded URLs and bodies carry no baby id, timezone or time window"""
+        with gzip.open(self.path, 'rt') as f:
+            raw = f.read()
+        self.assertNotIn('/babies/b1/', raw)
+        self.assertNotIn('America', raw)
+        self.assertNotIn('startTime', raw)
+        url = list(iter_exchanges(self.path))[2]['request']['url']
+        self.assertTrue(url.endswith('/babies/*/sessions/daily'))
+        self.assertEqual(scrub_url('https://h/ss/me/v10/babies/abc/sessions/daily?timezone=UTC'),
+                         'https://h/ss/me/v10/babies/*/sessions/daily')
+
+    def test_replay_matches_recording(self):
+        """Test that a replayed run returns the recorded payload offline"""
+        client = SnooClient(email='x', password='y', baby_id='b1', session=replay_session(self.path, speed=0))
+        self.assertEqual(client.get_sleep_data(as_object=False), self.recorded)
+
+    def test_replay_timing(self):
+        """Test recorded versus accelerated replay timing"""
+        client = SnooClient(email='x', password='y', baby_id='b1', session=replay_session(self.path, speed=1.0))
+        start = time.perf_counter()
+        client.get_sleep_data()
+        recorded_time = time.perf_counter() - start
+
+        client = SnooClient(email='x', password='y', baby_id='b1', session=replay_session(self.path, speed=100.0))
+        start = time.perf_counter()
+        client.get_sleep_data()
+        accelerated_time = time.perf_counter() - start
+
+        self.assertGreaterEqual(recorded_time, 0.09)
+        self.assertLess(accelerated_time, recorded_time / 2)
+
+    def test_exhausted_cassette(self):
+        """Test that requests beyond the recording fail unless looping"""
+        client = SnooClient(email='x', password='y', baby_id='b1', session=replay_session(self.path, speed=0))
+        client.get_sleep_data()
+        with self.assertRaises(CassetteMismatchError):
+            client.get_sleep_data()
+
+        client = SnooClient(email='x', password='y', baby_id='b1',
+                            session=replay_session(self.path, speed=0, loop=True))
+        client.get_sleep_data()
+        client.get_sleep_data()
+
+    def test_benchmark_service_from_cassette(self):
+        """Test the end-to-end service running on a cassette"""
+        service = build_service(None, FaultProfile(), FaultProfile(), cassette=self.path, cassette_speed=0)
+        with patch('builtins.print'):
+            result = service.analyze_sleep_data()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['sleep_data']['nightSleep'], 600.0)
+
+    def test_scrub(self):
+        """Test recursive scrubbing of sensitive keys"""
+        self.assertEqual(scrub({'a': [{'IdToken': 't'}], 'b': 1}), {'a': [{'IdToken': REDACTED}], 'b': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
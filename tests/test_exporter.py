@@ -0,0 +1,146 @@
+import unittest
+import csv
+import importlib.util
+import io
+import json
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.models.sleep_data_batch import SleepDataBatch
+from zzzgrams.services.exporter import ExportSource, export, iter_sleep_chunks, main
+from zzzgrams.services.trend_engine import TrendStore
+from zzzgrams.storage.history_file import write_history
+from zzzgrams.storage.result_store import ResultStore
+
+
+class TestExporter(unittest.TestCase):
+    """Test cases for the bulk exporter"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_dir = tmp.name
+        start = date(2025, 1, 1)
+        baby_ids, days, records = [], [], []
+        for baby, nights in (('alpha', 5), ('beta', 3)):
+            for i in range(nights):
+                baby_ids.append(baby)
+                days.append(start + timedelta(days=i))
+                records.append(SleepData(2, 200.0, 600.0 + i, 180.0, 420.0 + i, i))
+        write_history(os.path.join(tmp.name, 'history.zzh'), baby_ids, days,
+                      SleepDataBatch.from_sleep_data(records))
+
+        trends = TrendStore(os.path.join(tmp.name, 'trends'))
+        for i in range(3):
+            trends.update('alpha', start + timedelta(days=i), {'nightSleep': 400.0 + 10 * i, 'nightWakings': 1})
+
+        results = ResultStore(os.path.join(tmp.name, 'results'))
+        results.save('alpha', {'timestamp': '2025-01-01T07:00:00-05:00', 'ai_insights': 'Great, "quiet" night',
+                               'sns_published': True, 'gate': {'action': 'bedrock'}})
+        results.save('beta', {'timestamp': '2025-01-02T07:00:00-05:00', 'ai_insights': 'Line one\nline two',
+                              'sns_published': False})
+        self.source = ExportSource(tmp.name)
+
+    def test_sleep_csv(self):
+        """Test exporting nights from the history file as CSV"""
+        out = io.StringIO()
+        rows = export('sleep', 'csv', out, self.source)
+        self.assertEqual(rows, 8)
+        table = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(table[0]['baby_id'], 'alpha')
+        self.assertEqual(table[0]['day'], '2025-01-01')
+        self.assertEqual(float(table[4]['nightSleep']), 424.0)
+        self.assertEqual(table[-1]['baby_id'], 'beta')
+
+    def test_sleep_filters_and_chunks(self):
+        """Test baby and date filters and fixed-size chunks"""
+        source = ExportSource(self.state_dir, babies=['alpha'], start=date(2025, 1, 2), end=date(2025, 1, 4))
+        chunks = list(iter_sleep_chunks(source, chunk_size=2))
+        self.assertEqual([len(chunk['day']) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[0]['day'], ['2025-01-02', '2025-01-03'])
+
+        # Chunks span babies and never exceed chunk_size
+        chunks = list(iter_sleep_chunks(self.source, chunk_size=3))
+        self.assertEqual([len(chunk['day']) for chunk in chunks], [3, 3, 2])
+        self.assertEqual(chunks[1]['baby_id'], ['alpha', 'alpha', 'beta'])
+
+    def test_trends_ndjson(self):
+        """Test exporting trend summaries as NDJSON"""
+        out = io.StringIO()
+        self.assertEqual(export('trends', 'ndjson', out, self.source), 1)
+        row = json.loads(out.getvalue())
+        self.assertEqual(row['baby_id'], 'alpha')
+        self.assertEqual(row['nights'], 3)
+        self.assertEqual(row['night_sleep_7d_mean'], 410.0)
+        self.assertEqual(row['new_bests'], 'night_sleep')
+
+    def test_insights_ndjson_keeps_every_run(self):
+        """Test every logged run is exported, with filters"""
+        ResultStore(os.path.join(self.state_dir, 'results')).save(
+            'alpha', {'timestamp': '2025-01-03T07:00:00-05:00', 'ai_insights': 'Later', 'sns_published': True})
+        out = io.StringIO()
+        self.assertEqual(export('insights', 'ndjson', out, self.source), 3)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['ai_insights'] for row in rows], ['Great, "quiet" night', 'Line one\nline two', 'Later'])
+        self.assertEqual(rows[0]['gate_action'], 'bedrock')
+        self.assertIsNone(rows[1]['gate_action'])
+
+        out = io.StringIO()
+        source = ExportSource(self.state_dir, babies=['alpha'], start=date(2025, 1, 2))
+        self.assertEqual(export('insights', 'ndjson', out, source), 1)
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        """Test Parquet export writes one row group per chunk"""
+        import pyarrow.parquet
+
+        path = os.path.join(self.state_dir, 'sleep.parquet')
+        self.assertEqual(export('sleep', 'parquet', path, self.source, chunk_size=3), 8)
+        parquet = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        table = parquet.read()
+        self.assertEqual(table.column('nightWakings').to_pylist(), [0, 1, 2, 3, 4, 0, 1, 2])
+        self.assertEqual(str(table.schema.field('naps').type), 'int64')
+
+    def test_parquet_without_pyarrow_leaves_no_file(self):
+        """Test a missing pyarrow fails without leaving an empty file"""
+        path = os.path.join(self.state_dir, 'sleep.parquet')
+        with patch.dict(sys.modules, {'pyarrow': None, 'pyarrow.parquet': None}):
+            with self.assertRaises(RuntimeError):
+                export('sleep', 'parquet', path, self.source)
+        self.assertFalse(os.path.exists(path))
+
+    def test_missing_state_is_empty(self):
+        """Test a missing state directory exports only a header"""
+        out = io.StringIO()
+        self.assertEqual(export('sleep', 'csv', out, ExportSource(os.path.join(self.state_dir, 'none'))), 0)
+        self.assertEqual(out.getvalue().strip(), 'baby_id,day,naps,longestSleep,totalSleep,daySleep,nightSleep,nightWakings')
+
+    def test_main_writes_file(self):
+        """Test the command line writes to an output path"""
+        path = os.path.join(self.state_dir, 'insights.csv')
+        code = main(['insights', '--format', 'csv', '--output', path, '--state-dir', self.state_dir,
+                     '--baby', 'beta'])
+        self.assertEqual(code, 0)
+        with open(path, newline='') as f:
+            table = list(csv.DictReader(f))
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table[0]['ai_insights'], 'Line one\nline two')
+
+    def test_rejects_bad_arguments(self):
+        """Test unknown formats and a missing state directory are rejected"""
+        with self.assertRaises(ValueError):
+            export('sleep', 'xml', io.StringIO(), self.source)
+        with self.assertRaises(ValueError):
+            export('trends', 'csv', io.StringIO(), ExportSource())
+
+
+if __name__ == '__main__':
+    unittest.main()
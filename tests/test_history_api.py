@@ -0,0 +1,207 @@
+import unittest
+import base64
+import gzip
+import importlib.util
+import json
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import Mock, patch
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.models.sleep_data_batch import SleepDataBatch
+from zzzgrams.services.history_api import HistoryApi
+from zzzgrams.storage.history_file import write_history
+from zzzgrams.storage.result_store import ResultStore
+
+
+def _event(path, params=None, headers=None, method='GET'):
+    return {'httpMethod': method, 'path': path, 'queryStringParameters': params,
+            'headers': headers or {}, 'body': None}
+
+
+class TestHistoryApi(unittest.TestCase):
+    """Test cases for the read-only history routes"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'history.zzh')
+        start = date(2025, 1, 1)
+        days = [start + timedelta(days=i) for i in range(10)]
+        records = [SleepData(3, 200.0, 600.0, 180.0, 400.0 + i, i % 3) for i in range(10)]
+        write_history(self.path, ['baby'] * 10, days, SleepDataBatch.from_sleep_data(records))
+        self.results = ResultStore(os.path.join(tmp.name, 'results'))
+        self.api = HistoryApi(self.path, self.results, gzip_min_bytes=200)
+
+    def test_history_pagination(self):
+        """Test that /history pages through a date range with cursors"""
+        response = self.api.handle(_event('/history', {'baby': 'baby', 'from': '2025-01-03', 'limit': '3'}))
+        self.assertEqual(response['statusCode'], 200)
+        body = json.loads(response['body'])
+        self.assertEqual([item['day'] for item in body['items']], ['2025-01-03', '2025-01-04', '2025-01-05'])
+        self.assertEqual(body['items'][0]['nightSleep'], 402.0)
+
+        days = [item['day'] for item in body['items']]
+        while body['next_cursor']:
+            params = {'baby': 'baby', 'from': '2025-01-03', 'limit': '3', 'cursor': body['next_cursor']}
+            body = json.loads(self.api.handle(_event('/history', params))['body'])
+            days += [item['day'] for item in body['items']]
+        self.assertEqual(len(days), 8)
+        self.assertEqual(days[-1], '2025-01-10')
+
+    def test_etag_and_not_modified(self):
+        """Test stable ETags and 304 responses for a matching If-None-Match"""
+        event = _event('/history', {'baby': 'baby', 'limit': '2'})
+        first = self.api.handle(event)
+        etag = first['headers']['ETag']
+        self.assertEqual(self.api.handle(event)['headers']['ETag'], etag)
+
+        not_modified = self.api.handle(_event('/history', {'baby': 'baby', 'limit': '2'},
+                                              {'If-None-Match': f'W/{etag}'}))
+        self.assertEqual(not_modified['statusCode'], 304)
+        self.assertEqual(not_modified['body'], '')
+
+        # Rewriting the file changes the ETag
+        write_history(self.path, ['baby'], ['2025-02-01'], SleepDataBatch.from_sleep_data(
+            [SleepData(1, 1.0, 1.0, 1.0, 1.0, 0)]))
+        os.utime(self.path, ns=(1, 1))
+        changed = self.api.handle(_event('/history', {'baby': 'baby', 'limit': '2'}, {'If-None-Match': etag}))
+        self.assertEqual(changed['statusCode'], 200)
+        self.assertEqual(json.loads(changed['body'])['items'][0]['day'], '2025-02-01')
+
+    def test_gzip_above_threshold(self):
+        """Test that large bodies are gzipped only when the client accepts it"""
+        plain = self.api.handle(_event('/history', {'baby': 'baby'}))
+        zipped = self.api.handle(_event('/history', {'baby': 'baby'}, {'Accept-Encoding': 'gzip, br'}))
+        self.assertNotIn('Content-Encoding', plain['headers'])
+        self.assertEqual(zipped['headers']['Content-Encoding'], 'gzip')
+        self.assertTrue(zipped['isBase64Encoded'])
+        self.assertEqual(gzip.decompress(base64.b64decode(zipped['body'])).decode('utf-8'), plain['body'])
+
+        small = self.api.handle(_event('/history', {'baby': 'baby', 'limit': '1'}, {'Accept-Encoding': 'gzip'}))
+        self.assertNotIn('Content-Encoding', small['headers'])
+
+    def test_latest(self):
+        """Test /latest from the result store with the history file as fallback"""
+        body = json.loads(self.api.handle(_event('/latest', {'baby': 'baby'}))['body'])
+        self.assertEqual((body['day'], body['sleep_data']['nightSleep']), ('2025-01-10', 409.0))
+
+        self.results.save('baby', {'ai_insights': 'Great night!', 'success': True})
+        body = json.loads(self.api.handle(_event('/latest', {'baby': 'baby'}))['body'])
+        self.assertEqual(body['ai_insights'], 'Great night!')
+
+    def test_latest_removed_after_version(self):
+        """Test that a result removed between version() and load() is a 404, not a 500"""
+        self.results.save('baby', {'ai_insights': 'Gone soon'})
+        with patch.object(self.results, 'load', return_value=None):
+            response = self.api.handle(_event('/latest', {'baby': 'baby'}))
+        self.assertEqual(response['statusCode'], 404)
+        # Nothing was cached for that ETag, so the next request reads the store again
+        body = json.loads(self.api.handle(_event('/latest', {'baby': 'baby'}))['body'])
+        self.assertEqual(body['ai_insights'], 'Gone soon')
+
+    def test_errors(self):
+        """Test the 400, 404 and 405 responses"""
+        self.assertEqual(self.api.handle(_event('/latest', {'baby': 'nobody'}))['statusCode'], 404)
+        self.assertEqual(self.api.handle(_event('/history', {'baby': 'baby', 'from': 'soon'}))['statusCode'], 400)
+        self.assertEqual(self.api.handle(_event('/history', {'baby': 'baby', 'cursor': '!!'}))['statusCode'], 400)
+        self.assertEqual(self.api.handle(_event('/history', {'baby': 'baby'}, method='POST'))['statusCode'], 405)
+        self.assertEqual(HistoryApi(None).handle(_event('/history', {'baby': 'baby'}))['statusCode'], 404)
+
+
+class TestServiceResultStore(unittest.TestCase):
+    """SleepAnalyzerService keeps the latest result for GET /latest"""
+
+    def test_result_saved(self):
+        """Test that the service saves its result for /latest"""
+        from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+
+        snoo = Mock()
+        snoo.BABY_ID = 'baby'
+        snoo.get_sleep_data.return_value = SleepData(3, 200.0, 580.0, 180.0, 400.0, 1)
+        bedrock = Mock()
+        bedrock.generate_sleep_insights.return_value = 'Nice night'
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultStore(directory)
+            sns = Mock()
+            sns.publish_sleep_analysis.return_value = True
+            service = SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns,
+                                           result_store=store)
+            result = service.analyze_sleep_data()
+            self.assertEqual(store.load('baby')['ai_insights'], result['ai_insights'])
+
+
+class TestServiceHistory(unittest.TestCase):
+    """SleepAnalyzerService records each night for GET /history"""
+
+    def _service(self, baby_id, history_path, night_sleep=400.0):
+        from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+
+        snoo = Mock()
+        snoo.BABY_ID = baby_id
+        snoo.get_sleep_data.return_value = SleepData(3, 200.0, 580.0, 180.0, night_sleep, 1)
+        bedrock = Mock()
+        bedrock.generate_sleep_insights.return_value = 'Nice night'
+        sns = Mock()
+        sns.publish_sleep_analysis.return_value = True
+        return SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns,
+                                    timezone='UTC', history_path=history_path)
+
+    def test_night_served_by_history_route(self):
+        """Test that an analyzed night shows up in GET /history"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.zzh')
+            result = self._service('baby', path).analyze_sleep_data()
+            # A rerun of the same night replaces it rather than adding a second row
+            self._service('baby', path, night_sleep=410.0).analyze_sleep_data()
+
+            response = HistoryApi(path).handle(_event('/history', {'baby': 'baby'}))
+            self.assertEqual(response['statusCode'], 200)
+            items = json.loads(response['body'])['items']
+            self.assertEqual([item['day'] for item in items], [result['timestamp'][:10]])
+            self.assertEqual(items[0]['nightSleep'], 410.0)
+
+    def test_bucket_merges_once(self):
+        """Test that a scheduler bucket merges all of its nights with one rewrite"""
+        from zzzgrams.services.scheduler import Bucket, FamilySchedule, run_bucket
+        from zzzgrams.storage import history_file
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.zzh')
+            families = [FamilySchedule('a', 'UTC'), FamilySchedule('b', 'UTC')]
+            bucket = Bucket(None, None, families)
+            with patch.object(history_file, 'merge_history', wraps=history_file.merge_history) as merge:
+                results = run_bucket(bucket, service_factory=lambda schedule, *_: self._service(schedule.baby_id, path))
+            self.assertTrue(all(result['success'] for result in results.values()))
+            merge.assert_called_once()
+            with history_file.HistoryReader(path) as reader:
+                self.assertEqual(reader.babies(), ['a', 'b'])
+
+
+class TestLambdaRouting(unittest.TestCase):
+    """lambda_handler serves read routes without building the analyzer"""
+
+    def test_history_route(self):
+        """Test that lambda_handler answers /latest without building the analyzer"""
+        path = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'lambda_function.py')
+        spec = importlib.util.spec_from_file_location('lambda_function_under_test', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        with tempfile.TemporaryDirectory() as state_dir, \
+                patch.dict(os.environ, {'ZZZGRAMS_STATE_DIR': state_dir, 'ZZZGRAMS_METRICS': '0'}), \
+                patch.object(module, 'SleepAnalyzerService') as service:
+            ResultStore(os.path.join(state_dir, 'results')).save('baby', {'ai_insights': 'Hi'})
+            response = module.lambda_handler(_event('/latest', {'baby': 'baby'}), None)
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(json.loads(response['body'])['ai_insights'], 'Hi')
+        service.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from datetime import date
+import sys
+import os
+import tempfile
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests.helpers import night
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.models.sleep_data_batch import SleepDataBatch
+from zzzgrams.storage.history_file import (
+    HistoryReader, RECORD_DTYPE, from_day_number, merge_history, to_day_number, write_history
+)
+
+
+class TestHistoryFile(unittest.TestCase):
+    """Test cases for the binary history format"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'history.zzh')
+
+        # Deliberately unsorted input
+        self.rows = [
+            ('baby-b', '2025-01-02', SleepData(**night(400.0, 1))),
+            ('baby-a', '2025-01-03', SleepData(**night(500.0, 0))),
+            ('baby-a', '2025-01-01', SleepData(**night(300.0, 3))),
+            ('baby-b', '2025-01-01', SleepData(**night(350.0, 2))),
+            ('baby-a', '2025-01-02', SleepData(**night(420.5, 2))),
+        ]
+        write_history(self.path, [r[0] for r in self.rows], [r[1] for r in self.rows],
+                      SleepDataBatch.from_sleep_data([r[2] for r in self.rows]))
+
+    def test_day_numbers(self):
+        """Test day number conversions"""
+        self.assertEqual(to_day_number('1970-01-02'), 1)
+        self.assertEqual(to_day_number('2025-01-01T07:00:00'), to_day_number(date(2025, 1, 1)))
+        self.assertEqual(from_day_number(to_day_number('2025-06-21')), date(2025, 6, 21))
+
+    def test_layout(self):
+        """Test header, index and fixed-width records"""
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(reader.babies(), ['baby-a', 'baby-b'])
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader.records.dtype, RECORD_DTYPE)
+            self.assertEqual(reader.read('baby-a').dates(),
+                             [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)])
+        self.assertEqual(os.path.getsize(self.path), 48 + 2 * 48 + 5 * 48)
+
+    def test_date_range_is_zero_copy(self):
+        """Test inclusive date-range reads backed by the mapped file"""
+        with HistoryReader(self.path) as reader:
+            window = reader.read('baby-a', '2025-01-02', date(2025, 1, 3))
+            self.assertEqual(len(window), 2)
+            self.assertFalse(window.records.flags.owndata)
+            batch = window.batch
+            self.assertEqual(batch[0], SleepData(**night(420.5, 2)))
+            self.assertEqual(batch[1].nightSleep, 500.0)
+            self.assertEqual(len(reader.read('baby-a', '2025-02-01')), 0)
+            self.assertEqual(len(reader.read('unknown')), 0)
+            self.assertEqual(reader.latest('baby-b').batch[0].nightSleep, 400.0)
+
+    def test_merge_replaces_and_appends(self):
+        """Test merging new nights into an existing file"""
+        merge_history(self.path, ['baby-b', 'baby-c'], ['2025-01-02', '2025-01-05'],
+                      SleepDataBatch.from_sleep_data([SleepData(**night(480.0, 0)), SleepData(**night(600.0, 1))]))
+
+        with HistoryReader(self.path) as reader:
+            self.assertEqual(reader.babies(), ['baby-a', 'baby-b', 'baby-c'])
+            self.assertEqual(len(reader), 6)
+            self.assertEqual(reader.read('baby-b').batch.nightSleep.tolist(), [350.0, 480.0])
+            self.assertEqual(reader.read('baby-c').batch[0].nightSleep, 600.0)
+
+    def test_merge_creates_file(self):
+        """Test that merging into a missing file creates it"""
+        path = self.path + '.new'
+        merge_history(path, ['baby-a'], [date(2025, 1, 1)],
+                      SleepDataBatch.from_sleep_data([SleepData(**night(300.0, 1))]))
+        with HistoryReader(path) as reader:
+            self.assertEqual(len(reader), 1)
+
+    def test_rejects_other_files(self):
+        """Test that non-history files are rejected"""
+        with open(self.path, 'wb') as f:
+            f.write(b'{"not": "a history file"}' * 4)
+        with self.assertRaises(ValueError):
+            HistoryReader(self.path)
+
+    def test_rejects_long_baby_ids(self):
+        """Test the fixed-width id limit"""
+        with self.assertRaises(ValueError):
+            write_history(self.path, ['x' * 33], ['2025-01-01'],
+                          SleepDataBatch.from_sleep_data([SleepData(**night(1.0, 0))]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import Mock, patch
+import io
+import json
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from botocore.exceptions import ClientError
+
+from zzzgrams.utils import metrics
+from zzzgrams.clients.bedrock_client import BedrockClient
+from zzzgrams.clients.sns_client import SNSClient
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the EMF metrics emitter"""
+
+    def test_helpers_are_noops_without_scope(self):
+        """Test that module helpers do nothing outside a scope"""
+        self.assertFalse(metrics.current())
+        metrics.count('Anything')
+        metrics.observe('Latency', 1.0)
+        with metrics.timer('Latency'):
+            pass
+
+    def test_flush_writes_emf_document(self):
+        """Test EMF structure of a flushed document"""
+        stream = io.StringIO()
+        logger = metrics.MetricsLogger('Zzzgrams', {'Service': 'zzzgrams'}, stream=stream, path='')
+        logger.count('SNSFailures')
+        logger.count('SNSFailures')
+        logger.observe('FetchLatency', 12.5)
+        logger.observe('FetchLatency', 12.5)
+        logger.observe('FetchLatency', 30.0)
+
+        lines = logger.flush()
+
+        self.assertEqual(len(lines), 1)
+        document = json.loads(stream.getvalue())
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        self.assertEqual(directive['Namespace'], 'Zzzgrams')
+        self.assertEqual(directive['Dimensions'], [['Service']])
+        self.assertIn({'Name': 'FetchLatency', 'Unit': 'Milliseconds'}, directive['Metrics'])
+        self.assertEqual(document['Service'], 'zzzgrams')
+        self.assertEqual(document['SNSFailures'], 2)
+        self.assertEqual(document['FetchLatency'], {'Values': [12.5, 30.0], 'Counts': [2, 1]})
+
+        # Buffers are reset after a flush
+        self.assertEqual(logger.flush(), [])
+
+    def test_histogram_split_over_value_limit(self):
+        """Test that histograms over 100 distinct values span documents"""
+        logger = metrics.MetricsLogger(stream=io.StringIO(), path='')
+        for i in range(150):
+            logger.observe('Latency', float(i))
+
+        documents = logger.documents(timestamp_ms=0)
+
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(len(documents[0]['Latency']['Values']), 100)
+        self.assertEqual(len(documents[1]['Latency']['Values']), 50)
+
+    def test_scope_flushes_once_to_file(self):
+        """Test that a scope flushes to ZZZGRAMS_METRICS_FILE on exit"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.log')
+            with patch.dict(os.environ, {'ZZZGRAMS_METRICS_FILE': path}):
+                with metrics.metrics_scope(enabled=True) as logger:
+                    metrics.count('Invocations')
+                    with metrics.timer('FetchLatency'):
+                        pass
+                    self.assertIs(metrics.current(), logger)
+
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['Invocations'], 1)
+        self.assertFalse(metrics.current())
+
+    def test_is_throttle(self):
+        """Test detection of throttling errors"""
+        throttled = ClientError({'Error': {'Code': 'ThrottlingException'}}, 'InvokeModel')
+        denied = ClientError({'Error': {'Code': 'AccessDeniedException'}}, 'InvokeModel')
+        self.assertTrue(metrics.is_throttle(throttled))
+        self.assertFalse(metrics.is_throttle(denied))
+        self.assertFalse(metrics.is_throttle(Exception('plain')))
+
+    def test_client_metrics(self):
+        """Test that Bedrock and SNS clients record tokens, throttles and failures"""
+        body = Mock()
+        body.read.return_value = json.dumps({
+            'inputTextTokenCount': 300,
+            'results': [{'outputText': 'Nice!', 'tokenCount': 20}]
+        })
+        bedrock = BedrockClient()
+        bedrock.bedrock = Mock()
+        bedrock.bedrock.invoke_model.side_effect = [
+            {'body': body, 'ResponseMetadata': {'RetryAttempts': 2}},
+            ClientError({'Error': {'Code': 'ThrottlingException'}}, 'InvokeModel'),
+        ]
+        sns = SNSClient()
+        sns.sns = Mock()
+        sns.sns.publish.side_effect = Exception('SNS API error')
+
+        with patch('builtins.print'):
+            with metrics.metrics_scope(enabled=True, stream=io.StringIO(), path='') as logger:
+                bedrock.generate_sleep_insights({'nightSleep': 300, 'nightWakings': 2})
+                bedrock.generate_sleep_insights({'nightSleep': 300, 'nightWakings': 2})
+                sns.publish_sleep_analysis('Nice!', {})
+                counters = dict(logger.counters)
+
+        self.assertEqual(counters['BedrockInputTokens'], 300)
+        self.assertEqual(counters['BedrockOutputTokens'], 20)
+        self.assertEqual(counters['BedrockRetries'], 2)
+        self.assertEqual(counters['BedrockThrottles'], 1)
+        self.assertEqual(counters['SNSFailures'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
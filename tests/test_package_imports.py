@@ -0,0 +1,76 @@
+import unittest
+import subprocess
+import sys
+import os
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import zzzgrams
+from benchmarks.import_time import parse_importtime
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def _loaded_modules(code: str) -> set:
+    """Run code in a fresh interpreter and return the names in sys.modules"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-c', code + '\nimport sys; print("\\n".join(sys.modules))'],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return set(proc.stdout.split())
+
+
+class TestPackageImports(unittest.TestCase):
+    """Test cases for lazy package exports"""
+
+    def test_import_package_is_lightweight(self):
+        """Test that importing the package does not load heavy dependencies"""
+        loaded = _loaded_modules('import zzzgrams')
+        for heavy in ('boto3', 'botocore', 'requests', 'pytz'):
+            self.assertNotIn(heavy, loaded)
+
+    def test_light_exports_stay_lightweight(self):
+        """Test that SleepData and clean_text_for_json do not load clients"""
+        loaded = _loaded_modules('from zzzgrams import SleepData, clean_text_for_json')
+        self.assertIn('zzzgrams.models.sleep_data', loaded)
+        self.assertNotIn('boto3', loaded)
+        self.assertNotIn('requests', loaded)
+
+    def test_snoo_client_does_not_load_boto3(self):
+        """Test that the Snoo client does not drag in the AWS clients"""
+        loaded = _loaded_modules('from zzzgrams.clients import SnooClient')
+        self.assertIn('requests', loaded)
+        self.assertNotIn('boto3', loaded)
+
+    def test_lazy_exports_resolve(self):
+        """Test that lazily exported names resolve to the defining objects"""
+        from zzzgrams.models.sleep_data import SleepData
+        from zzzgrams.clients.sns_client import SNSClient
+        self.assertIs(zzzgrams.SleepData, SleepData)
+        self.assertIs(zzzgrams.SNSClient, SNSClient)
+        self.assertIn('SleepAnalyzerService', dir(zzzgrams))
+
+    def test_unknown_attribute(self):
+        """Test that unknown names still raise AttributeError"""
+        with self.assertRaises(AttributeError):
+            zzzgrams.NotAThing
+
+    def test_parse_importtime(self):
+        """Test parsing of -X importtime output"""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       350 |       1470 | zzzgrams\n"
+            "unrelated line\n"
+        )
+        timings = parse_importtime(output)
+        self.assertEqual(timings['_io'].self_us, 120)
+        self.assertEqual(timings['zzzgrams'].cumulative_us, 1470)
+        self.assertEqual(len(timings), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import Mock
+import json
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.storage import payload_archive
+from zzzgrams.storage.payload_archive import PayloadArchive, train_zlib_dictionary
+
+
+def _payload(i: int) -> dict:
+    return {'naps': i % 4, 'longestSleep': 7200 + i * 60, 'totalSleep': 40000 + i * 30,
+            'daySleep': 10000 + i, 'nightSleep': 30000 + i * 29, 'nightWakings': i % 3,
+            'levels': [{'type': 'asleep', 'startTime': f'2025-01-01 19:{i % 60:02d}:00', 'stateDuration': 1800}]}
+
+
+class ArchiveTests:
+    codec = None
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive = PayloadArchive(tmp.name, codec=self.codec, train_after=8)
+        self.addCleanup(self.archive.close)
+        self.start = date(2025, 1, 1)
+        for i in range(30):
+            self.archive.put('baby-a', self.start + timedelta(days=i), _payload(i))
+
+    def test_round_trip_after_dictionary(self):
+        """Test payloads read back before and after dictionary training"""
+        self.assertEqual(self.archive.get('baby-a', '2025-01-02'), _payload(1))
+        self.assertEqual(self.archive.get('baby-a', self.start + timedelta(days=29)), _payload(29))
+        self.assertIsNone(self.archive.get('baby-a', '2024-01-01'))
+        stats = self.archive.stats()
+        self.assertEqual(stats['entries'], 30)
+        self.assertGreater(stats['dictionary_bytes'], 0)
+        self.assertGreater(stats['ratio'], 1.0)
+
+    def test_deduplicates(self):
+        """Test identical payloads are stored once"""
+        before = self.archive.stats()
+        digest = self.archive.put('baby-b', '2025-01-01', _payload(3))
+        after = self.archive.stats()
+        self.assertEqual(after['unique_payloads'], before['unique_payloads'])
+        self.assertEqual(after['entries'], before['entries'] + 1)
+        self.assertEqual(digest, self.archive.put('baby-a', '2025-01-04', _payload(3)))
+
+    def test_raw_bytes_preserved(self):
+        """Test raw response bytes are returned unchanged"""
+        raw = b'{"naps": 2,   "nightSleep": 30000}'
+        self.archive.put('baby-c', '2025-01-01', raw)
+        self.assertEqual(self.archive.get_raw('baby-c', '2025-01-01'), raw)
+
+    def test_iter_and_reparse(self):
+        """Test iterating a day range and rebuilding a batch"""
+        days = [day for _, day, _ in self.archive.iter_payloads('baby-a', '2025-01-05', '2025-01-07')]
+        self.assertEqual(days, ['2025-01-05', '2025-01-06', '2025-01-07'])
+
+        baby_ids, days, batch = self.archive.reparse('baby-a')
+        self.assertEqual(len(batch), 30)
+        self.assertEqual(batch[4], SleepData.from_dict(_payload(4)))
+
+    def test_reopen(self):
+        """Test an archive reopens with its index and dictionary"""
+        reopened = PayloadArchive(self.archive.directory, codec=self.codec)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get('baby-a', '2025-01-20'), _payload(19))
+
+
+class TestZlibArchive(ArchiveTests, unittest.TestCase):
+    """Payload archive with the zlib preset-dictionary codec"""
+    codec = 'zlib'
+
+
+@unittest.skipIf(payload_archive.zstandard is None, 'zstandard is not installed')
+class TestZstdArchive(ArchiveTests, unittest.TestCase):
+    """Payload archive with a trained zstd dictionary"""
+    codec = 'zstd'
+
+
+class TestArchiveHelpers(unittest.TestCase):
+    """Test cases for archive helpers and the SnooClient hook"""
+
+    def test_train_zlib_dictionary(self):
+        """Test the zlib preset dictionary favours common samples"""
+        samples = [b'a' * 10, b'b' * 10, b'a' * 10, b'c' * 10]
+        self.assertEqual(train_zlib_dictionary(samples, size=25), b'b' * 10 + b'c' * 10)
+
+    def test_snoo_client_archives_responses(self):
+        """Test SnooClient archives sessions responses"""
+        with tempfile.TemporaryDirectory() as directory:
+            archive = PayloadArchive(directory, codec='zlib')
+            response = Mock(status_code=200, content=json.dumps(_payload(1)).encode())
+            response.json.return_value = _payload(1)
+            session = Mock()
+            session.get.return_value = response
+            client = SnooClient(email='a', password='b', baby_id='baby', session=session, archive=archive)
+            client._authorize = Mock(return_value={'aws': {'id': 'token'}})
+
+            client.get_sleep_data('2025-03-01T00:00:00', '2025-03-02T08:00:00')
+            self.assertEqual(archive.get_raw('baby', '2025-03-02'), response.content)
+            archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import json
+import sys
+import os
+import tempfile
+import tracemalloc
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zzzgrams.utils import profiling
+
+
+def _work():
+    return [str(i) * 10 for i in range(2000)]
+
+
+class TestProfiling(unittest.TestCase):
+    """Test cases for the opt-in profiling hook"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_parse_modes(self):
+        """Test parsing of profile requests"""
+        self.assertEqual(profiling.parse_modes('cpu,mem'), {'cpu', 'mem'})
+        self.assertEqual(profiling.parse_modes('MEM'), {'mem'})
+        self.assertEqual(profiling.parse_modes('all'), {'cpu', 'mem'})
+        self.assertEqual(profiling.parse_modes(True), {'cpu'})
+        self.assertEqual(profiling.parse_modes('bogus'), set())
+        self.assertEqual(profiling.parse_modes(None), set())
+
+    @patch.dict(os.environ, {'ZZZGRAMS_PROFILE': 'cpu', 'ZZZGRAMS_PROFILE_SAMPLE': '4'})
+    def test_env_request_is_sampled(self):
+        """Test that env-requested profiling runs for one in K invocations"""
+        self.assertEqual(profiling.requested_modes({}, rng=lambda: 0.1), {'cpu'})
+        self.assertEqual(profiling.requested_modes({}, rng=lambda: 0.5), set())
+
+    @patch.dict(os.environ, {'ZZZGRAMS_PROFILE': 'cpu', 'ZZZGRAMS_PROFILE_SAMPLE': 'often'})
+    def test_malformed_sample_falls_back(self):
+        """Test that a malformed sample rate profiles every invocation instead of failing"""
+        with patch('builtins.print'):
+            self.assertEqual(profiling.requested_modes({}, rng=lambda: 0.9), {'cpu'})
+
+    @patch.dict(os.environ, {'ZZZGRAMS_PROFILE': '', 'ZZZGRAMS_PROFILE_SAMPLE': '1000'})
+    def test_event_flag_bypasses_sampling(self):
+        """Test that an event flag always profiles"""
+        self.assertEqual(profiling.requested_modes({'profile': 'mem'}, rng=lambda: 0.99), {'mem'})
+        self.assertEqual(profiling.requested_modes({'httpMethod': 'GET'}), set())
+
+    def test_not_requested(self):
+        """Test that nothing is profiled without a request"""
+        with patch.dict(os.environ, {'ZZZGRAMS_PROFILE': ''}):
+            with profiling.maybe_profile({}) as report:
+                self.assertIsNone(report)
+
+    def test_cpu_and_mem_report(self):
+        """Test that a profiled run writes hot functions and allocation sites"""
+        with patch.dict(os.environ, {'ZZZGRAMS_PROFILE_DIR': self.tmp.name, 'ZZZGRAMS_PROFILE_TOP': '5'}):
+            with patch('builtins.print') as mock_print:
+                with profiling.maybe_profile({'profile': 'cpu,mem'}, name='unit') as report:
+                    _work()
+
+        self.assertLessEqual(len(report['cpu_top']), 5)
+        self.assertTrue(any('_work' in row['function'] for row in report['cpu_top']))
+        self.assertTrue(report['alloc_top'])
+        self.assertGreater(report['peak_kb'], 0)
+        self.assertTrue(os.path.exists(report['profile_path']))
+        with open(report['report_path']) as f:
+            self.assertEqual(json.load(f)['name'], 'unit')
+        self.assertEqual(json.loads(mock_print.call_args[0][0])['type'], 'profile')
+
+    def test_unwritable_dir_keeps_result(self):
+        """Test that a profile directory that cannot be written to never fails the profiled block"""
+        missing = os.path.join(self.tmp.name, 'missing', 'dir')
+        with patch.dict(os.environ, {'ZZZGRAMS_PROFILE_DIR': missing}):
+            with patch('builtins.print') as mock_print:
+                with profiling.maybe_profile({'profile': 'cpu,mem'}, name='unit') as report:
+                    result = _work()
+
+        self.assertEqual(len(result), 2000)
+        self.assertTrue(report['cpu_top'])
+        self.assertTrue(report['alloc_top'])
+        self.assertNotIn('profile_path', report)
+        self.assertNotIn('report_path', report)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn('Error writing profile', mock_print.call_args_list[0][0][0])
+        self.assertEqual(json.loads(mock_print.call_args[0][0])['type'], 'profile')
+
+
+if __name__ == '__main__':
+    unittest.main()
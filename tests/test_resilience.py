@@ -0,0 +1,158 @@
+import io
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+import tempfile
+import threading
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import requests
+
+from tests.helpers import FakeClock
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.utils import metrics
+from zzzgrams.utils.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Guard, RateLimitExceeded, SharedState, TokenBucket
+)
+
+
+class ResilienceTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'guard.sqlite')
+        self.state = SharedState(self.path)
+        self.clock = FakeClock(1000.0)
+
+
+class TestTokenBucket(ResilienceTestCase):
+    """Test cases for TokenBucket"""
+
+    def test_burst_then_refill(self):
+        """Test that a burst drains the bucket and tokens refill at the rate"""
+        bucket = TokenBucket(self.state, 'snoo', rate=2.0, capacity=3, clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(max_wait=0.1)
+
+    def test_shared_between_instances(self):
+        """Test that two handles on one state file share a bucket"""
+        # A second SharedState on the same file stands in for another process
+        first = TokenBucket(self.state, 'snoo', rate=1.0, capacity=2, clock=self.clock)
+        second = TokenBucket(SharedState(self.path), 'snoo', rate=1.0, capacity=2, clock=self.clock)
+        self.assertEqual(first.try_acquire(), 0.0)
+        self.assertEqual(second.try_acquire(), 0.0)
+        self.assertGreater(first.try_acquire(), 0.0)
+
+    def test_threads(self):
+        """Test that concurrent threads never take more tokens than the capacity"""
+        bucket = TokenBucket(self.state, 'snoo', rate=0.001, capacity=20)
+        granted = []
+
+        def worker():
+            for _ in range(10):
+                granted.append(bucket.try_acquire() == 0.0)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(granted), 20)
+
+
+class TestCircuitBreaker(ResilienceTestCase):
+    """Test cases for CircuitBreaker"""
+
+    def test_open_half_open_close(self):
+        """Test the closed, open and half-open transitions with a single probe"""
+        breaker = CircuitBreaker(self.state, 'snoo', failure_threshold=2, reset_timeout=30, clock=self.clock)
+        breaker.record_failure()
+        self.assertEqual(breaker.current_state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.current_state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        # After the cool-down one caller probes while the others still fail fast
+        self.clock.now += 31
+        self.assertEqual(breaker.before_call(), HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.current_state, OPEN)
+
+        self.clock.now += 31
+        self.assertEqual(breaker.before_call(), HALF_OPEN)
+        breaker.record_success()
+        self.assertEqual(breaker.current_state, CLOSED)
+        self.assertEqual(breaker.before_call(), CLOSED)
+
+    def test_success_resets_failures(self):
+        """Test that a success resets the consecutive failure count"""
+        breaker = CircuitBreaker(self.state, 'snoo', failure_threshold=2, clock=self.clock)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.current_state, CLOSED)
+
+
+class TestGuard(ResilienceTestCase):
+    """Test cases for Guard"""
+
+    def test_server_errors_open_the_circuit(self):
+        """Test that 5xx responses open the circuit and rejections are counted"""
+        guard = Guard(self.state, 'snoo', failure_threshold=2, metric_prefix='Snoo',
+                      clock=self.clock, sleep=self.clock.sleep)
+        upstream = Mock(return_value=Mock(status_code=503))
+        with metrics.metrics_scope(enabled=True, stream=io.StringIO()) as m:
+            guard.call(upstream)
+            guard.call(upstream)
+            with self.assertRaises(CircuitOpenError):
+                guard.call(upstream)
+            self.assertEqual(m.counters['SnooCircuitOpened'], 1)
+            self.assertEqual(m.counters['SnooCircuitRejected'], 1)
+        self.assertEqual(upstream.call_count, 2)
+
+    def test_exceptions_count_as_failures(self):
+        """Test that exceptions from the upstream count as failures"""
+        guard = Guard(self.state, 'snoo', failure_threshold=1, clock=self.clock, sleep=self.clock.sleep)
+        with self.assertRaises(requests.Timeout):
+            guard.call(Mock(side_effect=requests.Timeout()))
+        self.assertEqual(guard.breaker.current_state, OPEN)
+
+    def test_from_env(self):
+        """Test that the guard is only built when ZZZGRAMS_GUARD_DB is set"""
+        with patch.dict(os.environ):
+            os.environ.pop('ZZZGRAMS_GUARD_DB', None)
+            self.assertIsNone(Guard.from_env('snoo'))
+        with patch.dict(os.environ, {'ZZZGRAMS_GUARD_DB': self.path}):
+            self.assertEqual(Guard.from_env('snoo').name, 'snoo')
+
+
+class TestSnooClientGuard(ResilienceTestCase):
+    """SnooClient routes every request through the guard with a timeout"""
+
+    def test_requests_have_timeouts_and_fail_fast(self):
+        """Test that Snoo requests carry a timeout and fail fast once open"""
+        guard = Guard(self.state, 'snoo', failure_threshold=1, clock=self.clock, sleep=self.clock.sleep)
+        session = Mock()
+        session.post.side_effect = requests.ConnectionError()
+        client = SnooClient(email='a', password='b', baby_id='1', session=session, guard=guard)
+
+        with self.assertRaises(requests.ConnectionError):
+            client._auth_amazon()
+        self.assertEqual(session.post.call_args[1]['timeout'], client.timeout)
+        with self.assertRaises(CircuitOpenError):
+            client._auth_snoo('token')
+        self.assertEqual(session.post.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
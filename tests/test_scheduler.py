@@ -0,0 +1,172 @@
+import unittest
+import json
+from unittest.mock import Mock, patch
+import sys
+import os
+from datetime import datetime
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytz
+
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.services.scheduler import FamilySchedule, Scheduler, floor_to_bucket, run_bucket, run_due
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+
+UTC = pytz.utc
+
+
+def _utc(*args) -> datetime:
+    return UTC.localize(datetime(*args))
+
+
+class TestFamilySchedule(unittest.TestCase):
+    """Test cases for FamilySchedule"""
+
+    def test_next_delivery_per_timezone(self):
+        """Test that local delivery times convert to UTC per timezone"""
+        now = _utc(2025, 1, 15, 10, 0)
+        east = FamilySchedule('east', 'America/New_York', '07:00')
+        west = FamilySchedule('west', 'America/Los_Angeles', '07:00')
+        # 07:00 EST has passed (12:00 UTC is ahead), 07:00 PST is 15:00 UTC
+        self.assertEqual(east.next_delivery(now), _utc(2025, 1, 15, 12, 0))
+        self.assertEqual(west.next_delivery(now), _utc(2025, 1, 15, 15, 0))
+        self.assertEqual(east.next_delivery(_utc(2025, 1, 15, 12, 1)), _utc(2025, 1, 16, 12, 0))
+
+    def test_dst_transitions(self):
+        """Test delivery times across DST changes, including skipped local times"""
+        family = FamilySchedule('east', 'America/New_York', '07:00')
+        self.assertEqual(family.next_delivery(_utc(2025, 3, 9, 0, 0)), _utc(2025, 3, 9, 11, 0))
+        # 02:30 does not exist on the spring-forward day and moves to 03:30 EDT
+        skipped = FamilySchedule('east', 'America/New_York', '02:30')
+        self.assertEqual(skipped.next_delivery(_utc(2025, 3, 9, 0, 0)), _utc(2025, 3, 9, 7, 30))
+
+    def test_invalid_configuration(self):
+        """Test that bad timezones and delivery times fail up front"""
+        with self.assertRaises(pytz.UnknownTimeZoneError):
+            FamilySchedule('x', 'Mars/Olympus_Mons')
+        with self.assertRaises(ValueError):
+            FamilySchedule('x', 'UTC', '25:00')
+
+
+class TestScheduler(unittest.TestCase):
+    """Test cases for Scheduler"""
+
+    def setUp(self):
+        self.now = _utc(2025, 1, 15, 0, 0)
+        self.schedules = [
+            FamilySchedule('west', 'America/Los_Angeles', '07:00'),
+            FamilySchedule('east-a', 'America/New_York', '07:05'),
+            FamilySchedule('east-b', 'America/New_York', '07:10'),
+            FamilySchedule('london', 'Europe/London', '06:30'),
+        ]
+        self.scheduler = Scheduler(self.schedules, bucket_minutes=15, now=self.now)
+
+    def test_buckets_in_deadline_order(self):
+        """Test that due buckets come out earliest deadline first and are re-queued"""
+        self.assertEqual(self.scheduler.next_run(), _utc(2025, 1, 15, 6, 30))
+        self.assertEqual(self.scheduler.load_profile(), {'06:30': 1, '12:00': 2, '15:00': 1})
+
+        buckets = self.scheduler.pop_due(_utc(2025, 1, 15, 12, 0))
+        self.assertEqual([b.start for b in buckets], [_utc(2025, 1, 15, 6, 30), _utc(2025, 1, 15, 12, 0)])
+        self.assertEqual([f.baby_id for f in buckets[1].families], ['east-a', 'east-b'])
+        self.assertEqual(buckets[1].deadline, _utc(2025, 1, 15, 12, 5))
+
+        # Popped families are queued again for the next day
+        self.assertEqual(len(self.scheduler), 4)
+        self.assertEqual(self.scheduler.next_run(), _utc(2025, 1, 15, 15, 0))
+        self.assertEqual(self.scheduler.pop_due(_utc(2025, 1, 15, 14, 59)), [])
+
+    def test_floor_to_bucket(self):
+        """Test rounding down to a bucket and rejecting widths that do not divide a day"""
+        self.assertEqual(floor_to_bucket(_utc(2025, 1, 15, 12, 14, 59), 15), _utc(2025, 1, 15, 12, 0))
+        with self.assertRaises(ValueError):
+            Scheduler([], bucket_minutes=7)
+
+    def test_run_bucket_shares_clients(self):
+        """Test that one bucket run shares a single Bedrock and SNS client"""
+        bucket = self.scheduler.pop_due(_utc(2025, 1, 15, 12, 0))[1]
+        seen = []
+
+        def factory(schedule, bedrock_client, sns_client):
+            seen.append((bedrock_client, sns_client))
+            service = Mock()
+            service.analyze_sleep_data.return_value = {'success': schedule.baby_id == 'east-a'}
+            return service
+
+        results = run_bucket(bucket, service_factory=factory)
+        self.assertEqual(results, {'east-a': {'success': True}, 'east-b': {'success': False}})
+        self.assertEqual(len(set(map(id, (pair[0] for pair in seen)))), 1)
+
+    def test_run_bucket_packed(self):
+        """Test a packed bucket prepares, packs and completes every family"""
+        bucket = self.scheduler.pop_due(_utc(2025, 1, 15, 12, 0))[1]
+        sns = Mock()
+        sns.publish_sleep_analysis.return_value = True
+        body = Mock()
+        body.read.return_value = json.dumps({'results': [{
+            'outputText': '=== FAMILY 1 ===\nFirst family\n=== FAMILY 2 ===\nSecond family'}]})
+        invoke = Mock(return_value={'body': body})
+        failing = set()
+
+        def factory(schedule, bedrock_client, sns_client):
+            bedrock_client.bedrock = Mock(invoke_model=invoke)
+            snoo = Mock()
+            snoo.BABY_ID = schedule.baby_id
+            snoo.get_sleep_data.return_value = SleepData(2, 200.0, 600.0, 120.0, 480.0, 1)
+            if schedule.baby_id in failing:
+                snoo.get_sleep_data.side_effect = RuntimeError('Snoo down')
+            return SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock_client, sns_client=sns,
+                                        timezone=schedule.timezone)
+
+        results = run_bucket(bucket, service_factory=factory, packed=True)
+        self.assertEqual(results['east-a']['ai_insights'], 'First family')
+        self.assertEqual(results['east-b']['ai_insights'], 'Second family')
+        self.assertEqual(invoke.call_count, 1)
+        self.assertEqual(sns.publish_sleep_analysis.call_count, 2)
+
+        failing.add('east-b')
+        results = run_bucket(bucket, service_factory=factory, packed=True)
+        self.assertTrue(results['east-a']['success'])
+        self.assertEqual(results['east-b']['error'], 'Snoo down')
+        self.assertFalse(results['east-b']['success'])
+
+    def test_run_due_late_tick(self):
+        """Test that a late cron tick still runs the bucket it belongs to"""
+        factory = Mock()
+        factory.return_value.analyze_sleep_data.return_value = {'success': True}
+        outcome = run_due(_utc(2025, 1, 15, 12, 0, 3), self.schedules, service_factory=factory)
+        self.assertEqual([b['families'] for b in outcome['buckets']], [['east-a', 'east-b']])
+        self.assertEqual(set(outcome['results']), {'east-a', 'east-b'})
+
+
+class TestSnooClientTimezone(unittest.TestCase):
+    """The family's timezone reaches the Snoo requests"""
+
+    def test_timezone_in_auth_and_url(self):
+        """Test that the family timezone reaches the Snoo auth data and URL"""
+        client = SnooClient(email='a', password='b', baby_id='123', timezone='America/Los_Angeles')
+        self.assertEqual(client.snoo_auth_data['timeZone'], 'America/Los_Angeles')
+        url = client._generate_snoo_sleep_url('123', 's', 'e')
+        self.assertIn('timezone=America/Los_Angeles&', url)
+
+    def test_default_timezone(self):
+        """Test the default timezone when none is configured"""
+        with patch.dict(os.environ):
+            os.environ.pop('SNOO_TIMEZONE', None)
+            self.assertEqual(SnooClient(email='a', password='b', baby_id='1').TIMEZONE, 'America/New_York')
+
+    @patch.dict(os.environ, {'SNOO_TIMEZONE': 'Europe/London'})
+    def test_service_uses_client_timezone(self):
+        """Test that a service built around a client uses the client's timezone"""
+        client = SnooClient(email='a', password='b', baby_id='1', timezone='America/Los_Angeles')
+        service = SleepAnalyzerService(snoo_client=client, bedrock_client=Mock(), sns_client=Mock())
+        self.assertEqual(service.timezone.zone, 'America/Los_Angeles')
+        service = SleepAnalyzerService(snoo_client=client, bedrock_client=Mock(), sns_client=Mock(), timezone='UTC')
+        self.assertEqual(service.timezone.zone, 'UTC')
+
+
+if __name__ == '__main__':
+    unittest.main()
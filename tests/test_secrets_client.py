@@ -0,0 +1,215 @@
+import unittest
+from unittest.mock import Mock, patch
+import json
+import sys
+import os
+import tempfile
+import threading
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests.helpers import FakeClock
+from zzzgrams.clients.secrets_client import (
+    FileSecretProvider, MissingSecretError, SecretCache, SecretProvider, SecretsManagerProvider
+)
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.services.scheduler import Bucket, FamilySchedule, run_bucket
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+
+
+class CountingProvider:
+    def __init__(self, secrets):
+        self.secrets = secrets
+        self.calls = []
+        self.fetched = threading.Event()
+
+    def fetch(self, keys):
+        self.calls.append(list(keys))
+        self.fetched.set()
+        return {key: dict(self.secrets[key]) for key in keys if key in self.secrets}
+
+
+class TestSecretCache(unittest.TestCase):
+    """Test cases for SecretCache"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.provider = CountingProvider({'a': {'username': 'a@x', 'password': '1'},
+                                          'b': {'username': 'b@x', 'password': '2'}})
+        self.cache = SecretCache(self.provider, ttl=100, refresh_ahead=20, clock=self.clock)
+        self.addCleanup(self.cache.close)
+
+    def test_hits_until_expiry(self):
+        """Test that hits are served from memory until the TTL runs out"""
+        self.assertEqual(self.cache.get('a')['username'], 'a@x')
+        self.clock.now = 50
+        self.cache.get('a')
+        self.assertEqual(len(self.provider.calls), 1)
+        self.clock.now = 101
+        self.cache.get('a')
+        self.assertEqual(len(self.provider.calls), 2)
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_prefetch_is_one_batch(self):
+        """Test that prefetch fetches unique missing keys in one call"""
+        self.cache.prefetch(['a', 'b', 'a', 'missing'])
+        self.assertEqual(self.provider.calls, [['a', 'b', 'missing']])
+        self.cache.get('a')
+        self.cache.get('b')
+        self.assertEqual(len(self.provider.calls), 1)
+
+    def test_refresh_ahead_in_background(self):
+        """Test that a hit near expiry refreshes in the background"""
+        self.cache.get('a')
+        self.provider.fetched.clear()
+        self.provider.secrets['a']['password'] = 'rotated'
+        self.clock.now = 85
+        # The stale-but-valid value is returned immediately; the refresh runs behind it
+        self.assertEqual(self.cache.get('a')['password'], '1')
+        self.assertTrue(self.provider.fetched.wait(5))
+        self.cache.close()
+        self.assertEqual(self.cache.get('a')['password'], 'rotated')
+
+    def test_refresh_due_and_stale_on_error(self):
+        """Test batch refresh and serving unexpired values while the provider fails"""
+        self.cache.prefetch(['a', 'b'])
+        self.clock.now = 90
+        self.assertEqual(self.cache.refresh_due(), 2)
+        self.assertEqual(self.provider.calls[-1], ['a', 'b'])
+
+        self.provider.fetch = Mock(side_effect=RuntimeError('secret store down'))
+        self.clock.now = 180
+        self.assertEqual(self.cache.prefetch(['a'])['a']['username'], 'a@x')
+        self.clock.now = 200
+        with self.assertRaises(RuntimeError):
+            self.cache.get('a')
+
+    def test_require(self):
+        """Test that require raises for missing secrets, fields and baby ids"""
+        self.assertEqual(self.cache.require('a', 'username'), 'a@x')
+        with self.assertRaises(MissingSecretError):
+            self.cache.require('a', 'topic_arn')
+        with self.assertRaises(MissingSecretError):
+            self.cache.require('missing', 'username')
+        with self.assertRaises(MissingSecretError):
+            self.cache.require(None, 'username')
+
+
+class TestProviders(unittest.TestCase):
+    """Test cases for the secret providers"""
+
+    def test_provider_is_abstract(self):
+        """Test that SecretProvider cannot be used without fetch"""
+        with self.assertRaises(TypeError):
+            SecretProvider()
+
+    def test_file_provider(self):
+        """Test the JSON file provider"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'a': {'username': 'a@x'}}, f)
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(FileSecretProvider(f.name).fetch(['a', 'b']), {'a': {'username': 'a@x'}})
+
+    def test_secrets_manager_batches(self):
+        """Test that Secrets Manager ids are fetched 20 at a time"""
+        client = Mock()
+        client.batch_get_secret_value.side_effect = lambda SecretIdList: {
+            'SecretValues': [{'Name': name, 'SecretString': json.dumps({'username': name})}
+                             for name in SecretIdList],
+            'Errors': [],
+        }
+        provider = SecretsManagerProvider(prefix='zzz/', client=client)
+        secrets = provider.fetch([f'baby{i}' for i in range(45)])
+        self.assertEqual(len(secrets), 45)
+        self.assertEqual(secrets['baby3'], {'username': 'zzz/baby3'})
+        self.assertEqual(client.batch_get_secret_value.call_count, 3)
+
+
+class TestSnooClientSecrets(unittest.TestCase):
+    """SnooClient takes per-family credentials from the cache"""
+
+    def test_credentials_from_cache(self):
+        """Test that Snoo credentials come from the cache unless passed in"""
+        cache = SecretCache(CountingProvider({'123': {'username': 'fam@x', 'password': 'pw'}}))
+        client = SnooClient(baby_id='123', secrets=cache)
+        self.assertEqual((client.EMAIL, client.PASSWORD), ('fam@x', 'pw'))
+
+        explicit = SnooClient(email='e', password='p', baby_id='123', secrets=cache)
+        self.assertEqual((explicit.EMAIL, explicit.PASSWORD), ('e', 'p'))
+
+    @patch.dict(os.environ, {'SNOO_USERNAME': 'shared@x', 'SNOO_PASSWORD': 'shared'})
+    def test_no_shared_account_fallback(self):
+        """Test that a missing family secret never falls back to the shared account"""
+        cache = SecretCache(CountingProvider({'123': {'username': 'fam@x'}}))
+        with self.assertRaises(MissingSecretError):
+            SnooClient(baby_id='123', secrets=cache)
+        with self.assertRaises(MissingSecretError):
+            SnooClient(baby_id='456', secrets=cache)
+
+
+class TestServiceSecrets(unittest.TestCase):
+    """SleepAnalyzerService publishes to the family's own topic"""
+
+    def _service(self, secrets, sns=None):
+        snoo = Mock()
+        snoo.BABY_ID = '123'
+        snoo.get_sleep_data.return_value = SleepData(2, 200.0, 600.0, 120.0, 480.0, 1)
+        bedrock = Mock()
+        bedrock.generate_sleep_insights.return_value = 'Nice night'
+        return SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns or Mock(),
+                                    secrets=secrets)
+
+    def test_topic_from_secret(self):
+        """Test that the message goes to the family's topic"""
+        sns = Mock()
+        sns.publish_sleep_analysis.return_value = True
+        cache = SecretCache(CountingProvider({'123': {'topic_arn': 'arn:family'}}))
+        result = self._service(cache, sns).analyze_sleep_data()
+        self.assertTrue(result['success'])
+        self.assertEqual(sns.publish_sleep_analysis.call_args[1]['topic_arn'], 'arn:family')
+
+    def test_missing_topic_fails_before_work(self):
+        """Test that a missing topic fails the run before Snoo, Bedrock or SNS are called"""
+        service = self._service(SecretCache(CountingProvider({'123': {'username': 'fam@x'}})))
+        result = service.analyze_sleep_data()
+        self.assertFalse(result['success'])
+        self.assertIn("no 'topic_arn'", result['error'])
+        service.snoo_client.get_sleep_data.assert_not_called()
+        service.bedrock_client.generate_sleep_insights.assert_not_called()
+        service.sns_client.publish_sleep_analysis.assert_not_called()
+
+
+class TestBucketSecrets(unittest.TestCase):
+    """A secret-store outage fails families individually, not the whole bucket"""
+
+    def test_prefetch_and_factory_errors(self):
+        """Test that prefetch and per-family secret errors do not abort the bucket"""
+        provider = CountingProvider({})
+        provider.fetch = Mock(side_effect=RuntimeError('throttled'))
+        cache = SecretCache(provider)
+
+        def factory(schedule, bedrock_client, sns_client):
+            if schedule.baby_id == 'bad':
+                SnooClient(baby_id='bad', secrets=cache)
+            service = Mock()
+            service.analyze_sleep_data.return_value = {'success': True}
+            service.prepare.return_value = Mock(needs_insights=False)
+            service.complete.return_value = {'success': True}
+            return service
+
+        bucket = Bucket(None, None, [FamilySchedule('bad', 'UTC'), FamilySchedule('good', 'UTC')])
+        with patch('zzzgrams.clients.secrets_client.shared_cache', return_value=cache), \
+                patch('builtins.print'):
+            results = run_bucket(bucket, service_factory=factory)
+            packed = run_bucket(bucket, service_factory=factory, packed=True)
+        self.assertEqual(results['good'], {'success': True})
+        self.assertEqual((results['bad']['success'], results['bad']['error']), (False, 'throttled'))
+        self.assertEqual(packed, {'bad': packed['bad'], 'good': {'success': True}})
+        self.assertEqual(packed['bad']['error'], 'throttled')
+
+
+if __name__ == '__main__':
+    unittest.main()
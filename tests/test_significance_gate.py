@@ -0,0 +1,144 @@
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests.helpers import night
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.services.significance_gate import GatePolicy, SignificanceGate, format_minutes
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+from zzzgrams.services.trend_engine import TrendStore
+
+
+class TestSignificanceGate(unittest.TestCase):
+    """Test cases for SignificanceGate"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.trends = TrendStore(os.path.join(tmp.name, 'trends'))
+        self.gate_dir = os.path.join(tmp.name, 'gate')
+        # Eight steady nights alternating 400/410 minutes, one waking each;
+        # the 8th night makes longestSleep no longer a new best
+        start = date(2025, 1, 1)
+        for i in range(8):
+            self.trends.update('baby', start + timedelta(days=i), night(400 + (i % 2) * 10, 1))
+        self.next_day = start + timedelta(days=8)
+
+    def _evaluate(self, gate, sleep_data):
+        baseline, trends = self.trends.advance('baby', self.next_day, sleep_data)
+        return gate.evaluate('baby', sleep_data, baseline, trends)
+
+    def test_quiet_night_uses_template(self):
+        """Test that a night close to the baseline gets a template message"""
+        gate = SignificanceGate(self.gate_dir, GatePolicy(streak_milestones=[]))
+        decision = self._evaluate(gate, night(402, 1))
+        self.assertFalse(decision.significant)
+        self.assertEqual(decision.action, 'template')
+        self.assertIn('6h 42m', decision.message)
+        self.assertIn('1 waking', decision.message)
+
+    def test_big_swing_is_significant(self):
+        """Test that large changes in sleep and wakings need Bedrock"""
+        gate = SignificanceGate(self.gate_dir, GatePolicy(streak_milestones=[]))
+        decision = self._evaluate(gate, night(250, 5))
+        self.assertTrue(decision.significant)
+        self.assertEqual(decision.reasons, ['night_sleep', 'wakings'])
+        self.assertIsNone(decision.message)
+
+    def test_not_enough_history(self):
+        """Test that babies with too little history always go to Bedrock"""
+        gate = SignificanceGate(self.gate_dir, GatePolicy(min_nights=30))
+        self.assertEqual(self._evaluate(gate, night(402, 1)).reasons, ['history'])
+
+    def test_cached_and_refresh(self):
+        """Test reusing the cached message and the forced refresh after quiet nights"""
+        gate = SignificanceGate(self.gate_dir, GatePolicy(on_quiet='cached', streak_milestones=[],
+                                                          max_quiet_nights=1))
+        self.assertEqual(self._evaluate(gate, night(402, 1)).reasons, ['no_cached_message'])
+        gate.remember('baby', 'Lovely night!')
+
+        self.next_day += timedelta(days=1)
+        decision = self._evaluate(gate, night(405, 1))
+        self.assertEqual((decision.action, decision.message), ('cached', 'Lovely night!'))
+
+        # One quiet night allowed in a row, then a fresh message is forced
+        self.next_day += timedelta(days=1)
+        self.assertEqual(self._evaluate(gate, night(405, 1)).reasons, ['refresh'])
+
+    def test_rerun_same_night(self):
+        """Test that a rerun of the same night does not bump the quiet-night count"""
+        gate = SignificanceGate(self.gate_dir, GatePolicy(streak_milestones=[], max_quiet_nights=1))
+        first = self._evaluate(gate, night(402, 1))
+        self.assertFalse(first.significant)
+
+        # A retry for the same night sees the same baseline and does not count twice
+        baseline, trends = self.trends.advance('baby', self.next_day, night(402, 1))
+        self.assertEqual(baseline['nights'], 8)
+        retry = gate.evaluate('baby', night(402, 1), baseline, trends)
+        self.assertEqual((retry.significant, retry.message), (False, first.message))
+
+        self.next_day += timedelta(days=1)
+        self.assertEqual(self._evaluate(gate, night(402, 1)).reasons, ['refresh'])
+
+    def test_family_policy_overrides(self):
+        """Test per-family policies and policy validation"""
+        gate = SignificanceGate.from_config(self.gate_dir, {
+            'default': {'on_quiet': 'digest', 'streak_milestones': []},
+            'families': {'other': {'on_quiet': 'bedrock'}},
+        })
+        self.assertEqual(gate.policy_for('other').on_quiet, 'bedrock')
+        self.assertEqual(gate.policy_for('other').streak_milestones, [])
+        decision = self._evaluate(gate, night(402, 1))
+        self.assertEqual(decision.action, 'digest')
+        self.assertTrue(decision.message.startswith('Steady night: 6h 42m night sleep, 1 waking'))
+
+        with self.assertRaises(ValueError):
+            GatePolicy.from_dict({'on_quiet': 'sometimes'})
+        with self.assertRaises(ValueError):
+            GatePolicy.from_dict({'threshold': 1})
+
+    def test_format_minutes(self):
+        """Test the hours and minutes formatting"""
+        self.assertEqual(format_minutes(405.4), '6h 45m')
+        self.assertEqual(format_minutes(42), '42m')
+
+
+class TestServiceGate(unittest.TestCase):
+    """Test the gate wiring in SleepAnalyzerService"""
+
+    def test_quiet_night_skips_bedrock(self):
+        """Test that the service skips Bedrock on a quiet night"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        trends = TrendStore(os.path.join(tmp.name, 'trends'))
+        start = date(2020, 1, 1)
+        for i in range(10):
+            trends.update('baby', start + timedelta(days=i), night(400, 1))
+
+        snoo = Mock()
+        snoo.BABY_ID = 'baby'
+        snoo.get_sleep_data.return_value = SleepData(3, 200.0, 580.0, 180.0, 400.0, 1)
+        bedrock = Mock()
+        sns = Mock()
+        sns.publish_sleep_analysis.return_value = True
+        gate = SignificanceGate(os.path.join(tmp.name, 'gate'), GatePolicy(streak_milestones=[]))
+
+        service = SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns,
+                                       trend_store=trends, gate=gate)
+        result = service.analyze_sleep_data()
+
+        self.assertTrue(result['success'])
+        self.assertFalse(result['gate']['significant'])
+        bedrock.generate_sleep_insights.assert_not_called()
+        self.assertEqual(sns.publish_sleep_analysis.call_args[0][0], result['ai_insights'])
+
+
+if __name__ == '__main__':
+    unittest.main()
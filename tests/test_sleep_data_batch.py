@@ -0,0 +1,81 @@
+import unittest
+from dataclasses import asdict
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.models.sleep_data_batch import SleepDataBatch, SleepDataRow, seconds_to_minutes
+
+
+class TestSleepDataBatch(unittest.TestCase):
+    """Test cases for SleepDataBatch"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.payloads = [
+            {'naps': 3, 'longestSleep': 7200, 'totalSleep': 28800, 'daySleep': 10800,
+             'nightSleep': 18000, 'nightWakings': 2},
+            {'naps': 4, 'longestSleep': 5403, 'totalSleep': 50421, 'daySleep': 14409,
+             'nightSleep': 36012, 'nightWakings': 5},
+            {'naps': 1},
+        ]
+        self.batch = SleepDataBatch.from_dicts(self.payloads)
+
+    def test_sleep_data_has_slots(self):
+        """Test that the scalar class uses __slots__ and still works with asdict"""
+        sleep_data = SleepData.from_dict(self.payloads[0])
+        self.assertFalse(hasattr(sleep_data, '__dict__'))
+        self.assertEqual(asdict(sleep_data)['nightSleep'], 300.0)
+
+    def test_from_dicts_matches_from_dict(self):
+        """Test that the vectorized constructor matches SleepData.from_dict"""
+        self.assertEqual(len(self.batch), 3)
+        for payload, row in zip(self.payloads, self.batch):
+            self.assertEqual(row, SleepData.from_dict(payload))
+            self.assertEqual(row.to_dict(), asdict(SleepData.from_dict(payload)))
+
+    def test_rounding_parity_on_ties(self):
+        """Test that rounding ties match Python's round exactly"""
+        seconds = np.arange(0, 20000)
+        expected = [round(int(s) / 60, 1) for s in seconds]
+        self.assertEqual(seconds_to_minutes(seconds).tolist(), expected)
+
+    def test_row_view_is_zero_copy(self):
+        """Test that rows and slices are views onto the columns"""
+        row = self.batch[1]
+        self.assertIsInstance(row, SleepDataRow)
+        self.batch.nightWakings[1] = 9
+        self.assertEqual(row.nightWakings, 9)
+
+        head = self.batch[:2]
+        self.assertTrue(np.shares_memory(head.nightSleep, self.batch.nightSleep))
+        self.assertEqual(len(head), 2)
+        self.assertEqual(self.batch[-1].naps, 1)
+        with self.assertRaises(IndexError):
+            self.batch[3]
+
+    def test_wraps_columns_without_copy(self):
+        """Test that existing arrays are wrapped, not copied"""
+        night = np.array([300.0, 420.5])
+        batch = SleepDataBatch(naps=[1, 2], longestSleep=[1.0, 2.0], totalSleep=[3.0, 4.0],
+                               daySleep=[5.0, 6.0], nightSleep=night, nightWakings=[0, 1])
+        self.assertIs(batch.nightSleep, night)
+        with self.assertRaises(ValueError):
+            SleepDataBatch(naps=[1], longestSleep=[1.0, 2.0], totalSleep=[3.0], daySleep=[5.0],
+                           nightSleep=[1.0], nightWakings=[0])
+
+    def test_from_sleep_data_round_trip(self):
+        """Test building from SleepData records and materializing back"""
+        records = [SleepData.from_dict(p) for p in self.payloads]
+        batch = SleepDataBatch.from_sleep_data(records)
+        self.assertEqual([row.to_sleep_data() for row in batch], records)
+        self.assertEqual(batch.nbytes, 3 * (2 * 4 + 4 * 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
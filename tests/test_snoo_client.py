@@ -1,5 +1,6 @@
 import unittest
 from unittest.mock import Mock, patch
+import requests
 import sys
 import os
 
@@ -113,7 +114,7 @@ class TestSnooClient(unittest.TestCase):
         }
         
         # Mock sleep data response
-        mock_response = Mock()
+        mock_response = Mock(status_code=200)
         mock_response.json.return_value = {
             'naps': 3,
             'longestSleep': 7200,  # 120 minutes in seconds
@@ -146,7 +147,7 @@ class TestSnooClient(unittest.TestCase):
         }
         
         # Mock sleep data response
-        mock_response = Mock()
+        mock_response = Mock(status_code=200)
         mock_response.json.return_value = {
             'naps': 3,
             'longestSleep': 7200,
@@ -165,6 +166,18 @@ class TestSnooClient(unittest.TestCase):
         self.assertEqual(result['longestSleep'], 7200)  # Raw seconds
         self.assertEqual(result['totalSleep'], 28800)
 
+    @patch('requests.get')
+    @patch.object(SnooClient, '_authorize')
+    def test_get_sleep_data_error_status(self, mock_authorize, mock_get):
+        """Test that an error response raises instead of parsing into a night of zeros"""
+        mock_authorize.return_value = {'aws': {'id': 'id_token'}, 'snoo': 'snoo_token'}
+        mock_get.return_value = Mock(status_code=503)
+        mock_get.return_value.json.return_value = {'message': 'Service Unavailable'}
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_sleep_data(as_object=True)
+        self.assertEqual(self.client.get_sleep_data(as_object=False), {'message': 'Service Unavailable'})
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
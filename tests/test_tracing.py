@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import Mock, patch
+import json
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from zzzgrams.utils import tracing
+from zzzgrams.clients.bedrock_client import BedrockClient
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+from zzzgrams.models.sleep_data import SleepData
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for the span/timer API"""
+
+    def test_span_is_noop_without_trace(self):
+        """Test that spans are shared falsy no-ops when tracing is off"""
+        with tracing.span('anything') as sp:
+            self.assertFalse(sp)
+            self.assertIs(sp.set(bytes=10), tracing.NOOP_SPAN)
+        self.assertIsNone(tracing.current_trace())
+
+    @patch.dict(os.environ, {'ZZZGRAMS_TRACE': ''})
+    def test_start_trace_disabled(self):
+        """Test that a disabled trace yields None"""
+        with tracing.start_trace('run') as trace:
+            self.assertIsNone(trace)
+            self.assertIs(tracing.span('stage'), tracing.NOOP_SPAN)
+
+    @patch.dict(os.environ, {'ZZZGRAMS_TRACE': '1'})
+    def test_start_trace_from_env(self):
+        """Test that ZZZGRAMS_TRACE switches tracing on"""
+        with tracing.start_trace('run', log=False) as trace:
+            self.assertIsNotNone(trace)
+
+    def test_nested_spans_and_export(self):
+        """Test span nesting, attributes and error capture"""
+        with patch('builtins.print') as mock_print:
+            with tracing.start_trace('run', enabled=True) as trace:
+                with tracing.span('outer') as outer:
+                    with tracing.span('inner') as inner:
+                        inner.set(bytes=42, status=200)
+                with self.assertRaises(ValueError):
+                    with tracing.span('failing'):
+                        raise ValueError('boom')
+
+        exported = trace.export()
+        spans = {s['name']: s for s in exported['spans']}
+        self.assertEqual(spans['inner']['parent_id'], outer.span_id)
+        self.assertIsNone(spans['outer']['parent_id'])
+        self.assertEqual(spans['inner']['attributes'], {'bytes': 42, 'status': 200})
+        self.assertIn('boom', spans['failing']['error'])
+        self.assertIsNotNone(exported['duration_ms'])
+
+        # One structured log line per span
+        self.assertEqual(mock_print.call_count, 3)
+        line = json.loads(mock_print.call_args_list[0][0][0])
+        self.assertEqual(line['type'], 'span')
+        self.assertEqual(line['trace_id'], trace.trace_id)
+
+    def test_bedrock_span_attributes(self):
+        """Test that the Bedrock invoke span records tokens and retries"""
+        body = Mock()
+        body.read.return_value = json.dumps({
+            'inputTextTokenCount': 310,
+            'results': [{'outputText': 'Nice!', 'tokenCount': 12}]
+        })
+        client = BedrockClient()
+        client.bedrock = Mock()
+        client.bedrock.invoke_model.return_value = {
+            'body': body,
+            'ResponseMetadata': {'HTTPStatusCode': 200, 'RetryAttempts': 1}
+        }
+
+        with tracing.start_trace('run', enabled=True, log=False) as trace:
+            self.assertEqual(client.generate_sleep_insights({'nightSleep': 300, 'nightWakings': 2}), 'Nice!')
+
+        attrs = trace.export()['spans'][0]['attributes']
+        self.assertEqual(attrs['input_tokens'], 310)
+        self.assertEqual(attrs['output_tokens'], 12)
+        self.assertEqual(attrs['retries'], 1)
+        self.assertEqual(attrs['status'], 200)
+
+    def test_service_exports_stage_spans(self):
+        """Test that the service returns per-stage spans when tracing"""
+        service = SleepAnalyzerService(trace=True)
+        service.snoo_client = Mock()
+        service.snoo_client.get_sleep_data.return_value = SleepData(3, 120.0, 480.0, 180.0, 300.0, 2)
+        service.bedrock_client = Mock()
+        service.bedrock_client.generate_sleep_insights.return_value = '"Great night!"'
+        service.sns_client = Mock()
+        service.sns_client.publish_sleep_analysis.return_value = True
+
+        with patch('builtins.print'):
+            result = service.analyze_sleep_data()
+
+        self.assertTrue(result['success'])
+        names = [s['name'] for s in result['trace']['spans']]
+        self.assertEqual(names, ['fetch', 'insights', 'clean', 'publish'])
+        json.dumps(result)
+
+    def test_service_omits_trace_when_disabled(self):
+        """Test that the response payload is unchanged with tracing off"""
+        service = SleepAnalyzerService(trace=False)
+        service.snoo_client = Mock()
+        service.snoo_client.get_sleep_data.side_effect = Exception('Snoo API error')
+
+        result = service.analyze_sleep_data()
+
+        self.assertFalse(result['success'])
+        self.assertNotIn('trace', result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import unittest
+from unittest.mock import Mock, patch
+import statistics
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+
+# Add the project root and src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tests.helpers import night
+from zzzgrams.clients.bedrock_client import BedrockClient
+from zzzgrams.clients.snoo_client import SnooClient
+from zzzgrams.clients.sns_client import SNSClient
+from zzzgrams.models.sleep_data import SleepData
+from zzzgrams.services.sleep_analyzer_service import SleepAnalyzerService
+from zzzgrams.services.trend_engine import BabyTrends, RollingWindow, TrendStore
+from zzzgrams.utils.trend_text import describe_trends
+
+
+class TestRollingWindow(unittest.TestCase):
+    """Test cases for RollingWindow"""
+
+    def test_mean_and_std_match_statistics(self):
+        """Test that rolling mean and std match the statistics module"""
+        values = [float(v) for v in range(1, 51)]
+        window = RollingWindow(7)
+        for i, value in enumerate(values):
+            window.push(value)
+            tail = values[max(0, i - 6):i + 1]
+            self.assertAlmostEqual(window.mean, statistics.fmean(tail))
+            self.assertAlmostEqual(window.std, statistics.pstdev(tail))
+        self.assertEqual(len(window), 7)
+
+    def test_empty_window(self):
+        """Test that an empty window has no mean or std"""
+        window = RollingWindow(7)
+        self.assertIsNone(window.mean)
+        self.assertIsNone(window.std)
+
+
+class TestBabyTrends(unittest.TestCase):
+    """Test cases for BabyTrends"""
+
+    def test_streaks_bests_and_idempotence(self):
+        """Test streaks, personal bests and that a repeated day is skipped"""
+        trends = BabyTrends('baby')
+        start = date(2025, 1, 1)
+        for i, (minutes, wakings) in enumerate([(300, 3), (380, 1), (400, 0), (390, 1)]):
+            self.assertTrue(trends.update(start + timedelta(days=i), night(minutes, wakings)))
+
+        summary = trends.summary()
+        self.assertEqual(summary['nights'], 4)
+        self.assertEqual(summary['good_night_streak'], 3)
+        self.assertEqual(summary['few_wakings_streak'], 3)
+        self.assertEqual(summary['best_night_sleep'], 400.0)
+        self.assertEqual(summary['fewest_wakings'], 0)
+        self.assertEqual(summary['new_bests'], [])
+        self.assertEqual(summary['night_sleep_7d_mean'], 367.5)
+
+        # Re-running the same night does not double count it
+        self.assertFalse(trends.update(start + timedelta(days=3), night(390, 1)))
+        self.assertEqual(trends.summary()['nights'], 4)
+
+    def test_gap_resets_streaks(self):
+        """Test that a missing night resets streaks but keeps windows"""
+        trends = BabyTrends('baby')
+        trends.update('2025-01-01', night(400, 0))
+        trends.update('2025-01-02', night(400, 0))
+        trends.update('2025-01-05', night(410, 0))
+        summary = trends.summary()
+        self.assertEqual(summary['good_night_streak'], 1)
+        self.assertEqual(summary['new_bests'], ['night_sleep', 'longest_sleep'])
+
+    def test_round_trip(self):
+        """Test that trends survive a to_dict/from_dict round trip"""
+        trends = BabyTrends('baby')
+        start = date(2025, 1, 1)
+        for i in range(40):
+            trends.update(start + timedelta(days=i), night(300 + i, i % 3))
+        restored = BabyTrends.from_dict(trends.to_dict())
+        self.assertEqual(restored.summary(), trends.summary())
+
+
+class TestTrendStore(unittest.TestCase):
+    """Test cases for TrendStore"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def test_update_persists(self):
+        """Test that TrendStore.update saves state between calls"""
+        store = TrendStore(self.directory)
+        store.update('baby/1', '2025-01-01', night(300, 2))
+        summary = TrendStore(self.directory).update('baby/1', '2025-01-02', night(400, 1))
+        self.assertEqual(summary['nights'], 2)
+        self.assertEqual(summary['night_sleep_7d_mean'], 350.0)
+
+    def test_advance_rerun_keeps_baseline(self):
+        """Test that rerunning the last counted night returns the baseline from before it"""
+        store = TrendStore(self.directory)
+        store.update('baby', '2025-01-01', night(300, 1))
+        first_baseline, first = store.advance('baby', '2025-01-02', night(500, 1))
+        baseline, summary = store.advance('baby', date(2025, 1, 2), night(500, 1))
+        self.assertEqual(baseline, first_baseline)
+        self.assertEqual(baseline['nights'], 1)
+        self.assertEqual(summary, first)
+
+    def test_from_env(self):
+        """Test that the store is only built when ZZZGRAMS_STATE_DIR is set"""
+        with patch.dict(os.environ, clear=True):
+            self.assertIsNone(TrendStore.from_env())
+        with patch.dict(os.environ, {'ZZZGRAMS_STATE_DIR': self.directory}):
+            self.assertEqual(TrendStore.from_env().directory, os.path.join(self.directory, 'trends'))
+
+
+class TestTrendText(unittest.TestCase):
+    """Test cases for trend rendering in prompts and messages"""
+
+    def setUp(self):
+        trends = BabyTrends('baby')
+        trends.update('2025-01-01', night(370, 1))
+        trends.update('2025-01-02', night(400, 0))
+        self.summary = trends.summary()
+
+    def test_describe_trends(self):
+        """Test the human readable trend lines"""
+        lines = describe_trends(self.summary)
+        self.assertIn('7-night average night sleep: 385.0 minutes (30-night: 385.0 minutes)', lines)
+        self.assertIn('Streak: 2 nights in a row with 6+ hours of night sleep', lines)
+        self.assertIn('New personal best: longest night sleep', lines)
+        self.assertEqual(describe_trends({'nights': 1}), [])
+
+    def test_prompt_and_message(self):
+        """Test that trends reach the Bedrock prompt and the SNS message"""
+        sleep_data = night(400, 0)
+        prompt = BedrockClient()._create_sleep_prompt(sleep_data, self.summary)
+        self.assertIn('Recent Trends:', prompt)
+        self.assertNotIn('Recent Trends:', BedrockClient()._create_sleep_prompt(sleep_data))
+
+        message = SNSClient()._create_sns_message('Nice night', sleep_data, self.summary)
+        self.assertIn('Trends:', message)
+        self.assertEqual(SNSClient()._create_sns_message('Nice night', sleep_data, None),
+                         SNSClient()._create_sns_message('Nice night', sleep_data))
+
+
+class TestServiceTrends(unittest.TestCase):
+    """Test the trend store wiring in SleepAnalyzerService"""
+
+    def test_trends_passed_to_clients(self):
+        """Test that the service passes trends to Bedrock and SNS"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        snoo = Mock()
+        snoo.BABY_ID = 'baby'
+        snoo.get_sleep_data.return_value = SleepData(3, 200.0, 580.0, 180.0, 400.0, 0)
+        bedrock = Mock()
+        bedrock.generate_sleep_insights.return_value = 'Nice night'
+        sns = Mock()
+        sns.publish_sleep_analysis.return_value = True
+
+        service = SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns,
+                                       trend_store=TrendStore(tmp.name))
+        result = service.analyze_sleep_data()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['trends']['nights'], 1)
+        self.assertEqual(bedrock.generate_sleep_insights.call_args[0][1], result['trends'])
+        self.assertEqual(sns.publish_sleep_analysis.call_args[0][2], result['trends'])
+
+    @patch.object(SnooClient, '_authorize', return_value={'aws': {'id': 'id_token'}, 'snoo': 'snoo_token'})
+    def test_failed_fetch_leaves_stores_unchanged(self, _authorize):
+        """Test that a 503 from Snoo neither advances trends nor records a night"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = TrendStore(tmp.name)
+        store.update('baby', date(2025, 1, 1), night(400.0, 1))
+        before = store.load('baby').to_dict()
+
+        http = Mock()
+        http.get.return_value = Mock(status_code=503, content=b'{}')
+        http.get.return_value.json.return_value = {'message': 'Service Unavailable'}
+        snoo = SnooClient(email='x', password='y', baby_id='baby', session=http)
+        bedrock = Mock()
+        sns = Mock()
+        history_path = os.path.join(tmp.name, 'history.zzh')
+        service = SleepAnalyzerService(snoo_client=snoo, bedrock_client=bedrock, sns_client=sns,
+                                       trend_store=store, history_path=history_path)
+        with patch('builtins.print'):
+            result = service.analyze_sleep_data()
+
+        self.assertFalse(result['success'])
+        self.assertIn('503', result['error'])
+        self.assertEqual(store.load('baby').to_dict(), before)
+        self.assertFalse(os.path.exists(history_path))
+        sns.publish_sleep_analysis.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()